@@ -1,4 +1,5 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask_socketio import SocketIO
 import json
 import os
 from werkzeug.security import check_password_hash, generate_password_hash
@@ -9,12 +10,15 @@ from datetime import datetime, timedelta
 
 # Import database manager
 from database import DatabaseManager
+from model_registry import model_registry
+from result_cache import result_cache
+from inference_client import InferenceError, get_inference_client
 
 # Import blueprints
 from features.feature1.routes import feature1_bp
 from features.feature2.routes import feature2_bp
 from features.feature3.routes import feature3_bp
-from features.feature4.routes import feature4_bp
+from features.feature4.routes import feature4_bp, register_socketio_handlers
 from features.feature5.routes import feature5_bp
 from features.feature6.routes import feature6_bp
 
@@ -304,6 +308,59 @@ def api_dashboard_stats():
     
     return jsonify(stats)
 
+# Model registry management
+@app.route('/api/models')
+@login_required
+@role_required(['captain', 'commander'])
+def api_models():
+    response = {'success': True, 'models': model_registry.get_stats()}
+    client = get_inference_client()
+    if client is not None:
+        # Models live in the shared inference server; report its registry and batching
+        try:
+            response['inference_server'] = dict(client.stats(), address=client.address)
+        except InferenceError as e:
+            response['inference_server'] = {'address': client.address, 'error': str(e)}
+    return jsonify(response)
+
+@app.route('/api/models/reload', methods=['POST'])
+@login_required
+@role_required(['captain', 'commander'])
+def api_models_reload():
+    key = (request.get_json(silent=True) or {}).get('key')
+    if not key:
+        return jsonify({'success': False, 'error': 'No model key provided'}), 400
+    try:
+        model_registry.reload(key)
+        return jsonify({'success': True, 'model': model_registry.get_stats().get(key)})
+    except KeyError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Reload failed: {str(e)}'}), 500
+
+@app.route('/api/models/evict', methods=['POST'])
+@login_required
+@role_required(['captain', 'commander'])
+def api_models_evict():
+    key = (request.get_json(silent=True) or {}).get('key')
+    if not key:
+        return jsonify({'success': False, 'error': 'No model key provided'}), 400
+    evicted = model_registry.evict(key)
+    return jsonify({'success': evicted, 'key': key})
+
+@app.route('/api/result_cache')
+@login_required
+@role_required(['captain', 'commander'])
+def api_result_cache():
+    return jsonify({'success': True, 'cache': result_cache.get_stats()})
+
+@app.route('/api/result_cache/clear', methods=['POST'])
+@login_required
+@role_required(['captain', 'commander'])
+def api_result_cache_clear():
+    result_cache.clear()
+    return jsonify({'success': True, 'cache': result_cache.get_stats()})
+
 # AJAX endpoint for dynamic weather updates
 @app.route('/api/weather')
 @login_required
@@ -356,6 +413,10 @@ app.register_blueprint(feature3_bp)
 app.register_blueprint(feature4_bp)
 app.register_blueprint(feature5_bp)
 app.register_blueprint(feature6_bp)
+
+# Push channel for live detection (feature4); threading mode so the detection thread can emit directly
+socketio = SocketIO(app, async_mode='threading')
+register_socketio_handlers(socketio)
 # Ensure required directories exist
 def create_required_directories():
     directories = [
@@ -383,4 +444,4 @@ if __name__ == '__main__':
     print(f"  - HttpOnly: {app.config['SESSION_COOKIE_HTTPONLY']}")
     print(f"  - SameSite: {app.config['SESSION_COOKIE_SAMESITE']}")
     
-    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5000)
\ No newline at end of file
+    socketio.run(app, debug=True, use_reloader=False, host='0.0.0.0', port=5000)
\ No newline at end of file
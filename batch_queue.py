@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+
+# Micro-batching for a shared model: callers on many threads submit their
+# items, one worker thread runs them together. Used by the inference server
+# and by feature 3 for concurrent videos.
+
+
+class BatchQueue:
+    """
+    Requests for one model and settings, run together on a worker thread
+
+    The first waiting request opens a batch; others that arrive within
+    window seconds join it while it holds fewer than max_batch items.
+    """
+
+    def __init__(self, run_batch, window, max_batch):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = {'requests': 0, 'items': 0, 'batches': 0, 'busy_time': 0.0}
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, items):
+        """Run items in the next batch and return their outputs (blocks)"""
+        pending = {'items': items, 'done': threading.Event(), 'outputs': None, 'error': None}
+        self._queue.put(pending)
+        pending['done'].wait()
+        if pending['error'] is not None:
+            raise pending['error']
+        return pending['outputs']
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0]['items'])
+            deadline = time.time() + self.window
+            while size < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending['items'])
+
+            start = time.time()
+            try:
+                outputs = self.run_batch([item for pending in batch for item in pending['items']])
+                offset = 0
+                for pending in batch:
+                    pending['outputs'] = outputs[offset:offset + len(pending['items'])]
+                    offset += len(pending['items'])
+            except Exception as e:
+                for pending in batch:
+                    pending['error'] = e
+            self.stats['busy_time'] += time.time() - start
+            self.stats['requests'] += len(batch)
+            self.stats['items'] += size
+            self.stats['batches'] += 1
+            for pending in batch:
+                pending['done'].set()
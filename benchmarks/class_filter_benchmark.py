@@ -0,0 +1,91 @@
+"""
+Benchmark: Feature 3 detection filters, post-filtering vs classes= in predict
+
+Usage (from the repository root):
+    python benchmarks/class_filter_benchmark.py IMAGE [IMAGE ...] [--model yolo11x.pt] [--imgsz 1280] [--repeats 10]
+
+For every filter the image is run through the model twice: once with all 80
+classes followed by the dict-level filter (the old path), and once with the
+filter's class IDs passed as classes= (the new path). The report splits
+ultralytics' postprocess (NMS) time from the extract + draw time and shows
+how many boxes each path had to handle. Use busy scenes (crowds, traffic).
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features.feature3.detection_engine import CompleteObjectDetectionSystem, FILTER_CLASS_NAMES
+
+
+class BenchmarkSystem(CompleteObjectDetectionSystem):
+    """Detection system around an explicit model, without the registry"""
+
+    def __init__(self, model):
+        self._model = model
+        self.class_colors = {}
+        self._filter_class_ids = {}
+        self.colors = [(0, 255, 0), (255, 0, 0), (0, 0, 255)]
+
+    @property
+    def model(self):
+        return self._model
+
+    def tier_model(self, tier=None):
+        return self._model
+
+
+def run(system, images, detection_filter, classes, imgsz, repeats):
+    nms = draw = 0.0
+    boxes = kept = 0
+    for _ in range(repeats):
+        for image in images:
+            results = system.model.predict(image, conf=0.3, imgsz=imgsz, classes=classes, verbose=False)
+            nms += results[0].speed['postprocess'] / 1000
+            boxes += len(results[0].boxes)
+
+            start = time.time()
+            if classes is None:
+                # Old path: every box becomes a dict, then the filter drops most of them
+                detections = [{"class": results[0].names[int(c)], "confidence": float(p), "bbox": list(map(int, b))}
+                              for b, p, c in zip(results[0].boxes.xyxy, results[0].boxes.conf, results[0].boxes.cls)]
+                detections = system.filter_detections_by_type(detections, detection_filter)
+            else:
+                detections = system.extract_detections(results, detection_filter)
+            system.draw_boxes(image.copy(), detections, detection_filter)
+            draw += time.time() - start
+            kept += len(detections)
+    calls = repeats * len(images)
+    return nms / calls * 1000, draw / calls * 1000, boxes / calls, kept / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--model', default='yolo11x.pt')
+    parser.add_argument('--imgsz', type=int, default=1280)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    system = BenchmarkSystem(YOLO(args.model))
+    images = [cv2.imread(path) for path in args.images]
+    # Warm-up
+    system.model.predict(images[0], conf=0.3, imgsz=args.imgsz, verbose=False)
+
+    print(f"{args.model} @ {args.imgsz}, {len(images)} image(s) x {args.repeats}")
+    print(f"{'filter':>10} | {'path':>9} | {'NMS (ms)':>9} | {'extract+draw (ms)':>17} | {'boxes out of NMS':>16} | {'kept':>6}")
+    print("-" * 84)
+    for detection_filter in FILTER_CLASS_NAMES:
+        classes = system.predict_classes(detection_filter)
+        for path, path_classes in (('post', None), ('classes=', classes)):
+            nms, draw, boxes, kept = run(system, images, detection_filter, path_classes, args.imgsz, args.repeats)
+            print(f"{detection_filter:>10} | {path:>9} | {nms:>9.2f} | {draw:>17.2f} | {boxes:>16.1f} | {kept:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: Feature 4 aggregate detection FPS vs camera count on CPU
+
+Usage (from the repository root):
+    python benchmarks/live_stream_benchmark.py [--image IMAGE] [--cameras 1,2,4,8] [--duration 10]
+                                               [--batch-size 8] [--deadline-ms 15] [--camera-fps 30]
+
+Each simulated camera is a thread that produces a frame every 1/camera-fps
+seconds and, like LiveStream, submits its newest frame and waits for the
+result. Every camera count is run twice through the feature 4 FrameScheduler:
+once with batch size 1 (one forward pass per frame, the pre-scheduler
+behaviour) and once with the given batch size and deadline. The report shows
+aggregate and per-camera FPS, the average batch and the mean frame latency.
+Without --image a synthetic 640x480 frame is used.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features.feature4.scheduler import FrameScheduler
+
+
+def run(model, frame, cameras, duration, camera_fps, batch_size, deadline):
+    def predict_batch(frames):
+        return model(frames, conf=0.6, iou=0.5, verbose=False, device='cpu', half=False)
+
+    scheduler = FrameScheduler(predict_batch, max_batch=batch_size, deadline=deadline)
+    stop = threading.Event()
+    processed = [0] * cameras
+    latency = [0.0] * cameras
+
+    def camera(index):
+        stream_id = f"camera-{index}"
+        scheduler.register(stream_id)
+        interval = 1.0 / camera_fps
+        next_frame = time.time()
+        while not stop.is_set():
+            # A real camera keeps producing; the stream always takes the newest frame
+            now = time.time()
+            if now < next_frame:
+                time.sleep(next_frame - now)
+            next_frame = max(next_frame + interval, time.time())
+            start = time.time()
+            scheduler.submit(stream_id, frame)
+            latency[index] += time.time() - start
+            processed[index] += 1
+        scheduler.unregister(stream_id)
+
+    threads = [threading.Thread(target=camera, args=(index,), daemon=True) for index in range(cameras)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    frames = sum(processed)
+    stats = scheduler.get_stats()
+    return frames / elapsed, frames / elapsed / cameras, stats['avg_batch'], sum(latency) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image')
+    parser.add_argument('--model', default='yolov8n.pt')
+    parser.add_argument('--cameras', default='1,2,4,8')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--camera-fps', type=float, default=30)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--deadline-ms', type=float, default=15)
+    args = parser.parse_args()
+
+    if args.image:
+        frame = cv2.resize(cv2.imread(args.image), (640, 480))
+    else:
+        frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    model = YOLO(args.model)
+    # Warm-up
+    model([frame] * args.batch_size, verbose=False, device='cpu')
+
+    print(f"{args.model} on CPU, cameras at {args.camera_fps:g} FPS, {args.duration:g} s per run")
+    print(f"{'cameras':>7} | {'batching':>16} | {'aggregate FPS':>13} | {'per camera':>10} | {'avg batch':>9} | {'latency (ms)':>12}")
+    print("-" * 83)
+    for cameras in map(int, args.cameras.split(',')):
+        for label, batch_size, deadline in (('per frame', 1, 0.0),
+                                            (f"{args.batch_size} / {args.deadline_ms:g} ms", args.batch_size,
+                                             args.deadline_ms / 1000)):
+            total, per_camera, avg_batch, latency = run(model, frame, cameras, args.duration, args.camera_fps,
+                                                        batch_size, deadline)
+            print(f"{cameras:>7} | {label:>16} | {total:>13.1f} | {per_camera:>10.1f} | {avg_batch:>9.2f} | {latency:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Report: INT8 quantization vs fp32 for the CPU detectors
+
+Usage (from the repository root):
+    python benchmarks/quantization_report.py [--calibration-dir static/uploads] [--eval-dir DIR]
+                                             [--limit 32] [--output quantization_report.json]
+
+Models:
+    feature3  yolo11x.pt @ 1280   fp32 ONNX vs static INT8 ONNX
+    feature4  yolov8n.pt @ 640    fp32 ONNX vs static INT8 ONNX
+    feature6  SINet-V2 (Net_epoch_best.pth) @ 352   fp32 PyTorch vs FX static INT8
+
+If static quantization of SINet fails, the model stays fp32: its row then compares
+fp32 with fp32 and its 'quantization' field reads 'fp32 (static quantization failed)'.
+
+There are no labels locally, so accuracy drift is measured against the fp32
+model's own output: mAP@0.5 and mAP@0.5:0.95 of the INT8 detections with the
+fp32 detections as ground truth, and mask IoU / MAE for SINet. Memory is the
+serialized model size. Images are taken in sorted order, so reruns on the
+same folders are reproducible. Use an eval folder that is disjoint from the
+calibration folder for an honest estimate.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantization import CALIBRATION_DIR, calibration_images, quantize_torch_model, quantize_yolo_onnx
+from yolo_backends import export_yolo
+from features.feature3.tracking import iou_matrix
+
+YOLO_CONFIGS = [('feature3', 'yolo11x.pt', 1280), ('feature4', 'yolov8n.pt', 640)]
+IOU_THRESHOLDS = np.arange(0.5, 0.96, 0.05)
+
+
+def average_precision(truth, predictions, iou_threshold):
+    """
+    mAP over classes; truth/predictions are per-image lists of (class_id, conf, xyxy)
+    """
+    classes = {det[0] for dets in truth for det in dets}
+    if not classes:
+        return None
+    aps = []
+    for class_id in classes:
+        scored = []  # (confidence, is_true_positive)
+        total_truth = 0
+        for gt_dets, pred_dets in zip(truth, predictions):
+            gt = np.array([d[2] for d in gt_dets if d[0] == class_id], dtype=float).reshape(-1, 4)
+            pred = sorted((d for d in pred_dets if d[0] == class_id), key=lambda d: -d[1])
+            total_truth += len(gt)
+            matched = np.zeros(len(gt), dtype=bool)
+            ious = iou_matrix(np.array([d[2] for d in pred], dtype=float).reshape(-1, 4), gt)
+            for i, det in enumerate(pred):
+                j = int(np.argmax(ious[i])) if len(gt) else -1
+                hit = j >= 0 and ious[i, j] >= iou_threshold and not matched[j]
+                if hit:
+                    matched[j] = True
+                scored.append((det[1], hit))
+        scored.sort(key=lambda s: -s[0])
+        hits = np.array([s[1] for s in scored], dtype=float)
+        tp = np.cumsum(hits)
+        recall = tp / max(total_truth, 1)
+        precision = tp / np.arange(1, len(hits) + 1) if len(hits) else np.array([])
+        # All-point interpolated AP
+        recall = np.concatenate([[0.0], recall, [1.0]])
+        precision = np.concatenate([[1.0], precision, [0.0]])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        aps.append(float(np.sum((recall[1:] - recall[:-1]) * precision[1:])))
+    return float(np.mean(aps))
+
+
+def yolo_detections(model, images, imgsz):
+    detections, elapsed = [], 0.0
+    model.predict(images[0], imgsz=imgsz, verbose=False)  # warm-up
+    for image in images:
+        start = time.time()
+        result = model.predict(image, imgsz=imgsz, conf=0.25, verbose=False)[0]
+        elapsed += time.time() - start
+        detections.append(list(zip(result.boxes.cls.cpu().numpy().astype(int).tolist(),
+                                   result.boxes.conf.cpu().numpy().tolist(),
+                                   result.boxes.xyxy.cpu().numpy().tolist())))
+    return detections, elapsed / len(images)
+
+
+def yolo_report(feature, weights, imgsz, eval_paths, calibration_dir):
+    from ultralytics import YOLO
+
+    fp32_path = export_yolo(weights, 'onnx', imgsz)
+    int8_path = quantize_yolo_onnx(weights, imgsz, calibration_dir)
+    images = [image for image in (cv2.imread(path) for path in eval_paths) if image is not None]
+
+    fp32, fp32_latency = yolo_detections(YOLO(fp32_path, task='detect'), images, imgsz)
+    int8, int8_latency = yolo_detections(YOLO(int8_path, task='detect'), images, imgsz)
+    maps = [average_precision(fp32, int8, t) for t in IOU_THRESHOLDS]
+    return {
+        'feature': feature,
+        'model': weights,
+        'imgsz': imgsz,
+        'images': len(images),
+        'fp32_latency_ms': round(fp32_latency * 1000, 1),
+        'int8_latency_ms': round(int8_latency * 1000, 1),
+        'speedup': round(fp32_latency / int8_latency, 2),
+        'fp32_size_mb': round(os.path.getsize(fp32_path) / 1e6, 1),
+        'int8_size_mb': round(os.path.getsize(int8_path) / 1e6, 1),
+        'memory_reduction': round(1 - os.path.getsize(int8_path) / os.path.getsize(fp32_path), 3),
+        # Agreement with the fp32 model (1.0 = identical detections)
+        'map50_vs_fp32': None if maps[0] is None else round(maps[0], 4),
+        'map50_95_vs_fp32': None if maps[0] is None else round(float(np.mean(maps)), 4),
+        'fp32_detections': sum(len(d) for d in fp32),
+        'int8_detections': sum(len(d) for d in int8)
+    }
+
+
+def serialized_mb(model):
+    import torch
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+
+def sinet_report(eval_paths, calibration_dir):
+    import torch
+    from features.feature6.models import CamouflageDetectionModel
+
+    detector = CamouflageDetectionModel(quantize='')
+    fp32_model = detector.model
+    calibration = [detector.preprocess(path)[1] for path in calibration_images(calibration_dir)]
+    int8_model, mode = quantize_torch_model(fp32_model, calibration)
+
+    inputs = [detector.preprocess(path)[1] for path in eval_paths]
+    timings = {}
+    masks = {}
+    for name, model in (('fp32', fp32_model), ('int8', int8_model)):
+        with torch.no_grad():
+            model(inputs[0])  # warm-up
+            start = time.time()
+            masks[name] = [torch.sigmoid(model(tensor)[0]).squeeze().numpy() for tensor in inputs]
+            timings[name] = (time.time() - start) / len(inputs)
+
+    ious, maes = [], []
+    for fp32_mask, int8_mask in zip(masks['fp32'], masks['int8']):
+        a, b = fp32_mask >= 0.5, int8_mask >= 0.5
+        union = np.logical_or(a, b).sum()
+        ious.append(np.logical_and(a, b).sum() / union if union else 1.0)
+        maes.append(float(np.mean(np.abs(fp32_mask - int8_mask))))
+
+    fp32_size, int8_size = serialized_mb(fp32_model), serialized_mb(int8_model)
+    return {
+        'feature': 'feature6',
+        'model': detector.weight_path,
+        'quantization': mode,
+        'images': len(inputs),
+        'fp32_latency_ms': round(timings['fp32'] * 1000, 1),
+        'int8_latency_ms': round(timings['int8'] * 1000, 1),
+        'speedup': round(timings['fp32'] / timings['int8'], 2),
+        'fp32_size_mb': round(fp32_size, 1),
+        'int8_size_mb': round(int8_size, 1),
+        'memory_reduction': round(1 - int8_size / fp32_size, 3),
+        'mask_iou_vs_fp32': round(float(np.mean(ious)), 4),
+        'mask_mae_vs_fp32': round(float(np.mean(maes)), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calibration-dir', default=CALIBRATION_DIR)
+    parser.add_argument('--eval-dir')
+    parser.add_argument('--limit', type=int, default=32)
+    parser.add_argument('--output', default='quantization_report.json')
+    parser.add_argument('--skip-yolo', action='store_true')
+    parser.add_argument('--skip-sinet', action='store_true')
+    args = parser.parse_args()
+
+    eval_paths = calibration_images(args.eval_dir or args.calibration_dir, args.limit)
+    reports = []
+    if not args.skip_yolo:
+        for feature, weights, imgsz in YOLO_CONFIGS:
+            reports.append(yolo_report(feature, weights, imgsz, eval_paths, args.calibration_dir))
+    if not args.skip_sinet:
+        reports.append(sinet_report(eval_paths, args.calibration_dir))
+
+    print(f"{'feature':>8} | {'model':>18} | {'fp32 ms':>8} | {'int8 ms':>8} | {'speedup':>7} | "
+          f"{'size -%':>7} | drift vs fp32")
+    print("-" * 100)
+    for r in reports:
+        if 'mask_iou_vs_fp32' in r:
+            drift = f"mask IoU {r['mask_iou_vs_fp32']:.3f}, MAE {r['mask_mae_vs_fp32']:.4f} ({r['quantization']})"
+        else:
+            drift = f"mAP50 {r['map50_vs_fp32']}, mAP50-95 {r['map50_95_vs_fp32']}"
+        print(f"{r['feature']:>8} | {r['model']:>18} | {r['fp32_latency_ms']:>8} | {r['int8_latency_ms']:>8} | "
+              f"{r['speedup']:>6}x | {r['memory_reduction']:>7.0%} | {drift}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'calibration_dir': args.calibration_dir,
+                   'eval_dir': args.eval_dir or args.calibration_dir,
+                   'eval_images': eval_paths,
+                   'reports': reports}, f, indent=2)
+    print(f"\n📄 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
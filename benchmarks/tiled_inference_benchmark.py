@@ -0,0 +1,126 @@
+"""
+Benchmark: full-frame vs sliced (tiled) inference on high-resolution stills
+
+Usage (from the repository root):
+    python benchmarks/tiled_inference_benchmark.py IMAGE [IMAGE ...] [--model yolo11x.pt]
+        [--imgsz 640,1280] [--tiles 640,1280] [--overlap 0.2] [--labels DIR]
+
+Each image is run full-frame at every --imgsz and sliced at every --tiles
+size (tiles predicted at the tile size, plus a full-frame pass at the
+largest --imgsz). The report shows throughput and recall, overall and for
+small objects (under 32 px on the short side).
+
+With --labels, recall is measured against YOLO-format label files
+(DIR/<image stem>.txt, "class cx cy w h" normalized). Without labels, the
+reference is the union of all configurations' detections (merged across
+configurations), so recall then means "share of everything any
+configuration found". Use 4K-8K drone stills with small vehicles.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tiling import merge_detections, sliced_predict
+from features.feature3.tracking import iou_matrix
+
+SMALL_OBJECT_PX = 32
+
+
+def to_arrays(results):
+    return [np.concatenate([r.boxes.xyxy.cpu().numpy(),
+                            r.boxes.conf.cpu().numpy()[:, None],
+                            r.boxes.cls.cpu().numpy()[:, None]], axis=1) for r in results]
+
+
+def load_labels(labels_dir, image_path, image):
+    path = os.path.join(labels_dir, os.path.splitext(os.path.basename(image_path))[0] + '.txt')
+    if not os.path.exists(path):
+        return np.empty((0, 6), dtype=np.float32)
+    height, width = image.shape[:2]
+    rows = np.loadtxt(path, ndmin=2)
+    cls, cx, cy, w, h = rows[:, 0], rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, np.ones_like(cls), cls], axis=1).astype(np.float32)
+
+
+def recall(reference, detections, iou_threshold=0.5):
+    """(matched, total, small matched, small total) against reference boxes, class-aware"""
+    if len(reference) == 0:
+        return 0, 0, 0, 0
+    ious = iou_matrix(reference[:, :4], detections[:, :4]) if len(detections) else np.zeros((len(reference), 0))
+    if len(detections):
+        ious[reference[:, 5][:, None] != detections[:, 5][None, :]] = 0
+    found = ious.max(axis=1) >= iou_threshold if ious.shape[1] else np.zeros(len(reference), dtype=bool)
+    short_side = np.minimum(reference[:, 2] - reference[:, 0], reference[:, 3] - reference[:, 1])
+    small = short_side < SMALL_OBJECT_PX
+    return int(found.sum()), len(reference), int(found[small].sum()), int(small.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--model', default='yolo11x.pt')
+    parser.add_argument('--imgsz', default='640,1280')
+    parser.add_argument('--tiles', default='640,1280')
+    parser.add_argument('--overlap', type=float, default=0.2)
+    parser.add_argument('--batch', type=int, default=4)
+    parser.add_argument('--conf', type=float, default=0.3)
+    parser.add_argument('--labels')
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+    images = [(path, cv2.imread(path)) for path in args.images]
+    images = [(path, image) for path, image in images if image is not None]
+    full_sizes = [int(s) for s in args.imgsz.split(',')]
+    tile_sizes = [int(s) for s in args.tiles.split(',')]
+
+    def predict(batch, imgsz):
+        return to_arrays(model.predict(batch, imgsz=imgsz, conf=args.conf, verbose=False))
+
+    configs = [(f"full@{size}", lambda image, size=size: (predict([image], size)[0], 1)) for size in full_sizes]
+    configs += [(f"tiles@{size}", lambda image, size=size: sliced_predict(
+        lambda crops: predict(crops, size), image, size, args.overlap, args.batch,
+        predict_full=lambda frames: predict(frames, max(full_sizes)))) for size in tile_sizes]
+
+    predict([images[0][1]], max(full_sizes))  # warm-up
+    outputs = {name: [] for name, _ in configs}
+    timings = {name: 0.0 for name, _ in configs}
+    tiles = {name: 0 for name, _ in configs}
+    for _, image in images:
+        for name, run in configs:
+            start = time.time()
+            detections, count = run(image)
+            timings[name] += time.time() - start
+            tiles[name] += count
+            outputs[name].append(np.asarray(detections, dtype=np.float32).reshape(-1, 6))
+
+    if args.labels:
+        references = [load_labels(args.labels, path, image) for path, image in images]
+        reference_name = f"labels in {args.labels}"
+    else:
+        references = [merge_detections(np.concatenate([outputs[name][i] for name, _ in configs]))
+                      for i in range(len(images))]
+        reference_name = "union of all configurations"
+
+    print(f"{args.model}, {len(images)} image(s), overlap {args.overlap}, recall vs {reference_name}")
+    print(f"{'config':>11} | {'tiles/img':>9} | {'s/img':>7} | {'img/s':>6} | {'boxes/img':>9} | "
+          f"{'recall':>7} | {'small-object recall':>19}")
+    print("-" * 88)
+    for name, _ in configs:
+        totals = np.sum([recall(ref, dets) for ref, dets in zip(references, outputs[name])], axis=0)
+        per_image = timings[name] / len(images)
+        overall = totals[0] / totals[1] if totals[1] else float('nan')
+        small = totals[2] / totals[3] if totals[3] else float('nan')
+        boxes = sum(len(d) for d in outputs[name]) / len(images)
+        print(f"{name:>11} | {tiles[name] / len(images):>9.1f} | {per_image:>7.2f} | {1 / per_image:>6.2f} | "
+              f"{boxes:>9.1f} | {overall:>7.1%} | {small:>19.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: Feature 2 detection parsing, pandas path vs tensor-native path
+
+Usage (from the repository root):
+    python benchmarks/uav_parse_benchmark.py [--repeats 200]
+
+The legacy path mirrors YOLOv5's Detections.pandas() followed by
+df.iterrows(); the new path is predictions_to_array + detections_to_json.
+No model is loaded - synthetic NMS outputs are used.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features.feature2.models import predictions_to_array, detections_to_json
+
+CLASS_NAMES = [f"class_{i}" for i in range(10)]
+
+
+def make_predictions(count, seed=0):
+    """Synthetic (N, 6) NMS output on a 640x640 image"""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 600, size=(count, 2))
+    wh = rng.uniform(5, 40, size=(count, 2))
+    conf = rng.uniform(0.25, 1.0, size=(count, 1))
+    cls = rng.integers(0, len(CLASS_NAMES), size=(count, 1))
+    return torch.tensor(np.hstack([xy, xy + wh, conf, cls]), dtype=torch.float32)
+
+
+def parse_legacy(pred):
+    """Equivalent of results.pandas().xyxy[0] + iterrows"""
+    columns = ['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name']
+    rows = [x[:5] + [int(x[5]), CLASS_NAMES[int(x[5])]] for x in pred.tolist()]
+    df = pd.DataFrame(rows, columns=columns)
+
+    detections = []
+    for index, detection in df.iterrows():
+        detections.append({
+            'class': detection['name'],
+            'confidence': round(float(detection['confidence']), 2),
+            'bbox': {
+                'xmin': int(detection['xmin']),
+                'ymin': int(detection['ymin']),
+                'xmax': int(detection['xmax']),
+                'ymax': int(detection['ymax'])
+            }
+        })
+    return detections
+
+
+def parse_tensor_native(pred, class_names):
+    return detections_to_json(predictions_to_array(pred), class_names)
+
+
+def time_per_call(fn, repeats):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    class_names = np.array(CLASS_NAMES, dtype=object)
+
+    print(f"{'detections':>10} | {'pandas (ms)':>12} | {'tensor (ms)':>12} | {'array only (ms)':>15} | {'speedup':>8}")
+    print("-" * 70)
+    for count in (10, 100, 1000):
+        pred = make_predictions(count)
+
+        # Both paths must agree (confidence may differ by one rounding step)
+        for old, new in zip(parse_legacy(pred), parse_tensor_native(pred, class_names)):
+            assert old['class'] == new['class'] and old['bbox'] == new['bbox']
+            assert abs(old['confidence'] - new['confidence']) <= 0.011
+
+        repeats = max(5, args.repeats // (count // 10))
+        legacy = time_per_call(lambda: parse_legacy(pred), repeats)
+        native = time_per_call(lambda: parse_tensor_native(pred, class_names), repeats)
+        array_only = time_per_call(lambda: predictions_to_array(pred), repeats)
+
+        print(f"{count:>10} | {legacy * 1000:>12.3f} | {native * 1000:>12.3f} | "
+              f"{array_only * 1000:>15.3f} | {legacy / native:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
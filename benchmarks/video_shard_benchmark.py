@@ -0,0 +1,71 @@
+"""
+Benchmark: Feature 3 multi-process video sharding, throughput vs worker count
+
+Usage (from the repository root):
+    python benchmarks/video_shard_benchmark.py VIDEO [--workers 1,2,4,8,16,32] [--sampling all]
+
+Each worker process loads its own copy of the feature 3 model (yolo11x) and
+processes one time range of VIDEO; the annotated shards are stitched back in
+order. Worker start-up and model loading are excluded from the timings, the
+stitching pass is included. Use a clip of at least a few thousand frames so
+every shard gets a useful amount of work.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features.feature3.sharding import make_shard_pool, process_video_sharded
+
+
+def warm_up(workers):
+    """Start every worker process so model loading is not timed"""
+    pool = make_shard_pool(workers)
+    list(pool.map(time.sleep, [2.0] * workers))
+    return pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video')
+    parser.add_argument('--workers', default='1,2,4,8,16,32')
+    parser.add_argument('--sampling', default='all', choices=['all', 'stride', 'keyframe'])
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    cpu_count = os.cpu_count() or 1
+    worker_counts = [int(w) for w in args.workers.split(',') if 0 < int(w) <= cpu_count]
+    sampling = {'mode': args.sampling, 'stride': 3 if args.sampling == 'stride' else 1}
+
+    print(f"{os.path.basename(args.video)}: {total_frames} frames, {cpu_count} CPUs, sampling={args.sampling}")
+    print(f"{'workers':>7} | {'seconds':>8} | {'fps':>7} | {'speedup':>8} | {'efficiency':>10} | {'objects':>7}")
+    print("-" * 62)
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in worker_counts:
+            pool = warm_up(workers)
+            output_path = os.path.join(tmp_dir, f"shards_{workers}.mp4")
+
+            start = time.time()
+            result = process_video_sharded(args.video, output_path, 'all', sampling, num_shards=workers, pool=pool)
+            elapsed = time.time() - start
+            pool.shutdown()
+
+            # Speedup and scaling efficiency relative to the first (smallest) configuration
+            baseline = baseline or elapsed
+            speedup = baseline / elapsed
+            efficiency = speedup / (workers / worker_counts[0])
+            print(f"{workers:>7} | {elapsed:>8.1f} | {result['frames'] / elapsed:>7.1f} | "
+                  f"{speedup:>7.2f}x | {efficiency:>10.0%} | {len(result['tracks']):>7}")
+
+
+if __name__ == "__main__":
+    main()
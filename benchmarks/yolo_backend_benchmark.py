@@ -0,0 +1,91 @@
+"""
+Benchmark: YOLO on PyTorch eager vs ONNX Runtime (fp32 / INT8) vs OpenVINO (CPU)
+
+Usage (from the repository root):
+    python benchmarks/yolo_backend_benchmark.py [--image IMAGE] [--runs 20] [--batch 4]
+
+Runs yolov8n.pt at 640 (feature 4) and yolo11x.pt at 1280 (feature 3) on
+every backend. Exports are created on first use and cached next to the
+weights, as in the app. Latency is one image per call; throughput uses
+batches of --batch images. The detection count is shown so the exported
+models can be checked against the eager baseline.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantization import quantize_yolo_onnx
+from yolo_backends import YOLO_BACKENDS, export_yolo
+
+CONFIGS = [('yolov8n.pt', 640), ('yolo11x.pt', 1280)]
+
+
+def sample_image(path):
+    if path:
+        return cv2.imread(path)
+    candidates = sorted(glob.glob('static/uploads/**/*.jp*g', recursive=True))
+    if candidates:
+        return cv2.imread(candidates[0])
+    print("⚠️ No sample image found - using noise (detection counts will be 0)")
+    return np.random.default_rng(0).integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8)
+
+
+def time_calls(fn, runs):
+    fn()  # warm-up
+    start = time.time()
+    for _ in range(runs):
+        fn()
+    return (time.time() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=4)
+    args = parser.parse_args()
+
+    image = sample_image(args.image)
+    batch = [image] * args.batch
+
+    print(f"{'model':>11} | {'imgsz':>5} | {'backend':>9} | {'latency (ms)':>12} | {'throughput (img/s)':>18} | {'speedup':>7} | {'boxes':>5}")
+    print("-" * 87)
+    for weights, imgsz in CONFIGS:
+        baseline = None
+        for backend in YOLO_BACKENDS:
+            try:
+                # No silent PyTorch fallback here - a failed export is reported as skipped
+                if backend == 'torch':
+                    model = YOLO(weights)
+                elif backend == 'onnx_int8':
+                    model = YOLO(quantize_yolo_onnx(weights, imgsz), task='detect')
+                else:
+                    model = YOLO(export_yolo(weights, backend, imgsz), task='detect')
+            except Exception as e:
+                print(f"{weights:>11} | {imgsz:>5} | {backend:>9} | skipped: {e}")
+                continue
+
+            def single():
+                return model.predict(image, imgsz=imgsz, conf=0.25, device='cpu', verbose=False)
+
+            def batched():
+                return model.predict(batch, imgsz=imgsz, conf=0.25, device='cpu', verbose=False)
+
+            latency = time_calls(single, args.runs)
+            throughput = args.batch / time_calls(batched, max(1, args.runs // args.batch))
+            boxes = len(single()[0].boxes)
+            baseline = baseline or latency
+            print(f"{weights:>11} | {imgsz:>5} | {backend:>9} | {latency * 1000:>12.1f} | "
+                  f"{throughput:>18.1f} | {baseline / latency:>6.2f}x | {boxes:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,50 +2,289 @@ import torch
 import cv2
 import numpy as np
 import os
+import sys
+import json
+import hashlib
 from pathlib import Path
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from model_registry import model_registry
+from tiling import TILE_OVERLAP, sliced_predict
+from result_cache import result_cache
+from inference_client import get_inference_client
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# YOLOv5 loading configuration
+#   'auto'    - serialized cache, then local hub checkout, then torch.hub download
+#   'offline' - serialized cache or local hub checkout only, never touches the network
+#   'hub'     - always load through torch.hub from GitHub
+YOLOV5_LOAD_MODE = os.environ.get('YOLOV5_LOAD_MODE', 'auto')
+YOLOV5_HUB_DIR = os.environ.get('YOLOV5_HUB_DIR',
+                                os.path.join(torch.hub.get_dir(), 'ultralytics_yolov5_master'))
+YOLOV5_WEIGHTS_SHA256 = os.environ.get('YOLOV5_WEIGHTS_SHA256')  # Optional expected hash
+MODEL_CACHE_DIR = 'config/model_cache'
+
+# Sliced inference for high-resolution stills (off unless UAV_TILED=1 or requested per upload)
+UAV_TILED = os.environ.get('UAV_TILED', '0') == '1'
+UAV_TILE_SIZE = int(os.environ.get('UAV_TILE_SIZE', 640))
+UAV_TILE_OVERLAP = float(os.environ.get('UAV_TILE_OVERLAP', TILE_OVERLAP))
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """Compute the SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Compact per-detection record produced straight from the NMS output tensor
+DETECTION_DTYPE = np.dtype([
+    ('xmin', np.int32),
+    ('ymin', np.int32),
+    ('xmax', np.int32),
+    ('ymax', np.int32),
+    ('confidence', np.float32),
+    ('class_id', np.int32)
+])
+
+
+def predictions_to_array(pred):
+    """
+    Convert an (N, 6) xyxy/conf/cls prediction tensor into a structured array
+
+    Args:
+        pred: torch.Tensor or np.ndarray with rows [x1, y1, x2, y2, conf, cls]
+
+    Returns:
+        np.ndarray: Structured array with DETECTION_DTYPE
+    """
+    if hasattr(pred, 'detach'):
+        pred = pred.detach().cpu().numpy()
+    pred = np.asarray(pred, dtype=np.float32).reshape(-1, 6)
+
+    detections = np.empty(len(pred), dtype=DETECTION_DTYPE)
+    # astype truncates toward zero, matching int() on the coordinates
+    detections['xmin'] = pred[:, 0]
+    detections['ymin'] = pred[:, 1]
+    detections['xmax'] = pred[:, 2]
+    detections['ymax'] = pred[:, 3]
+    detections['confidence'] = np.round(pred[:, 4], 2)
+    detections['class_id'] = pred[:, 5]
+    return detections
+
+
+def detections_to_json(detections, class_names):
+    """
+    Build JSON-ready detection dicts from a structured array
+
+    Args:
+        detections (np.ndarray): Structured array with DETECTION_DTYPE
+        class_names (np.ndarray): Object array of class names indexed by class id
+
+    Returns:
+        list: List of detection dictionaries
+    """
+    if len(detections) == 0:
+        return []
+
+    class_ids = detections['class_id']
+    in_range = (class_ids >= 0) & (class_ids < len(class_names))
+    if len(class_names):
+        names = np.where(in_range, class_names[np.clip(class_ids, 0, len(class_names) - 1)], None).tolist()
+    else:
+        names = [None] * len(detections)
+
+    boxes = np.stack([detections['xmin'], detections['ymin'], detections['xmax'], detections['ymax']], axis=1).tolist()
+    confidences = np.round(detections['confidence'].astype(np.float64), 2).tolist()
+
+    return [
+        {
+            'class': name if name is not None else f"Class_{class_id}",
+            'confidence': conf,
+            'bbox': {'xmin': box[0], 'ymin': box[1], 'xmax': box[2], 'ymax': box[3]}
+        }
+        for name, class_id, conf, box in zip(names, class_ids.tolist(), confidences, boxes)
+    ]
+
 class UAVDetector:
-    def __init__(self):
+    def __init__(self, load_mode=None):
         """Initialize YOLO model for UAV object detection"""
         self.model_path = "config/best.pt"
+        self.load_mode = load_mode or YOLOV5_LOAD_MODE
         self.model = None
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         self.img_size = 640
         self.conf_threshold = 0.25
         self.iou_threshold = 0.45
+        self.batch_size = 8  # Images per forward pass in detect_batch
+        self.num_workers = 4  # Threads for image decoding, rendering and saving
+        self.tiled = UAV_TILED
+        self.tile_size = UAV_TILE_SIZE
+        self.tile_overlap = UAV_TILE_OVERLAP
+        # With INFERENCE_SERVER set the model lives in the shared inference server
+        self.client = get_inference_client()
+        self._remote_names = None
         
         self.load_model()
     
+    @property
+    def class_names(self):
+        """Class names as an object array for vectorized lookup"""
+        if self.client is not None:
+            if self._remote_names is None:
+                self._remote_names = self.client.uav_names()
+            names = self._remote_names
+        else:
+            names = getattr(self.model, 'names', None) or []
+        if isinstance(names, dict):
+            names = [names.get(i, f"Class_{i}") for i in range(max(names) + 1)] if names else []
+        return np.array(names, dtype=object)
+
+    @property
+    def registry_key(self):
+        return f"uav_yolov5:{self.model_path}"
+
+    def _cache_meta_path(self):
+        stem = Path(self.model_path).stem
+        return os.path.join(MODEL_CACHE_DIR, f"{stem}.json")
+
+    def _read_cache_meta(self):
+        try:
+            with open(self._cache_meta_path(), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_cache_meta(self, meta):
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        with open(self._cache_meta_path(), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def _validated_weights_hash(self):
+        """
+        Hash the weight file once and validate it
+
+        The hash is stored alongside the cache and only recomputed when the
+        weight file's size or modification time changes.
+        """
+        stat = os.stat(self.model_path)
+        meta = self._read_cache_meta()
+        if meta.get('size') == stat.st_size and meta.get('mtime') == stat.st_mtime and meta.get('sha256'):
+            sha256 = meta['sha256']
+        else:
+            sha256 = file_sha256(self.model_path)
+            meta = {'sha256': sha256, 'size': stat.st_size, 'mtime': stat.st_mtime}
+            self._write_cache_meta(meta)
+            logger.info(f"Weight file hashed: {sha256[:16]}...")
+
+        if YOLOV5_WEIGHTS_SHA256 and sha256 != YOLOV5_WEIGHTS_SHA256.lower():
+            raise ValueError(f"Weight file hash mismatch for {self.model_path}: {sha256}")
+        return sha256
+
+    def _serialized_cache_path(self, sha256):
+        stem = Path(self.model_path).stem
+        torch_version = torch.__version__.split('+')[0]
+        return os.path.join(MODEL_CACHE_DIR, f"{stem}_{sha256[:16]}_torch{torch_version}.pt")
+
+    def _load_serialized(self, cache_path, hub_dir):
+        """Load the pickled eval model; the YOLOv5 sources must be importable"""
+        added = hub_dir and os.path.isdir(hub_dir) and hub_dir not in sys.path
+        if added:
+            sys.path.insert(0, hub_dir)
+        try:
+            try:
+                return torch.load(cache_path, map_location='cpu', weights_only=False)
+            except TypeError:
+                # Older torch without the weights_only argument
+                return torch.load(cache_path, map_location='cpu')
+        finally:
+            if added:
+                sys.path.remove(hub_dir)
+
+    def _save_serialized(self, model, cache_path, sha256, hub_dir):
+        try:
+            os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+            tmp_path = cache_path + '.tmp'
+            torch.save(model, tmp_path)
+            os.replace(tmp_path, cache_path)
+
+            meta = self._read_cache_meta()
+            meta.update({'cache_file': cache_path, 'hub_dir': hub_dir, 'torch_version': torch.__version__})
+            self._write_cache_meta(meta)
+            logger.info(f"Serialized model cached at {cache_path}")
+        except Exception as e:
+            logger.warning(f"Could not cache serialized model: {str(e)}")
+
+    def _load_from_hub(self):
+        """Load through torch.hub, preferring a local checkout; returns (model, hub_dir)"""
+        if self.load_mode != 'hub' and os.path.isfile(os.path.join(YOLOV5_HUB_DIR, 'hubconf.py')):
+            logger.info(f"Loading YOLOv5 from local checkout {YOLOV5_HUB_DIR}")
+            model = torch.hub.load(YOLOV5_HUB_DIR, 'custom', path=self.model_path, source='local')
+            return model, YOLOV5_HUB_DIR
+
+        if self.load_mode == 'offline':
+            raise FileNotFoundError(
+                f"Offline mode: no cached model and no YOLOv5 checkout at {YOLOV5_HUB_DIR}")
+
+        # Reuses torch.hub's cached checkout instead of re-cloning on every load
+        model = torch.hub.load('ultralytics/yolov5',
+                               'custom',
+                               path=self.model_path,
+                               force_reload=False)
+        return model, os.path.join(torch.hub.get_dir(), 'ultralytics_yolov5_master')
+
+    def _build_model(self):
+        """Build the YOLOv5 model from the weight file"""
+        # Verify model file exists
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Model file not found at {self.model_path}")
+        
+        sha256 = self._validated_weights_hash()
+        cache_path = self._serialized_cache_path(sha256)
+        model = None
+        
+        # Cold start from the serialized cache is a single file read
+        if self.load_mode != 'hub' and os.path.exists(cache_path):
+            try:
+                hub_dir = self._read_cache_meta().get('hub_dir') or YOLOV5_HUB_DIR
+                model = self._load_serialized(cache_path, hub_dir)
+                logger.info(f"Model loaded from serialized cache {cache_path}")
+            except Exception as e:
+                logger.warning(f"Serialized cache unusable, rebuilding: {str(e)}")
+                model = None
+        
+        if model is None:
+            model, hub_dir = self._load_from_hub()
+            model.eval()
+            self._save_serialized(model, cache_path, sha256, hub_dir)
+        
+        # Move to GPU if available
+        if self.device == 'cuda':
+            model.cuda()
+            logger.info("Model loaded on GPU")
+        else:
+            logger.info("Model loaded on CPU")
+        
+        return model
+    
     def load_model(self):
-        """Load the YOLO model"""
+        """Get the YOLO model from the shared registry (loaded once per process)"""
+        if self.client is not None:
+            logger.info(f"Using inference server at {self.client.address}")
+            return
         try:
-            # Verify model file exists
-            if not os.path.exists(self.model_path):
-                raise FileNotFoundError(f"Model file not found at {self.model_path}")
-            
-            # Load YOLOv5 model
-            self.model = torch.hub.load('ultralytics/yolov5', 
-                                      'custom', 
-                                      path=self.model_path,
-                                      force_reload=True)
+            self.model = model_registry.get(self.registry_key, self._build_model)
             
             # Set model parameters
             self.model.conf = self.conf_threshold
             self.model.iou = self.iou_threshold
             
-            # Move to GPU if available
-            if self.device == 'cuda':
-                self.model.cuda()
-                logger.info("Model loaded on GPU")
-            else:
-                logger.info("Model loaded on CPU")
-                
-            logger.info("YOLO model loaded successfully")
+            logger.info("YOLO model ready")
             
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {str(e)}")
@@ -62,117 +301,281 @@ class UAVDetector:
         Returns:
             dict: Detection results with success status, detections, and count
         """
-        try:
-            # Load image
-            img = cv2.imread(image_path)
-            if img is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to load image'
+        result = self.detect_batch([image_path], [output_path], batch_size=1)[0]
+        if result['success']:
+            result['detections'] = self.detections_to_json(result['detections'])
+        return result
+    
+    @staticmethod
+    def _read_rgb(image_path):
+        """Load an image and convert BGR to RGB for YOLO"""
+        img = cv2.imread(image_path)
+        if img is None:
+            return None
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    
+    def _render_and_save(self, image_results, output_path):
+        """Render a single image's detections and save it as BGR"""
+        annotated_img = image_results.render()[0]
+        annotated_bgr = cv2.cvtColor(annotated_img, cv2.COLOR_RGB2BGR)
+        if not cv2.imwrite(output_path, annotated_bgr):
+            raise IOError(f"Failed to write {output_path}")
+    
+    def _render_array_and_save(self, img_rgb, detections, output_path):
+        """Draw a structured detection array on an RGB image and save it as BGR"""
+        annotated = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+        for det in self.detections_to_json(detections):
+            box = det['bbox']
+            p1, p2 = (box['xmin'], box['ymin']), (box['xmax'], box['ymax'])
+            label = f"{det['class']} {det['confidence']:.2f}"
+            cv2.rectangle(annotated, p1, p2, (0, 255, 0), 2)
+            (label_w, label_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+            cv2.rectangle(annotated, (p1[0], p1[1] - label_h - 6), (p1[0] + label_w, p1[1]), (0, 255, 0), -1)
+            cv2.putText(annotated, label, (p1[0], p1[1] - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+        if not cv2.imwrite(output_path, annotated):
+            raise IOError(f"Failed to write {output_path}")
+
+    def predict_arrays(self, images, size=None):
+        """Raw (N, 6) xyxy/conf/cls prediction arrays for a list of RGB images"""
+        size = size or self.tile_size
+        if self.client is not None:
+            return self.client.uav_detect(images, size)
+        with torch.no_grad():
+            results = self.model(images, size=size)
+        return [pred.detach().cpu().numpy() for pred in results.pred]
+
+    def detect_tiled(self, image_paths, output_paths, batch_size=None):
+        """
+        Sliced inference: each image is cut into overlapping tile_size tiles
+
+        Tiles go through the network in batches of batch_size at native
+        resolution, so small objects in large stills are not downscaled away.
+        A downscaled full-frame pass catches objects larger than a tile, and
+        duplicates across tile seams are merged. Same return value as
+        detect_batch, plus 'tiles' per image.
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        outputs = [None] * len(image_paths)
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            save_futures = []
+            for i, img in enumerate(pool.map(self._read_rgb, image_paths)):
+                if img is None:
+                    outputs[i] = {'success': False, 'error': 'Failed to load image'}
+                    continue
+                try:
+                    pred, tiles = sliced_predict(self.predict_arrays, img, self.tile_size, self.tile_overlap, batch_size)
+                except Exception as e:
+                    logger.error(f"Tiled detection failed: {str(e)}")
+                    outputs[i] = {'success': False, 'error': str(e)}
+                    continue
+
+                detections = predictions_to_array(pred)
+                outputs[i] = {
+                    'success': True,
+                    'detections': detections,
+                    'detection_count': len(detections),
+                    'tiles': tiles,
+                    'output_path': output_paths[i]
                 }
+                save_futures.append((i, pool.submit(self._render_array_and_save, img, detections, output_paths[i])))
+
+            for i, future in save_futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Saving annotated image failed: {str(e)}")
+                    outputs[i] = {'success': False, 'error': str(e)}
+
+        return outputs
+
+    def detect_batch(self, image_paths, output_paths, batch_size=None, tiled=None):
+        """
+        Detect objects in many images using batched forward passes
+        
+        Images already in the result cache (same content, weights and
+        settings) are answered from it, with the rendered image copied to
+        their output path; the rest go through _detect_batch or detect_tiled.
+        
+        Args:
+            image_paths (list): Paths to input images
+            output_paths (list): Paths to save annotated images (same order)
+            batch_size (int): Images per forward pass (defaults to self.batch_size)
+            tiled (bool): Use sliced inference (defaults to self.tiled), see detect_tiled
             
-            # Convert BGR to RGB for YOLO
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            
-            # Run inference
-            with torch.no_grad():
-                results = self.model(img_rgb)
-            
-            # Get detections
-            detections = self.parse_detections(results)
-            
-            # Render results on image
-            annotated_imgs = results.render()  # Returns list of annotated images
-            annotated_img = annotated_imgs[0]  # Get first image
-            
-            # Convert back to BGR for saving
-            annotated_bgr = cv2.cvtColor(annotated_img, cv2.COLOR_RGB2BGR)
-            
-            # Save annotated image
-            cv2.imwrite(output_path, annotated_bgr)
+        Returns:
+            list: One result dict per input, in input order, flagged 'cached'.
+                  'detections' is a DETECTION_DTYPE structured array; convert
+                  it with detections_to_json when building the response.
+        """
+        tiled = self.tiled if tiled is None else tiled
+        model_id = f"{self.registry_key}:{self._validated_weights_hash()[:16]}"
+        params = {'img_size': self.img_size, 'conf': self.conf_threshold, 'iou': self.iou_threshold}
+        if tiled:
+            params.update(tile_size=self.tile_size, tile_overlap=self.tile_overlap)
+        
+        outputs = [None] * len(image_paths)
+        keys = [result_cache.key(path, model_id, **params) for path in image_paths]
+        for i, key in enumerate(keys):
+            cached = result_cache.get(key, output_paths[i])
+            if cached is not None:
+                detections = predictions_to_array(cached['detections'])
+                outputs[i] = {
+                    'success': True,
+                    'detections': detections,
+                    'detection_count': len(detections),
+                    'tiles': cached['tiles'],
+                    'output_path': output_paths[i],
+                    'cached': True
+                }
+        
+        misses = [i for i, output in enumerate(outputs) if output is None]
+        if misses:
+            detect = self.detect_tiled if tiled else self._detect_batch
+            fresh = detect([image_paths[i] for i in misses], [output_paths[i] for i in misses], batch_size)
+            for i, result in zip(misses, fresh):
+                outputs[i] = result
+                if result['success']:
+                    result.setdefault('tiles', 1)
+                    result['cached'] = False
+                    d = result['detections']
+                    rows = np.stack([d['xmin'], d['ymin'], d['xmax'], d['ymax'], d['confidence'], d['class_id']],
+                                    axis=1).tolist() if len(d) else []
+                    result_cache.put(keys[i], {'detections': rows, 'tiles': result['tiles']}, output_paths[i])
+        
+        return outputs
+    
+    def _detect_batch(self, image_paths, output_paths, batch_size=None):
+        """
+        Batched full-frame detection, without the result cache
+        
+        Images are decoded on a worker pool, run through the network in
+        micro-batches of batch_size, and rendered/saved on the worker pool
+        while the next batch is being inferred.
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        outputs = [None] * len(image_paths)
+        
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            save_futures = []
             
-            return {
-                'success': True,
-                'detections': detections,
-                'detection_count': len(detections),
-                'output_path': output_path
-            }
+            for start in range(0, len(image_paths), batch_size):
+                indices = list(range(start, min(start + batch_size, len(image_paths))))
+                images = list(pool.map(self._read_rgb, [image_paths[i] for i in indices]))
+                
+                batch_indices = []
+                batch_images = []
+                for i, img in zip(indices, images):
+                    if img is None:
+                        outputs[i] = {
+                            'success': False,
+                            'error': 'Failed to load image'
+                        }
+                    else:
+                        batch_indices.append(i)
+                        batch_images.append(img)
+                
+                if not batch_images:
+                    continue
+                
+                try:
+                    # Run inference on the whole micro-batch
+                    if self.client is not None:
+                        per_image_results = self.predict_arrays(batch_images, self.img_size)
+                    else:
+                        with torch.no_grad():
+                            results = self.model(batch_images, size=self.img_size)
+                        per_image_results = results.tolist()
+                except Exception as e:
+                    logger.error(f"Batch detection failed: {str(e)}")
+                    for i in batch_indices:
+                        outputs[i] = {
+                            'success': False,
+                            'error': str(e)
+                        }
+                    continue
+                
+                for i, img, image_results in zip(batch_indices, batch_images, per_image_results):
+                    if self.client is not None:
+                        # Server results are plain arrays, rendered here
+                        detections = predictions_to_array(image_results)
+                        save = pool.submit(self._render_array_and_save, img, detections, output_paths[i])
+                    else:
+                        detections = self.parse_detections_array(image_results)
+                        save = pool.submit(self._render_and_save, image_results, output_paths[i])
+                    outputs[i] = {
+                        'success': True,
+                        'detections': detections,
+                        'detection_count': len(detections),
+                        'output_path': output_paths[i]
+                    }
+                    save_futures.append((i, save))
             
-        except Exception as e:
-            logger.error(f"Detection failed: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            for i, future in save_futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Saving annotated image failed: {str(e)}")
+                    outputs[i] = {
+                        'success': False,
+                        'error': str(e)
+                    }
+        
+        return outputs
     
-    def parse_detections(self, results):
+    def parse_detections_array(self, results, index=0):
         """
-        Parse YOLO detection results
+        Read an image's NMS output tensor into a structured array
         
         Args:
             results: YOLO detection results
+            index (int): Image index within the results
             
         Returns:
-            list: List of detection dictionaries
+            np.ndarray: Structured array with DETECTION_DTYPE
         """
-        detections = []
-        
         try:
-            # Get detection data from results
-            df = results.pandas().xyxy[0]  # Detections as pandas DataFrame
-            
-            for index, detection in df.iterrows():
-                det_dict = {
-                    'class': detection['name'],
-                    'confidence': round(float(detection['confidence']), 2),
-                    'bbox': {
-                        'xmin': int(detection['xmin']),
-                        'ymin': int(detection['ymin']),
-                        'xmax': int(detection['xmax']),
-                        'ymax': int(detection['ymax'])
-                    }
-                }
-                detections.append(det_dict)
-                
+            return predictions_to_array(results.pred[index])
         except Exception as e:
             logger.warning(f"Failed to parse detections: {str(e)}")
-            # Fallback: try to get basic detection info
-            try:
-                pred = results.pred[0]
-                if len(pred) > 0:
-                    for detection in pred:
-                        x1, y1, x2, y2, conf, cls = detection.tolist()
-                        class_name = self.model.names[int(cls)] if hasattr(self.model, 'names') else f"Class_{int(cls)}"
-                        
-                        det_dict = {
-                            'class': class_name,
-                            'confidence': round(conf, 2),
-                            'bbox': {
-                                'xmin': int(x1),
-                                'ymin': int(y1),
-                                'xmax': int(x2),
-                                'ymax': int(y2)
-                            }
-                        }
-                        detections.append(det_dict)
-            except:
-                pass
+            return np.empty(0, dtype=DETECTION_DTYPE)
+    
+    def detections_to_json(self, detections):
+        """Convert a structured detection array to JSON-ready dicts"""
+        return detections_to_json(detections, self.class_names)
+    
+    def parse_detections(self, results, index=0):
+        """
+        Parse YOLO detection results
         
-        return detections
+        Args:
+            results: YOLO detection results
+            index (int): Image index within the results
+            
+        Returns:
+            list: List of detection dictionaries
+        """
+        return self.detections_to_json(self.parse_detections_array(results, index))
     
     def get_model_info(self):
         """Get model information"""
-        if self.model is None:
+        if self.model is None and self.client is None:
             return None
             
         try:
             info = {
                 'device': self.device,
                 'model_path': self.model_path,
+                'load_mode': self.load_mode,
                 'img_size': self.img_size,
+                'tiled': self.tiled,
+                'tile_size': self.tile_size,
+                'tile_overlap': self.tile_overlap,
                 'conf_threshold': self.conf_threshold,
                 'iou_threshold': self.iou_threshold,
-                'classes': getattr(self.model, 'names', 'Unknown')
+                'classes': self.class_names.tolist() if self.client is not None else getattr(self.model, 'names', 'Unknown'),
+                'inference_server': self.client.address if self.client is not None else None,
+                'registry': model_registry.get_stats().get(self.registry_key)
             }
             return info
         except:
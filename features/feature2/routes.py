@@ -13,6 +13,7 @@ feature2_bp = Blueprint('feature2', __name__, template_folder='templates')
 UPLOAD_FOLDER = 'static/uploads/feature2'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB per file
+BATCH_SIZE = 8  # Images per YOLO forward pass
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -74,10 +75,15 @@ def upload_images():
         if not files or files[0].filename == '':
             return jsonify({'error': 'No images selected'}), 400
         
+        # Sliced inference for large stills; omitted = detector default (UAV_TILED)
+        tiled = request.form.get('tiled')
+        tiled = None if tiled is None else tiled.lower() in ('1', 'true', 'on')
+        
         # Initialize detector
         detector = UAVDetector()
         results = []
         processed_files = []
+        pending = []  # (result index, original_path, processed_path, filename, unique_filename)
         
         # Create session-specific folder
         session_id = str(uuid.uuid4())[:8]
@@ -114,37 +120,9 @@ def upload_images():
                 
                 print(f"Saved original: {original_path}")
                 
-                # Process with YOLO
-                detection_result = detector.detect_objects(original_path, processed_path)
-                
-                # Verify processed file was created
-                if detection_result['success']:
-                    if os.path.exists(processed_path):
-                        print(f"✓ Processed file created: {processed_path}")
-                        print(f"File size: {os.path.getsize(processed_path)} bytes")
-                        
-                        results.append({
-                            'filename': filename,
-                            'original_path': original_path,
-                            'processed_path': processed_path,
-                            'detections': detection_result['detections'],
-                            'detection_count': detection_result['detection_count'],
-                            'processed_url': f'/static/uploads/feature2/{session_id}/processed_{unique_filename}',
-                            'success': True
-                        })
-                    else:
-                        print(f"✗ Processed file NOT created: {processed_path}")
-                        results.append({
-                            'filename': filename,
-                            'error': 'Processed file not created by YOLO model',
-                            'success': False
-                        })
-                else:
-                    results.append({
-                        'filename': filename,
-                        'error': detection_result['error'],
-                        'success': False
-                    })
+                # Reserve the result slot; detection runs batched below
+                pending.append((len(results), original_path, processed_path, filename, unique_filename))
+                results.append(None)
             else:
                 results.append({
                     'filename': file.filename,
@@ -152,6 +130,46 @@ def upload_images():
                     'success': False
                 })
         
+        # Process all saved images with YOLO in micro-batches
+        detection_results = detector.detect_batch(
+            [p[1] for p in pending],
+            [p[2] for p in pending],
+            batch_size=BATCH_SIZE,
+            tiled=tiled
+        )
+        
+        for (index, original_path, processed_path, filename, unique_filename), detection_result in zip(pending, detection_results):
+            # Verify processed file was created
+            if detection_result['success']:
+                if os.path.exists(processed_path):
+                    print(f"✓ Processed file created: {processed_path}")
+                    print(f"File size: {os.path.getsize(processed_path)} bytes")
+                    
+                    results[index] = {
+                        'filename': filename,
+                        'original_path': original_path,
+                        'processed_path': processed_path,
+                        'detections': detector.detections_to_json(detection_result['detections']),
+                        'detection_count': detection_result['detection_count'],
+                        'tiles': detection_result.get('tiles', 1),
+                        'cached': detection_result.get('cached', False),
+                        'processed_url': f'/static/uploads/feature2/{session_id}/processed_{unique_filename}',
+                        'success': True
+                    }
+                else:
+                    print(f"✗ Processed file NOT created: {processed_path}")
+                    results[index] = {
+                        'filename': filename,
+                        'error': 'Processed file not created by YOLO model',
+                        'success': False
+                    }
+            else:
+                results[index] = {
+                    'filename': filename,
+                    'error': detection_result['error'],
+                    'success': False
+                }
+        
         print(f"✅ Upload processing complete. Session ID: {session_id}")
         return jsonify({
             'success': True,
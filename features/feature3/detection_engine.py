@@ -1,4 +1,3 @@
-from ultralytics import YOLO
 import cv2
 import numpy as np
 import os
@@ -6,13 +5,59 @@ import glob
 import json
 from datetime import datetime
 import time
+import threading
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from model_registry import model_registry
+from batch_queue import BatchQueue
+from yolo_backends import get_yolo
+from tiling import TILE_OVERLAP, sliced_predict
+from result_cache import result_cache, weights_fingerprint
+from inference_client import detection_arrays, get_inference_client
+try:
+    from .video_pipeline import VideoPipeline
+    from .sampling import FrameSampler
+    from .tracking import MultiObjectTracker
+    from .segment_writer import SegmentedVideoWriter, open_video_writer
+    from .sharding import process_video_sharded, MIN_SHARD_FRAMES
+    from .model_tiers import MODEL_TIERS, EXPORT_IMGSZ, TierSelector, tier_model_key
+except ImportError:
+    from features.feature3.video_pipeline import VideoPipeline
+    from features.feature3.sampling import FrameSampler
+    from features.feature3.tracking import MultiObjectTracker
+    from features.feature3.segment_writer import SegmentedVideoWriter, open_video_writer
+    from features.feature3.sharding import process_video_sharded, MIN_SHARD_FRAMES
+    from features.feature3.model_tiers import MODEL_TIERS, EXPORT_IMGSZ, TierSelector, tier_model_key
+
+# Class names kept by each detection filter ('all' keeps everything)
+FILTER_CLASS_NAMES = {
+    'person': frozenset({'person'}),
+    'car': frozenset({'car', 'truck', 'bus', 'motorcycle', 'bicycle'}),
+    'person_car': frozenset({'person', 'car', 'truck', 'bus', 'motorcycle', 'bicycle'})
+}
+
+# Sliced inference for large stills (tile edge in pixels, also the tile inference size)
+TILE_SIZE = int(os.environ.get('FEATURE3_TILE_SIZE', EXPORT_IMGSZ))
+# Frame batches of concurrent videos arriving within the window share one predict
+VIDEO_BATCH_WINDOW = float(os.environ.get('FEATURE3_VIDEO_BATCH_WINDOW_MS', 10)) / 1000
 
 class CompleteObjectDetectionSystem:
     def __init__(self):
         print("🚀 Initializing Object Detection System...")
         print("Loading models...")
-        self.model = YOLO("yolo11x.pt")  # Best accuracy model for images/videos
+        # Model tiers (accuracy/balanced/fast); only the default tier is loaded up front
+        self.tiers = TierSelector()
+        self.default_tier = self.tiers.default_tier
+        self.model_path = MODEL_TIERS[self.default_tier]['model']
+        # With INFERENCE_SERVER set the tier models live in the shared inference server
+        self.client = get_inference_client()
+        self._remote_names = {}
+        if self.client is None:
+            self.tier_model(self.default_tier)
+        # After loading, so the key names the backend that actually loaded
+        self.model_key = tier_model_key(self.default_tier)
+        if self.client is not None:
+            print(f"🔗 Using inference server at {self.client.address}")
         
         # Define colors for different object classes (BGR format)
         self.colors = [
@@ -22,65 +67,200 @@ class CompleteObjectDetectionSystem:
             (75, 0, 130), (255, 140, 0), (50, 205, 50), (220, 20, 60)
         ]
         self.class_colors = {}
+        self._filter_class_ids = {}
         self.detection_stats = []
+        # A shared YOLO predictor is not thread-safe; job workers take turns on each tier's model
+        self.predict_locks = {tier: threading.Lock() for tier in MODEL_TIERS}
+        # Video pipeline: frames per predict call and frames buffered between stages
+        self.video_batch_size = 4
+        self.video_queue_size = 8
+        # Frames a video track may go undetected before it is closed
+        self.track_max_age = 30
+        # Videos of one session processed at the same time, and the frame buffer budget they share
+        self.max_concurrent_videos = max(1, min(4, (os.cpu_count() or 1) // 2))
+        self.video_buffer_budget = 1024 * 1024 * 1024
+        # (tier, conf, imgsz, classes) -> BatchQueue merging the frame batches of concurrent videos
+        self._video_queues = {}
+        self._video_queues_lock = threading.Lock()
+        # Sliced image inference: tile size, overlap and tiles per predict call
+        self.tile_size = TILE_SIZE
+        self.tile_overlap = TILE_OVERLAP
+        self.tile_batch_size = 4
         print("✅ System ready!")
 
+    @property
+    def model(self):
+        """Shared default-tier model instance (picks up registry reloads)"""
+        return model_registry.get(self.model_key)
+
+    def tier_model(self, tier=None):
+        """Shared model for a tier, loaded through the registry on first use"""
+        tier = tier or self.default_tier
+        return get_yolo(MODEL_TIERS[tier]['model'], imgsz=EXPORT_IMGSZ)[1]
+
+    def tier_names(self, tier=None):
+        """Class names mapping of a tier's model"""
+        tier = tier or self.default_tier
+        if self.client is None:
+            return self.tier_model(tier).names
+        if tier not in self._remote_names:
+            self._remote_names[tier] = self.client.yolo_names(MODEL_TIERS[tier]['model'], EXPORT_IMGSZ)
+        return self._remote_names[tier]
+
+    def predict(self, source, tier=None, workload=None, **kwargs):
+        """
+        Thread-safe wrapper around a tier's shared model predict
+
+        With workload ('image' or 'video'), the time per image/frame is fed to
+        the tier selector's latency tracking. Local video frames go through
+        the tier's video batch queue, so concurrent videos share forward
+        passes instead of taking turns on the model. Through the inference
+        server the results are Detections rather than ultralytics Results;
+        read either with inference_client.detection_arrays.
+        """
+        tier = tier or self.default_tier
+        if self.client is not None:
+            # No local lock: the server batches concurrent callers per model
+            start = time.time()
+            results = self.client.yolo_predict(MODEL_TIERS[tier]['model'],
+                                               source if isinstance(source, list) else [source],
+                                               EXPORT_IMGSZ, conf=kwargs.get('conf', 0.25),
+                                               imgsz=kwargs.get('imgsz', 640), classes=kwargs.get('classes'))
+            elapsed = time.time() - start
+        elif workload == 'video':
+            # Latency is recorded per merged batch by the queue
+            frames = source if isinstance(source, list) else [source]
+            return self.video_queue(tier, kwargs.get('conf', 0.25), kwargs.get('imgsz', 640),
+                                    kwargs.get('classes')).submit(frames)
+        else:
+            model = self.tier_model(tier)
+            with self.predict_locks[tier]:
+                start = time.time()
+                results = model.predict(source=source, **kwargs)
+                elapsed = time.time() - start
+        if workload:
+            items = len(source) if isinstance(source, list) else 1
+            self.tiers.record_latency(tier, workload, elapsed / max(1, items))
+        return results
+
+    def video_queue(self, tier, conf, imgsz, classes):
+        """Batch queue for video frames on a tier with these predict settings"""
+        group = (tier, conf, imgsz, tuple(classes) if classes is not None else None)
+        with self._video_queues_lock:
+            if group not in self._video_queues:
+                def run_batch(frames):
+                    model = self.tier_model(tier)
+                    # Still shared with image jobs on the same tier
+                    with self.predict_locks[tier]:
+                        start = time.time()
+                        results = model.predict(source=frames, conf=conf, imgsz=imgsz,
+                                                classes=list(group[3]) if group[3] is not None else None,
+                                                verbose=False)
+                        elapsed = time.time() - start
+                    self.tiers.record_latency(tier, 'video', elapsed / len(frames))
+                    return results
+
+                # Room for one pipeline batch from every concurrent video
+                self._video_queues[group] = BatchQueue(run_batch, VIDEO_BATCH_WINDOW,
+                                                       self.video_batch_size * self.max_concurrent_videos)
+            return self._video_queues[group]
+
     def get_class_color(self, class_name):
         """Assign consistent colors to object classes"""
         if class_name not in self.class_colors:
             self.class_colors[class_name] = self.colors[len(self.class_colors) % len(self.colors)]
         return self.class_colors[class_name]
 
+    def filter_class_ids(self, names, detection_filter):
+        """
+        Class IDs kept by detection_filter for a model's names mapping (None = keep all)
+
+        Cached per filter and class list, so it is computed once per model.
+        """
+        if detection_filter not in FILTER_CLASS_NAMES:
+            return None
+        key = (detection_filter, tuple(names.values()) if isinstance(names, dict) else tuple(names))
+        class_ids = self._filter_class_ids.get(key)
+        if class_ids is None:
+            items = names.items() if isinstance(names, dict) else enumerate(names)
+            wanted = FILTER_CLASS_NAMES[detection_filter]
+            class_ids = np.array([class_id for class_id, name in items if name.lower() in wanted], dtype=np.int64)
+            self._filter_class_ids[key] = class_ids
+        return class_ids
+
+    def predict_classes(self, detection_filter, tier=None):
+        """
+        Class IDs for ultralytics' classes= argument (None = all classes)
+
+        Passing the filter into predict drops other classes inside NMS, so
+        fewer boxes are suppressed, copied and drawn.
+        """
+        class_ids = self.filter_class_ids(self.tier_names(tier), detection_filter)
+        return None if class_ids is None else class_ids.tolist()
+
     def filter_detections_by_type(self, detections, detection_filter):
         """Filter detections based on selected filter type"""
-        if detection_filter == 'all':
+        if detection_filter not in FILTER_CLASS_NAMES:
             return detections
-        
-        filtered_detections = []
-        for det in detections:
-            class_name = det["class"].lower()
-            
-            if detection_filter == 'person':
-                if class_name == 'person':
-                    filtered_detections.append(det)
-            elif detection_filter == 'car':
-                # Include various car-related classes
-                car_classes = ['car', 'truck', 'bus', 'motorcycle', 'bicycle']
-                if any(car_class in class_name for car_class in car_classes):
-                    filtered_detections.append(det)
-            elif detection_filter == 'person_car':
-                # Include both person and car classes
-                car_classes = ['car', 'truck', 'bus', 'motorcycle', 'bicycle']
-                if class_name == 'person' or any(car_class in class_name for car_class in car_classes):
-                    filtered_detections.append(det)
-        
-        return filtered_detections
-
-    def draw_detections(self, frame, results, detection_filter='all'):
-        """Draw colorful bounding boxes and labels on frame with filtering"""
-        all_detections = []
-        if len(results[0].boxes) == 0:
-            return frame, all_detections
-
-        # Extract all detections first
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            confidence = float(box.conf[0])
-            class_id = int(box.cls[0])
-            class_name = self.model.names[class_id]
-
-            detection = {
-                "class": class_name,
-                "confidence": confidence,
-                "bbox": [x1, y1, x2, y2]
-            }
-            all_detections.append(detection)
-
-        # Filter detections based on selected filter
-        filtered_detections = self.filter_detections_by_type(all_detections, detection_filter)
+        wanted = FILTER_CLASS_NAMES[detection_filter]
+        return [det for det in detections if det["class"].lower() in wanted]
+
+    def detection_dicts(self, xyxy, confidences, class_ids, names, detection_filter='all'):
+        """Detection dicts for box/score/class arrays, keeping only the filter's classes"""
+        keep_ids = self.filter_class_ids(names, detection_filter)
+        if keep_ids is not None:
+            mask = np.isin(class_ids, keep_ids)
+            xyxy, confidences, class_ids = xyxy[mask], confidences[mask], class_ids[mask]
+
+        return [
+            {"class": names[class_id], "confidence": confidence, "bbox": bbox}
+            for bbox, confidence, class_id in zip(xyxy.tolist(), confidences.tolist(), class_ids.tolist())
+        ]
 
-        # Draw only filtered detections
-        for det in filtered_detections:
+    def extract_detections(self, results, detection_filter='all'):
+        """
+        Extract detection dicts from YOLO results, applying the filter
+
+        Boxes, scores and class IDs are copied out as whole arrays and the
+        filter is a class-ID mask, so dicts are only built for kept boxes.
+        """
+        xyxy, confidences, class_ids = detection_arrays(results[0])
+        if len(confidences) == 0:
+            return []
+
+        return self.detection_dicts(xyxy.astype(np.int64), confidences, class_ids, results[0].names, detection_filter)
+
+    def detect_tiled(self, image, tier=None, detection_filter='all', conf=0.3, imgsz=1280, classes=None):
+        """
+        Sliced inference for one large image
+
+        The image is cut into overlapping tile_size tiles that are predicted
+        at native resolution, tile_batch_size at a time, plus one full-frame
+        pass at imgsz for objects larger than a tile. Duplicates across tile
+        seams are merged.
+
+        Returns:
+            tuple: (detection dicts, number of tiles)
+        """
+        def to_arrays(results):
+            return [np.concatenate([xyxy, conf[:, None], cls[:, None]], axis=1)
+                    for xyxy, conf, cls in map(detection_arrays, results)]
+
+        def predict_tiles(crops):
+            return to_arrays(self.predict(crops, tier=tier, conf=conf, imgsz=self.tile_size, classes=classes, verbose=False))
+
+        def predict_full(images):
+            return to_arrays(self.predict(images, tier=tier, conf=conf, imgsz=imgsz, classes=classes, verbose=False))
+
+        merged, tiles = sliced_predict(predict_tiles, image, self.tile_size, self.tile_overlap, self.tile_batch_size,
+                                       predict_full=predict_full)
+        detections = self.detection_dicts(merged[:, :4].astype(np.int64), merged[:, 4], merged[:, 5].astype(np.int64),
+                                          self.tier_names(tier), detection_filter)
+        return detections, tiles
+
+    def draw_boxes(self, frame, detections, detection_filter='all'):
+        """Draw colorful bounding boxes and labels for detection dicts"""
+        for det in detections:
             x1, y1, x2, y2 = det["bbox"]
             class_name = det["class"]
             confidence = det["confidence"]
@@ -102,7 +282,10 @@ class CompleteObjectDetectionSystem:
             else:
                 display_name = class_name
 
-            label = f"{display_name}: {confidence:.2f}"
+            if det.get("track_id") is not None:
+                label = f"{display_name} #{det['track_id']}: {confidence:.2f}"
+            else:
+                label = f"{display_name}: {confidence:.2f}"
             
             # Draw label background
             (label_width, label_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
@@ -111,11 +294,38 @@ class CompleteObjectDetectionSystem:
             # Draw label text
             cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
 
-        return frame, filtered_detections
+        return frame
+
+    def draw_detections(self, frame, results, detection_filter='all'):
+        """Draw colorful bounding boxes and labels on frame with filtering"""
+        filtered_detections = self.extract_detections(results, detection_filter)
+        return self.draw_boxes(frame, filtered_detections, detection_filter), filtered_detections
+
+    def result_cache_key(self, image_path, tier, detection_filter, tiled):
+        """Result cache key for an image under a tier's model and the image settings"""
+        params = {'conf': 0.3, 'imgsz': 1280, 'filter': detection_filter}
+        if tiled:
+            params.update(tile_size=self.tile_size, tile_overlap=self.tile_overlap)
+        model_id = f"{tier_model_key(tier)}:{weights_fingerprint(MODEL_TIERS[tier]['model'])}"
+        return result_cache.key(image_path, model_id, **params)
 
     # WEB WRAPPER METHODS - UPDATED WITH FILTERING
-    def process_images_web(self, image_paths, session_id, detection_filter='all'):
-        """Web wrapper for batch image processing with filtering"""
+    def process_images_web(self, image_paths, session_id, detection_filter='all', active_sessions=None,
+                           tier_selection=None, tiled=False):
+        """
+        Web wrapper for batch image processing with filtering
+
+        tier_selection is a TierSelector.select() result; without one the
+        default tier is used. It is reported in the results as 'model_tier'.
+        With tiled, images are processed with detect_tiled.
+
+        When active_sessions is given (background jobs), progress, the current
+        file and each finished image are published to active_sessions[session_id]
+        as they complete, and cancel_requested is honoured between images.
+        """
+        job = active_sessions[session_id] if active_sessions is not None else None
+        tier_selection = tier_selection or self.tiers.select(allow_downgrade=False)
+        tier = tier_selection['tier']
         try:
             from flask import current_app
             # Create output directory
@@ -128,38 +338,71 @@ class CompleteObjectDetectionSystem:
                 'total_objects': 0,
                 'object_counts': {},
                 'processing_time': 0,
-                'detection_filter': detection_filter
+                'detection_filter': detection_filter,
+                'model_tier': tier_selection,
+                'tiled': tiled
             }
 
             start_time = time.time()
             all_detections = []
+            classes = self.predict_classes(detection_filter, tier)
 
             for i, img_path in enumerate(image_paths):
-                try:
-                    # Read and process image
-                    image = cv2.imread(img_path)
-                    if image is None:
-                        continue
-
-                    # Run detection
-                    detection_results = self.model.predict(source=image, conf=0.3, imgsz=1280, verbose=False)
-                    output_image, detections = self.draw_detections(image, detection_results, detection_filter)
+                if job is not None:
+                    # Check for cancellation
+                    if job.get('cancel_requested', False):
+                        results['cancelled'] = True
+                        break
+                    job['current_file'] = os.path.basename(img_path)
+                    job['progress'] = (i / len(image_paths)) * 100
 
-                    # Save processed image
+                try:
                     filename = os.path.basename(img_path)
                     name, ext = os.path.splitext(filename)
                     output_filename = f"{name}_detected{ext}"
                     output_path = os.path.join(output_dir, output_filename)
-                    cv2.imwrite(output_path, output_image)
+
+                    # Repeat uploads of the same image are answered from the result cache
+                    cache_key = self.result_cache_key(img_path, tier, detection_filter, tiled)
+                    cached = result_cache.get(cache_key, output_path)
+                    if cached is not None:
+                        detections, tiles = cached['detections'], cached['tiles']
+                    else:
+                        # Read and process image
+                        image = cv2.imread(img_path)
+                        if image is None:
+                            continue
+
+                        # Run detection
+                        if tiled:
+                            # Not fed to the tier latency SLO: a tiled image costs several full predicts
+                            detections, tiles = self.detect_tiled(image, tier, detection_filter, conf=0.3, imgsz=1280,
+                                                                  classes=classes)
+                            output_image = self.draw_boxes(image, detections, detection_filter)
+                        else:
+                            detection_results = self.predict(image, tier=tier, workload='image',
+                                                             conf=0.3, imgsz=1280, classes=classes, verbose=False)
+                            output_image, detections = self.draw_detections(image, detection_results, detection_filter)
+                            tiles = 1
+
+                        # Save processed image
+                        cv2.imwrite(output_path, output_image)
+                        result_cache.put(cache_key, {'detections': detections, 'tiles': tiles}, output_path)
 
                     # Store results
-                    results['processed_images'].append({
+                    image_result = {
                         'original_name': filename,
                         'processed_name': output_filename,
                         'detections': detections,
                         'object_count': len(detections),
+                        'model_tier': tier,
+                        'tiles': tiles,
+                        'cached': cached is not None,
                         'url': f'/static/processed/feature3/{session_id}/{output_filename}'
-                    })
+                    }
+                    results['processed_images'].append(image_result)
+                    if job is not None:
+                        job.append('partial_results', image_result)
 
                     all_detections.extend(detections)
 
@@ -183,6 +426,8 @@ class CompleteObjectDetectionSystem:
                 "mode": "web_batch_images",
                 "session_id": session_id,
                 "detection_filter": detection_filter,
+                "model_tier": tier_selection,
+                "tiled": tiled,
                 "total_images_processed": len(results['processed_images']),
                 "processing_time": f"{processing_time:.2f} seconds",
                 "total_objects": len(all_detections),
@@ -202,8 +447,156 @@ class CompleteObjectDetectionSystem:
                 'error': str(e)
             }
 
-    def process_videos_web(self, video_paths, session_id, active_sessions, detection_filter='all'):
-        """Web wrapper for batch video processing with filtering"""
+    def video_concurrency(self, video_paths):
+        """How many of video_paths to process at once, bounded by cores and frame buffer memory"""
+        # Decoded frames held between pipeline stages plus skipped frames awaiting a batch
+        buffered_frames = 4 * max(self.video_batch_size, self.video_queue_size)
+        largest = 0
+        for video_path in video_paths:
+            cap = cv2.VideoCapture(video_path)
+            if cap.isOpened():
+                frame_bytes = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) * int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) * 3
+                largest = max(largest, frame_bytes * buffered_frames)
+            cap.release()
+        by_memory = self.video_buffer_budget // largest if largest else len(video_paths)
+        return max(1, min(self.max_concurrent_videos, len(video_paths), by_memory))
+
+    def make_tracker(self, sampler):
+        """Tracker for one video; tracks must survive the gaps between sampled frames"""
+        return MultiObjectTracker(max_age=max(self.track_max_age, 2 * sampler.stride,
+                                              2 * sampler.max_gap if sampler.mode == 'keyframe' else 0))
+
+    def _process_video_web(self, video_path, output_dir, session_id, detection_filter, sampling,
+                           segment_seconds=0, shards=1, cancel_check=None, on_progress=None, on_segments=None,
+                           tier=None):
+        """
+        Process one video for the web wrapper
+
+        on_progress(fraction, **stats) is called as frames are written and
+        on_segments(manifest) whenever a segment is closed.
+
+        Returns:
+            dict: 'video' (result entry), 'tracks' and 'sampling' stats, or None if the video cannot be opened
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None
+
+        # Get video properties
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # Setup output video
+        filename = os.path.basename(video_path)
+        name, ext = os.path.splitext(filename)
+        output_filename = f"{name}_detected.mp4"
+        output_path = os.path.join(output_dir, output_filename)
+        url_prefix = f'/static/processed/feature3/{session_id}'
+
+        if shards > 1 and total_frames >= shards * MIN_SHARD_FRAMES:
+            # Time-range shards in worker processes; segmented output is not available here
+            cap.release()
+            sharded = process_video_sharded(
+                video_path, output_path, detection_filter, sampling, num_shards=shards, tier=tier,
+                cancel_check=cancel_check,
+                on_progress=lambda done, total: on_progress and on_progress(done / total if total else 0)
+            )
+            video_tracks = sharded['tracks']
+            raw_detections = sharded['raw_detections']
+            sampling_stats = sharded['sampling']
+            extra = {'shards': sharded['shards'], 'codec': sharded['codec']}
+        else:
+            # H.264 when OpenCV can encode it, so browsers play the result; mp4v otherwise
+            out, codec = open_video_writer(output_path, fps, (width, height))
+            if segment_seconds > 0:
+                out = SegmentedVideoWriter(output_dir, f"{name}_detected", fps, (width, height),
+                                           segment_seconds=segment_seconds,
+                                           url_prefix=url_prefix,
+                                           full_writer=out,
+                                           on_segment=on_segments)
+
+            sampler = FrameSampler(**sampling)
+            tracker = self.make_tracker(sampler)
+            pipeline = VideoPipeline(self, detection_filter,
+                                     batch_size=self.video_batch_size,
+                                     queue_size=self.video_queue_size,
+                                     conf=0.25, imgsz=640,
+                                     sampler=sampler,
+                                     tracker=tracker,
+                                     tier=tier)
+
+            def on_frame(frame_index, detections, detected):
+                # Update progress within video
+                frame_count = frame_index + 1
+                if on_progress and frame_count % 50 == 0:
+                    on_progress(frame_count / total_frames if total_frames else 0,
+                                pipeline=pipeline.get_stats(),
+                                sampling=sampler.get_stats(),
+                                active_tracks=tracker.active_tracks)
+
+            try:
+                pipeline.run(cap, out, cancel_check=cancel_check, on_frame=on_frame)
+            finally:
+                cap.release()
+                out.release()
+            video_tracks = tracker.finalize()
+            raw_detections = tracker.raw_detections
+            sampling_stats = sampler.get_stats()
+            extra = {'pipeline': pipeline.get_stats(), 'codec': codec}
+            if segment_seconds > 0:
+                extra.update({
+                    'segments': out.manifest['segments'],
+                    'manifest_url': f'{url_prefix}/{out.manifest_name}'
+                })
+
+        video = {
+            'original_name': filename,
+            'processed_name': output_filename,
+            'total_frames': total_frames,
+            'detections': raw_detections,
+            'unique_objects': len(video_tracks),
+            'object_counts': MultiObjectTracker.count_by_class(video_tracks),
+            'tracks': video_tracks,
+            'frames_detected': sampling_stats['frames_detected'],
+            'inference_speedup': sampling_stats['inference_speedup'],
+            'model_tier': tier or self.default_tier,
+            'url': f'{url_prefix}/{output_filename}'
+        }
+        video.update({key: value for key, value in extra.items() if key != 'pipeline'})
+        return {'video': video, 'tracks': video_tracks, 'sampling': sampling_stats,
+                'pipeline': extra.get('pipeline')}
+
+    def process_videos_web(self, video_paths, session_id, active_sessions, detection_filter='all', sampling=None,
+                           segment_seconds=0, shards=1, tier_selection=None):
+        """
+        Web wrapper for batch video processing with filtering
+
+        tier_selection is a TierSelector.select() result; without one the
+        default tier is used. It is reported in the results as 'model_tier'.
+
+        sampling selects which frames go through the detector, e.g.
+        {'mode': 'stride', 'stride': 3} or {'mode': 'keyframe', 'scene_threshold': 12, 'max_gap': 30};
+        boxes are carried forward on skipped frames.
+
+        Detections are linked across frames by a tracker, so object counts are
+        unique tracked objects rather than per-frame detections.
+
+        With segment_seconds > 0 the annotated video is also written as short,
+        independently playable segments plus a JSON manifest; the manifests are
+        published in the job's 'segments' field as each segment closes.
+
+        With shards > 1, long videos are split into that many time ranges that
+        are processed by worker processes (one model copy each) and stitched
+        back together.
+
+        Up to video_concurrency() videos run at the same time; progress is the
+        mean completion of all videos and cancellation stops every running
+        pipeline at its next frame.
+        """
+        sampling = dict(sampling or {'mode': 'all'})
+        tier_selection = tier_selection or self.tiers.select(workload='video', allow_downgrade=False)
         try:
             # Create output directory
             output_dir = os.path.join('static/processed/feature3', session_id)
@@ -215,97 +608,94 @@ class CompleteObjectDetectionSystem:
                 'total_objects': 0,
                 'object_counts': {},
                 'processing_time': 0,
-                'detection_filter': detection_filter
+                'detection_filter': detection_filter,
+                'sampling': sampling,
+                'model_tier': tier_selection
             }
 
             start_time = time.time()
-            all_detections = []
+            segment_manifests = {}
+            progress_lock = threading.Lock()
+            video_progress = {}  # video index -> fraction done
+            running = {}  # video index -> file name
+            video_stats = {}  # file name -> that video's pipeline / sampling / active_tracks
+
+            def cancel_check():
+                return active_sessions[session_id].get('cancel_requested', False)
+
+            def publish_progress():
+                # Caller holds progress_lock; stats are per video since videos run concurrently
+                overall_progress = sum(video_progress.values()) / len(video_paths) * 100
+                active_sessions[session_id].update(progress=overall_progress,
+                                                   current_file=', '.join(running[i] for i in sorted(running)),
+                                                   videos={name: dict(stats) for name, stats in video_stats.items()})
+
+            def process_one(video_idx, video_path):
+                if cancel_check():
+                    return None
+                with progress_lock:
+                    running[video_idx] = os.path.basename(video_path)
+                    publish_progress()
+
+                def on_progress(fraction, **stats):
+                    with progress_lock:
+                        video_progress[video_idx] = fraction
+                        video_stats.setdefault(os.path.basename(video_path), {}).update(stats)
+                        publish_progress()
+
+                def on_segments(manifest):
+                    with progress_lock:
+                        segment_manifests[manifest['video']] = manifest
+                        active_sessions[session_id]['segments'] = dict(segment_manifests)
 
-            for video_idx, video_path in enumerate(video_paths):
                 try:
-                    # Check for cancellation
-                    if active_sessions[session_id].get('cancel_requested', False):
-                        results['cancelled'] = True
-                        break
-
-                    # Update progress
-                    active_sessions[session_id]['current_file'] = os.path.basename(video_path)
-                    active_sessions[session_id]['progress'] = (video_idx / len(video_paths)) * 100
-
-                    cap = cv2.VideoCapture(video_path)
-                    if not cap.isOpened():
-                        continue
-
-                    # Get video properties
-                    fps = int(cap.get(cv2.CAP_PROP_FPS))
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-                    # Setup output video
-                    filename = os.path.basename(video_path)
-                    name, ext = os.path.splitext(filename)
-                    output_filename = f"{name}_detected.mp4"
-                    output_path = os.path.join(output_dir, output_filename)
-                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-
-                    video_detections = []
-                    frame_count = 0
-
-                    while True:
-                        # Check for cancellation
-                        if active_sessions[session_id].get('cancel_requested', False):
-                            break
-
-                        ret, frame = cap.read()
-                        if not ret:
-                            break
-
-                        frame_count += 1
-
-                        # Run detection (every few frames for performance)
-                        if frame_count % 1 == 0:  # Process every 1st frame
-                            detection_results = self.model.predict(source=frame, conf=0.25, imgsz=640, verbose=False)
-                            annotated_frame, detections = self.draw_detections(frame, detection_results, detection_filter)
-                            video_detections.extend(detections)
-                        else:
-                            annotated_frame = frame
-
-                        out.write(annotated_frame)
-
-                        # Update progress within video
-                        if frame_count % 50 == 0:
-                            video_progress = (frame_count / total_frames) * 100
-                            overall_progress = (video_idx / len(video_paths)) * 100 + (video_progress / len(video_paths))
-                            active_sessions[session_id]['progress'] = overall_progress
-
-                    cap.release()
-                    out.release()
-
-                    # Store results
-                    results['processed_videos'].append({
-                        'original_name': filename,
-                        'processed_name': output_filename,
-                        'total_frames': total_frames,
-                        'detections': len(video_detections),
-                        'url': f'/static/processed/feature3/{session_id}/{output_filename}'
-                    })
-
-                    all_detections.extend(video_detections)
-
+                    processed = self._process_video_web(video_path, output_dir, session_id, detection_filter, sampling,
+                                                        segment_seconds=segment_seconds, shards=shards,
+                                                        cancel_check=cancel_check, on_progress=on_progress,
+                                                        on_segments=on_segments, tier=tier_selection['tier'])
+                    if processed and processed['pipeline']:
+                        with progress_lock:
+                            video_stats.setdefault(os.path.basename(video_path), {})['pipeline'] = processed['pipeline']
+                    return processed
                 except Exception as e:
                     print(f"Error processing {video_path}: {e}")
+                    return None
+                finally:
+                    with progress_lock:
+                        video_progress[video_idx] = 1.0
+                        running.pop(video_idx, None)
+                        publish_progress()
+
+            # Up to max_concurrent_videos at once, fewer if their frame buffers would not fit in memory
+            concurrency = self.video_concurrency(video_paths)
+            active_sessions[session_id]['concurrent_videos'] = concurrency
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"video-{session_id[:8]}") as executor:
+                processed_videos = list(executor.map(lambda item: process_one(*item), enumerate(video_paths)))
+
+            if cancel_check():
+                results['cancelled'] = True
+
+            # Results stay in upload order
+            all_tracks = []
+            frames_seen = 0
+            frames_detected = 0
+            for processed in processed_videos:
+                if processed is None:
                     continue
+                frames_seen += processed['sampling']['frames_seen']
+                frames_detected += processed['sampling']['frames_detected']
+                results['processed_videos'].append(processed['video'])
+                all_tracks.extend(processed['tracks'])
 
             # Calculate final statistics
             processing_time = time.time() - start_time
-            object_counts = Counter([det["class"] for det in all_detections])
 
             results.update({
-                'total_objects': len(all_detections),
-                'object_counts': dict(object_counts),
-                'processing_time': round(processing_time, 2)
+                'total_objects': len(all_tracks),
+                'object_counts': MultiObjectTracker.count_by_class(all_tracks),
+                'processing_time': round(processing_time, 2),
+                'frames_detected': frames_detected,
+                'inference_speedup': round(frames_seen / frames_detected, 2) if frames_detected else 1.0
             })
 
             return results
@@ -335,7 +725,7 @@ class CompleteObjectDetectionSystem:
             return
 
         # Run detection
-        results = self.model.predict(source=image, conf=0.3, imgsz=1280, verbose=False)
+        results = self.predict(image, conf=0.3, imgsz=1280, verbose=False)
 
         # Draw detections
         output_image, detections = self.draw_detections(image, results)
@@ -405,7 +795,7 @@ class CompleteObjectDetectionSystem:
             if image is None:
                 continue
 
-            results = self.model.predict(source=image, conf=0.3, imgsz=1280, verbose=False)
+            results = self.predict(image, conf=0.3, imgsz=1280, verbose=False)
             output_image, detections = self.draw_detections(image, results)
 
             # Save processed image
@@ -482,7 +872,7 @@ class CompleteObjectDetectionSystem:
             frame_count += 1
 
             # Run detection
-            results = self.model.predict(source=frame, conf=0.25, imgsz=640, verbose=False)
+            results = self.predict(frame, conf=0.25, imgsz=640, verbose=False)
             annotated_frame, detections = self.draw_detections(frame, results)
 
             # Write frame
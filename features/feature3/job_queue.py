@@ -0,0 +1,85 @@
+import queue
+import threading
+import traceback
+
+
+class JobQueue:
+    """Bounded FIFO job queue served by a fixed pool of background worker threads"""
+
+    def __init__(self, num_workers=2, max_queued=16, name="jobs"):
+        self.num_workers = num_workers
+        self.max_queued = max_queued
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._pending = []  # job ids waiting for a worker, in submission order
+        self._running = set()
+        self._lock = threading.Lock()
+        self._workers = []
+
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"{name}-worker-{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, job_id, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for execution on a worker
+
+        Returns:
+            int: 1-based position in the queue
+
+        Raises:
+            queue.Full: if max_queued jobs are already waiting
+        """
+        with self._lock:
+            self._queue.put_nowait((job_id, fn, args, kwargs))
+            self._pending.append(job_id)
+            return len(self._pending)
+
+    def position(self, job_id):
+        """1-based queue position, 0 if running, None if unknown or finished"""
+        with self._lock:
+            if job_id in self._running:
+                return 0
+            if job_id in self._pending:
+                return self._pending.index(job_id) + 1
+            return None
+
+    def discard(self, job_id):
+        """Drop a job that has not started yet; returns True if it was still waiting"""
+        with self._lock:
+            if job_id in self._pending:
+                self._pending.remove(job_id)
+                return True
+            return False
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'workers': self.num_workers,
+                'max_queued': self.max_queued,
+                'queued': len(self._pending),
+                'running': len(self._running)
+            }
+
+    def _worker_loop(self):
+        while True:
+            job_id, fn, args, kwargs = self._queue.get()
+            with self._lock:
+                if job_id not in self._pending:
+                    # Discarded while waiting
+                    self._queue.task_done()
+                    continue
+                self._pending.remove(job_id)
+                self._running.add(job_id)
+
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"❌ {self.name} job {job_id} failed: {e}")
+                traceback.print_exc()
+            finally:
+                with self._lock:
+                    self._running.discard(job_id)
+                self._queue.task_done()
@@ -0,0 +1,346 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Allowed status transitions; anything else is ignored
+JOB_TRANSITIONS = {
+    'queued': {'processing', 'cancelled', 'error'},
+    'processing': {'completed', 'cancelled', 'error'},
+    'completed': set(),
+    'cancelled': set(),
+    'error': set()
+}
+FINISHED_STATUSES = {'completed', 'cancelled', 'error'}
+# A worker that has not written a heartbeat for this many intervals is gone
+OWNER_MISSED_HEARTBEATS = 3
+
+
+class JobHandle:
+    """Dict-style view of one job; every write goes through the store"""
+
+    def __init__(self, store, job_id):
+        self._store = store
+        self.job_id = job_id
+
+    def __getitem__(self, key):
+        return self._store._get_field(self.job_id, key)
+
+    def __setitem__(self, key, value):
+        self._store.update(self.job_id, **{key: value})
+
+    def __contains__(self, key):
+        return key in self._store._job_data(self.job_id)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, **fields):
+        self._store.update(self.job_id, **fields)
+
+    def append(self, key, item):
+        self._store.append(self.job_id, key, item)
+
+    def to_dict(self):
+        return self._store.snapshot(self.job_id)
+
+
+class JobStore:
+    """
+    Thread-safe store for background processing jobs
+
+    Jobs live in memory while they are referenced and are persisted to a local
+    SQLite file, so progress polling survives a server restart. Finished jobs
+    expire after ttl_seconds, and finished payloads are dropped from memory
+    (oldest first) once they exceed max_memory_bytes; they are reloaded from
+    SQLite on demand.
+
+    Several worker processes can share the file. Each job records the worker
+    (owner) that runs it; unfinished jobs of other workers are always read
+    from SQLite, and only jobs whose owner stopped sending heartbeats are
+    failed as interrupted.
+    """
+
+    def __init__(self, db_path, ttl_seconds=24 * 3600, max_memory_bytes=64 * 1024 * 1024,
+                 flush_interval=2.0, heartbeat_interval=10.0):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval
+        # Unique per process start, so a reused pid is not mistaken for the old worker
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.RLock()
+        self._jobs = OrderedDict()  # job_id -> job dict
+        self._sizes = {}  # job_id -> serialized size of finished jobs held in memory
+        self._last_flush = {}
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._init_db()
+        self._heartbeat()
+        self._recover_interrupted()
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+
+    # -------------------------------------------------
+    # SQLite backend
+    # -------------------------------------------------
+
+    @contextmanager
+    def _connect(self):
+        """Context manager for SQLite connections"""
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_owners (
+                    owner_id TEXT PRIMARY KEY,
+                    heartbeat REAL NOT NULL
+                )
+            """)
+
+    def _heartbeat(self):
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO job_owners (owner_id, heartbeat) VALUES (?, ?)
+                ON CONFLICT(owner_id) DO UPDATE SET heartbeat = excluded.heartbeat
+            """, (self.owner_id, time.time()))
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self._heartbeat()
+                self._recover_interrupted()
+            except sqlite3.Error as e:
+                print(f"⚠️ Job store heartbeat failed: {e}")
+
+    def _recover_interrupted(self):
+        """Jobs whose worker stopped (crash or restart) can never finish"""
+        stale = time.time() - OWNER_MISSED_HEARTBEATS * self.heartbeat_interval
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_owners WHERE heartbeat < ?", (stale,))
+            live_owners = {row[0] for row in conn.execute("SELECT owner_id FROM job_owners").fetchall()}
+            rows = conn.execute(
+                "SELECT job_id, data FROM jobs WHERE status IN ('queued', 'processing')"
+            ).fetchall()
+            recovered = 0
+            for job_id, data in rows:
+                job = json.loads(data)
+                if job.get('owner') in live_owners:
+                    continue
+                job['status'] = 'error'
+                job['error'] = 'Interrupted by server restart'
+                conn.execute(
+                    "UPDATE jobs SET status = ?, data = ?, updated_at = ? WHERE job_id = ?",
+                    ('error', json.dumps(job), time.time(), job_id)
+                )
+                recovered += 1
+        if recovered:
+            print(f"⚠️ Marked {recovered} interrupted job(s) as failed")
+
+    def _persist(self, job_id, job):
+        now = time.time()
+        with self._connect() as conn:
+            if job.get('owner') == self.owner_id and not job.get('cancel_requested'):
+                # A cancel requested through another worker reaches the one running the job
+                row = conn.execute("SELECT json_extract(data, '$.cancel_requested') FROM jobs WHERE job_id = ?",
+                                   (job_id,)).fetchone()
+                if row and row[0]:
+                    job['cancel_requested'] = True
+            data = json.dumps(job, default=str)
+            conn.execute("""
+                INSERT INTO jobs (job_id, status, data, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    status = excluded.status, data = excluded.data, updated_at = excluded.updated_at
+            """, (job_id, job.get('status', ''), data, job.get('created_at', now), now))
+        if job_id in self._jobs:
+            self._last_flush[job_id] = now
+        return len(data)
+
+    def _load(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # -------------------------------------------------
+    # Internal helpers (caller holds the lock)
+    # -------------------------------------------------
+
+    def _job_data(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._load(job_id)
+                if job is None:
+                    raise KeyError(job_id)
+                if job.get('status') not in FINISHED_STATUSES:
+                    # Running in another worker: not cached, so its progress is always current
+                    return job
+                self._jobs[job_id] = job
+                if job.get('status') in FINISHED_STATUSES:
+                    self._sizes[job_id] = len(json.dumps(job, default=str))
+                    self._enforce_memory_cap(keep=job_id)
+            return job
+
+    def _get_field(self, job_id, key):
+        return self._job_data(job_id)[key]
+
+    def _enforce_memory_cap(self, keep=None):
+        total = sum(self._sizes.values())
+        for job_id in list(self._sizes):
+            if total <= self.max_memory_bytes:
+                break
+            if job_id == keep:
+                continue
+            # Finished jobs stay in SQLite; drop the in-memory copy
+            total -= self._sizes.pop(job_id)
+            self._jobs.pop(job_id, None)
+            self._last_flush.pop(job_id, None)
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._connect() as conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT job_id FROM jobs WHERE updated_at < ? AND status IN ('completed', 'cancelled', 'error')",
+                (cutoff,)
+            ).fetchall()]
+            conn.execute(
+                "DELETE FROM jobs WHERE updated_at < ? AND status IN ('completed', 'cancelled', 'error')",
+                (cutoff,)
+            )
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._sizes.pop(job_id, None)
+            self._last_flush.pop(job_id, None)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def create(self, job_id, **fields):
+        """Create (or replace) a job and return its handle"""
+        with self._lock:
+            self._evict_expired()
+            job = {
+                'status': 'queued',
+                'progress': 0,
+                'current_file': '',
+                'cancel_requested': False,
+                'created_at': time.time(),
+                'owner': self.owner_id
+            }
+            job.update(fields)
+            self._jobs[job_id] = job
+            self._sizes.pop(job_id, None)
+            self._persist(job_id, job)
+            return JobHandle(self, job_id)
+
+    def update(self, job_id, **fields):
+        """Update job fields; status changes are validated and persisted immediately"""
+        with self._lock:
+            job = self._job_data(job_id)
+            force_flush = False
+
+            if 'status' in fields and fields['status'] != job.get('status'):
+                new_status = fields['status']
+                if new_status not in JOB_TRANSITIONS.get(job.get('status'), set()):
+                    print(f"⚠️ Ignoring job {job_id} transition {job.get('status')} -> {new_status}")
+                    fields = {k: v for k, v in fields.items() if k != 'status'}
+                else:
+                    force_flush = True
+                    if new_status in FINISHED_STATUSES:
+                        job['finished_at'] = time.time()
+            if fields.get('cancel_requested') or job.get('status') in FINISHED_STATUSES:
+                force_flush = True
+            if job_id not in self._jobs:
+                # Another worker's job, read fresh from SQLite: write the change straight back
+                force_flush = True
+
+            job.update(fields)
+
+            if force_flush or time.time() - self._last_flush.get(job_id, 0) >= self.flush_interval:
+                size = self._persist(job_id, job)
+                if job.get('status') in FINISHED_STATUSES:
+                    self._sizes.pop(job_id, None)
+                    self._sizes[job_id] = size
+                    self._enforce_memory_cap(keep=job_id)
+
+    def append(self, job_id, key, item):
+        """Append item to a list field and persist it right away (e.g. partial results)"""
+        with self._lock:
+            job = self._job_data(job_id)
+            # A new list, so readers holding the previous one never see it change
+            job[key] = list(job.get(key) or []) + [item]
+            self._persist(job_id, job)
+
+    def snapshot(self, job_id):
+        """JSON-ready copy of a job"""
+        with self._lock:
+            job = self._job_data(job_id)
+            snapshot = dict(job)
+            if isinstance(snapshot.get('partial_results'), list):
+                snapshot['partial_results'] = list(snapshot['partial_results'])
+            return snapshot
+
+    def __contains__(self, job_id):
+        try:
+            self._job_data(job_id)
+            return True
+        except KeyError:
+            return False
+
+    def __getitem__(self, job_id):
+        self._job_data(job_id)
+        return JobHandle(self, job_id)
+
+    def get(self, job_id, default=None):
+        try:
+            return self[job_id]
+        except KeyError:
+            return default
+
+    def __delitem__(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._sizes.pop(job_id, None)
+            self._last_flush.pop(job_id, None)
+            with self._connect() as conn:
+                conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'in_memory': len(self._jobs),
+                'active': sum(1 for job in self._jobs.values() if job.get('status') not in FINISHED_STATUSES),
+                'finished_bytes_in_memory': sum(self._sizes.values()),
+                'max_memory_bytes': self.max_memory_bytes,
+                'ttl_seconds': self.ttl_seconds
+            }
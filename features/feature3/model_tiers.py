@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+
+from yolo_backends import yolo_registry_key
+
+# Model tiers from most accurate to fastest
+MODEL_TIERS = {
+    'accuracy': {'model': 'yolo11x.pt', 'label': 'YOLO11x (Best Accuracy)'},
+    'balanced': {'model': 'yolo11m.pt', 'label': 'YOLO11m (Balanced Performance)'},
+    'fast': {'model': 'yolov8n.pt', 'label': 'YOLOv8n (Fastest)'}
+}
+TIER_ORDER = ('accuracy', 'balanced', 'fast')
+DEFAULT_TIER = os.environ.get('FEATURE3_MODEL_TIER', 'accuracy')
+# Size ONNX / OpenVINO exports are traced at (the image path's imgsz)
+EXPORT_IMGSZ = 1280
+
+# Step down one tier for every QUEUE_DEPTH_STEP jobs already waiting or running
+QUEUE_DEPTH_STEP = int(os.environ.get('FEATURE3_TIER_QUEUE_STEP', 4))
+
+
+def _slo(name, default=None):
+    """Seconds from env var name; unset or empty means default, 'off' disables the SLO"""
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    return None if value.lower() == 'off' else float(value)
+
+
+# Latency SLOs: seconds per image and per video frame (None: no latency downgrades).
+# The video SLO is off by default: CPU frame latency differs by an order of
+# magnitude between yolov8n and yolo11x at 1280 px, so no one default fits every tier.
+LATENCY_SLO = {
+    'image': _slo('FEATURE3_IMAGE_SLO', 2.0),
+    'video': _slo('FEATURE3_FRAME_SLO')
+}
+
+
+def tier_model_key(tier):
+    """Model registry key for a tier on the configured YOLO backend"""
+    return yolo_registry_key(MODEL_TIERS[tier]['model'], imgsz=EXPORT_IMGSZ)
+
+
+class TierSelector:
+    """
+    Picks the model tier for a job
+
+    A job runs on its requested tier unless the server is overloaded: every
+    queue_depth_step jobs ahead of it step it down one tier, and so does the
+    requested tier's recent latency (moving average) exceeding the workload's
+    SLO, until a tier that meets it is reached. Latency older than
+    latency_ttl seconds is ignored, so a tier that was stepped over gets
+    traffic again once the load has passed.
+    """
+
+    def __init__(self, default_tier=DEFAULT_TIER, queue_depth_step=QUEUE_DEPTH_STEP,
+                 latency_slo=None, ewma_alpha=0.2, latency_ttl=120):
+        if default_tier not in MODEL_TIERS:
+            raise ValueError(f"Unknown model tier: {default_tier}")
+        self.default_tier = default_tier
+        self.queue_depth_step = max(1, queue_depth_step)
+        self.latency_slo = dict(latency_slo or LATENCY_SLO)
+        self.ewma_alpha = ewma_alpha
+        self.latency_ttl = latency_ttl
+        self._latency = {}  # (tier, workload) -> (seconds per item, last update)
+        self._downgrades = 0
+        self._lock = threading.Lock()
+
+    def record_latency(self, tier, workload, seconds_per_item):
+        with self._lock:
+            key = (tier, workload)
+            previous = self._latency_value(key)
+            value = seconds_per_item if previous is None else (
+                self.ewma_alpha * seconds_per_item + (1 - self.ewma_alpha) * previous)
+            self._latency[key] = (value, time.time())
+
+    def _latency_value(self, key):
+        entry = self._latency.get(key)
+        if entry is None or time.time() - entry[1] > self.latency_ttl:
+            return None
+        return entry[0]
+
+    def latency(self, tier, workload):
+        """Recent seconds per item, or None when there is no fresh measurement"""
+        with self._lock:
+            return self._latency_value((tier, workload))
+
+    def select(self, requested=None, workload='image', queue_depth=0, allow_downgrade=True):
+        """
+        Returns:
+            dict: requested, tier, model, downgraded and the reason for a downgrade
+
+        Raises:
+            ValueError: if requested is not a known tier
+        """
+        requested = requested or self.default_tier
+        if requested not in MODEL_TIERS:
+            raise ValueError(f"Invalid model_tier '{requested}', expected one of {', '.join(TIER_ORDER)}")
+
+        index = TIER_ORDER.index(requested)
+        reasons = []
+        if allow_downgrade:
+            steps = queue_depth // self.queue_depth_step
+            if steps:
+                index = min(len(TIER_ORDER) - 1, index + steps)
+                reasons.append(f"{queue_depth} jobs queued")
+
+            slo = self.latency_slo.get(workload)
+            while slo is not None and index < len(TIER_ORDER) - 1:
+                latency = self.latency(TIER_ORDER[index], workload)
+                if latency is None or latency <= slo:
+                    break
+                reasons.append(f"{TIER_ORDER[index]} at {latency:.2f}s per {workload} (SLO {slo}s)")
+                index += 1
+
+        tier = TIER_ORDER[index]
+        if tier != requested:
+            with self._lock:
+                self._downgrades += 1
+            print(f"⚠️ Model tier downgraded {requested} -> {tier}: {'; '.join(reasons)}")
+        return {
+            'requested': requested,
+            'tier': tier,
+            'model': MODEL_TIERS[tier]['model'],
+            'downgraded': tier != requested,
+            'reason': '; '.join(reasons) if tier != requested else None
+        }
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'default_tier': self.default_tier,
+                'queue_depth_step': self.queue_depth_step,
+                'latency_slo': dict(self.latency_slo),
+                'latency': {f"{tier}/{workload}": round(self._latency_value((tier, workload)), 3)
+                            for tier, workload in self._latency
+                            if self._latency_value((tier, workload)) is not None},
+                'downgrades': self._downgrades
+            }
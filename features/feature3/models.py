@@ -15,7 +15,14 @@ class AdvancedDetectionModel:
             self.initialized = False
             self.detection_system = None
     
-    def process_images_web(self, image_paths, session_id, detection_filter='all'):
+    def select_tier(self, requested=None, workload='image', queue_depth=0, allow_downgrade=True):
+        """Pick the model tier for a new job (raises ValueError for an unknown tier)"""
+        if not self.initialized:
+            return None
+        return self.detection_system.tiers.select(requested, workload, queue_depth, allow_downgrade)
+
+    def process_images_web(self, image_paths, session_id, detection_filter='all', active_sessions=None,
+                           tier_selection=None, tiled=False):
         if not self.initialized:
             return {
                 'success': False,
@@ -23,14 +30,16 @@ class AdvancedDetectionModel:
             }
         
         try:
-            return self.detection_system.process_images_web(image_paths, session_id, detection_filter)
+            return self.detection_system.process_images_web(image_paths, session_id, detection_filter, active_sessions,
+                                                            tier_selection=tier_selection, tiled=tiled)
         except Exception as e:
             return {
                 'success': False,
                 'error': f'Image processing failed: {str(e)}'
             }
     
-    def process_videos_web(self, video_paths, session_id, active_sessions, detection_filter='all'):
+    def process_videos_web(self, video_paths, session_id, active_sessions, detection_filter='all', sampling=None,
+                           segment_seconds=0, shards=1, tier_selection=None):
         if not self.initialized:
             return {
                 'success': False,
@@ -38,7 +47,9 @@ class AdvancedDetectionModel:
             }
         
         try:
-            return self.detection_system.process_videos_web(video_paths, session_id, active_sessions, detection_filter)
+            return self.detection_system.process_videos_web(video_paths, session_id, active_sessions, detection_filter, sampling,
+                                                            segment_seconds=segment_seconds, shards=shards,
+                                                            tier_selection=tier_selection)
         except Exception as e:
             return {
                 'success': False,
@@ -54,10 +65,18 @@ class AdvancedDetectionModel:
             }
         
         try:
+            from .model_tiers import MODEL_TIERS
+            system = self.detection_system
+            default_label = MODEL_TIERS[system.default_tier]['label']
             return {
                 'initialized': True,
-                'image_model': 'YOLO11x (Best Accuracy)',
-                'video_model': 'YOLO11m (Balanced Performance)',
+                # Images and videos share the tier models; the default tier is used unless a job selects another
+                'image_model': default_label,
+                'video_model': default_label,
+                'default_tier': system.default_tier,
+                'tiers': {tier: dict(info) for tier, info in MODEL_TIERS.items()},
+                'tier_selection': system.tiers.get_stats(),
+                'inference_server': system.client.address if system.client is not None else None,
                 'status': 'Ready',
                 'supported_formats': {
                     'images': ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'],
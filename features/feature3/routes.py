@@ -12,8 +12,14 @@ import threading
 import time
 import cv2
 import base64
+import queue
 import numpy as np
 from .models import AdvancedDetectionModel
+from .job_queue import JobQueue
+from .job_store import JobStore
+from .sampling import SAMPLING_MODES
+from .sharding import SHARD_WORKERS
+from .model_tiers import MODEL_TIERS
 
 feature3_bp = Blueprint('feature3', __name__, 
                        url_prefix='/feature3',
@@ -26,36 +32,71 @@ PROCESSED_FOLDER = 'static/processed/feature3'
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp', '.mp4', '.avi', '.mov', '.mkv', '.wmv'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB per file
 MAX_TOTAL_SIZE = 200 * 1024 * 1024  # 200MB total per session
+IMAGE_JOB_WORKERS = 2  # Concurrent image batches
+IMAGE_JOB_QUEUE_SIZE = 16  # Image batches allowed to wait for a worker
+JOB_DB_PATH = 'uploads/feature3_jobs.db'  # Job state, kept across restarts
+JOB_TTL_HOURS = 24  # Finished jobs (and their files) expire after this
+JOB_MEMORY_CAP = 64 * 1024 * 1024  # Finished job payloads kept in memory
 
 # Create directories
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 
-def cleanup_all_files():
-    """Clean up all uploaded and processed files on startup"""
-    try:
-        import shutil
-        if os.path.exists(UPLOAD_FOLDER):
-            shutil.rmtree(UPLOAD_FOLDER)
-        if os.path.exists(PROCESSED_FOLDER):
-            shutil.rmtree(PROCESSED_FOLDER)
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        os.makedirs(PROCESSED_FOLDER, exist_ok=True)
-        print("All files cleaned up on startup")
-    except Exception as e:
-        print(f"Cleanup error: {e}")
 # Initialize detection model
 detection_model = AdvancedDetectionModel()
 
-# Clean up all files on startup
-cleanup_all_files()
+# Clean up expired session files on startup (recent results stay downloadable)
+detection_model.cleanup_old_sessions(max_age_hours=JOB_TTL_HOURS)
 
-# Store active processing sessions
-active_sessions = {}
+# Store processing sessions (thread-safe, persisted, TTL-evicted)
+active_sessions = JobStore(JOB_DB_PATH,
+                           ttl_seconds=JOB_TTL_HOURS * 3600,
+                           max_memory_bytes=JOB_MEMORY_CAP)
+
+# Background queue for image batches
+image_job_queue = JobQueue(num_workers=IMAGE_JOB_WORKERS, max_queued=IMAGE_JOB_QUEUE_SIZE, name="feature3-images")
 
 def allowed_file(filename):
     return any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS)
 
+def parse_sampling_options(data):
+    """
+    Read frame sampling options for video jobs from the request body
+
+    sampling_mode: 'all' (default), 'stride' or 'keyframe'
+    frame_stride: detect every Nth frame in 'stride' mode (1-30)
+    scene_threshold: mean grey-level change that counts as a new scene in 'keyframe' mode
+    max_gap: longest run of frames without detection in 'keyframe' mode (1-300)
+    """
+    mode = data.get('sampling_mode', 'all')
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Invalid sampling_mode '{mode}', expected one of {', '.join(SAMPLING_MODES)}")
+    return {
+        'mode': mode,
+        'stride': max(1, min(30, int(data.get('frame_stride', 3 if mode == 'stride' else 1)))),
+        'scene_threshold': max(0.0, float(data.get('scene_threshold', 12.0))),
+        'max_gap': max(1, min(300, int(data.get('max_gap', 30))))
+    }
+
+def parse_model_tier(data):
+    """
+    Read model tier options from the request body
+
+    model_tier: 'accuracy', 'balanced' or 'fast' (default: server default tier)
+    allow_downgrade: let the server pick a faster tier under load (default true)
+    """
+    tier = data.get('model_tier') or None
+    if tier is not None and tier not in MODEL_TIERS:
+        raise ValueError(f"Invalid model_tier '{tier}', expected one of {', '.join(MODEL_TIERS)}")
+    return tier, bool(data.get('allow_downgrade', True))
+
+def select_job_tier(session_id, requested, allow_downgrade, workload):
+    """Tier for a job that is starting now; other queued and running jobs count as load"""
+    queue_depth = active_sessions.get_stats()['active']
+    if session_id in active_sessions and active_sessions[session_id].get('status') in ('queued', 'processing'):
+        queue_depth -= 1
+    return detection_model.select_tier(requested, workload, queue_depth, allow_downgrade)
+
 def get_file_size(file_path):
     return os.path.getsize(file_path)
 
@@ -160,10 +201,16 @@ def process_images():
         data = request.get_json()
         session_id = data.get('session_id')
         detection_filter = data.get('detection_filter', 'all')  # NEW: Get filter
+        tiled = bool(data.get('tiled', False))  # Sliced inference for large stills
         
         if not session_id:
             return jsonify({'error': 'No session ID provided'}), 400
         
+        try:
+            model_tier, allow_downgrade = parse_model_tier(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Get uploaded files
         session_folder = os.path.join(UPLOAD_FOLDER, session_id)
         if not os.path.exists(session_folder):
@@ -177,14 +224,75 @@ def process_images():
         if not image_files:
             return jsonify({'error': 'No valid images found'}), 400
         
-        # Process images with filter
-        results = detection_model.process_images_web(image_files, session_id, detection_filter)
+        # Initialize session for progress tracking
+        active_sessions.create(session_id,
+                               status='queued',
+                               total_files=len(image_files),
+                               partial_results=[])
+        
+        # Process images with filter on the background queue
+        def process_in_background():
+            job = active_sessions.get(session_id)
+            if job is None or job.get('cancel_requested'):
+                if job is not None:
+                    job['status'] = 'cancelled'
+                return
+            job['status'] = 'processing'
+            try:
+                tier_selection = select_job_tier(session_id, model_tier, allow_downgrade, 'image')
+                job['model_tier'] = tier_selection
+                results = detection_model.process_images_web(image_files, session_id, detection_filter, active_sessions,
+                                                              tier_selection=tier_selection, tiled=tiled)
+                if not results.get('success', False):
+                    job.update(status='error', error=results.get('error', 'Image processing failed'))
+                    return
+                job.update(status='cancelled' if results.get('cancelled') else 'completed',
+                           results=results,
+                           progress=100)
+            except Exception as e:
+                job.update(status='error', error=str(e))
+        
+        try:
+            position = image_job_queue.submit(session_id, process_in_background)
+        except queue.Full:
+            del active_sessions[session_id]
+            return jsonify({'success': False, 'error': 'Server busy - too many image batches queued, try again shortly'}), 503
         
-        return jsonify(results)
+        return jsonify({'success': True, 'session_id': session_id, 'queued': True, 'queue_position': position})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@feature3_bp.route('/image_progress/<session_id>')
+def image_progress(session_id):
+    if 'username' not in session or session['role'] not in ['captain', 'soldier']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if session_id not in active_sessions:
+        return jsonify({'status': 'not_found'}), 404
+    
+    # Only send partial results the client has not seen yet
+    since = request.args.get('since', 0, type=int)
+    response = active_sessions[session_id].to_dict()
+    partial_results = response.get('partial_results', [])
+    response['partial_results'] = partial_results[since:]
+    response['partial_count'] = len(partial_results)
+    response['queue_position'] = image_job_queue.position(session_id)
+    return jsonify(response)
+
+@feature3_bp.route('/cancel_images/<session_id>', methods=['POST'])
+def cancel_images(session_id):
+    if 'username' not in session or session['role'] not in ['captain', 'soldier']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if session_id in active_sessions:
+        active_sessions[session_id]['cancel_requested'] = True
+        if image_job_queue.discard(session_id):
+            active_sessions[session_id]['status'] = 'cancelled'
+        return jsonify({'success': True})
+    else:
+        return jsonify({'error': 'Session not found'}), 404
+
 # =====================================================
 # VIDEO PROCESSING ROUTES
 # =====================================================
@@ -258,6 +366,16 @@ def process_videos():
         if not session_id:
             return jsonify({'error': 'No session ID provided'}), 400
         
+        try:
+            sampling = parse_sampling_options(data)
+            # 0 = single output file; otherwise also write playable segments of this length
+            segment_seconds = max(0, min(60, int(data.get('segment_seconds', 0))))
+            # 1 = in-process; >1 = split long videos across that many worker processes
+            shards = max(1, min(SHARD_WORKERS, int(data.get('shards', 1))))
+            model_tier, allow_downgrade = parse_model_tier(data)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Get uploaded files
         session_folder = os.path.join(UPLOAD_FOLDER, session_id)
         if not os.path.exists(session_folder):
@@ -272,29 +390,33 @@ def process_videos():
             return jsonify({'error': 'No valid videos found'}), 400
         
         # Initialize session for progress tracking
-        active_sessions[session_id] = {
-            'status': 'processing',
-            'progress': 0,
-            'current_file': '',
-            'cancel_requested': False
-        }
+        tier_selection = select_job_tier(session_id, model_tier, allow_downgrade, 'video')
+        active_sessions.create(session_id, status='processing', sampling=sampling,
+                               segment_seconds=segment_seconds, segments={},
+                               model_tier=tier_selection)
         
         # Start background processing with filter
         def process_in_background():
             try:
-                results = detection_model.process_videos_web(video_files, session_id, active_sessions, detection_filter)
-                active_sessions[session_id]['status'] = 'completed'
-                active_sessions[session_id]['results'] = results
-                active_sessions[session_id]['progress'] = 100
+                results = detection_model.process_videos_web(video_files, session_id, active_sessions, detection_filter, sampling,
+                                                             segment_seconds=segment_seconds, shards=shards,
+                                                             tier_selection=tier_selection)
+                job = active_sessions[session_id]
+                if not results.get('success', True):
+                    job.update(status='error', error=results.get('error', 'Video processing failed'))
+                    return
+                job.update(status='cancelled' if results.get('cancelled') else 'completed',
+                           results=results,
+                           progress=100)
             except Exception as e:
-                active_sessions[session_id]['status'] = 'error'
-                active_sessions[session_id]['error'] = str(e)
+                active_sessions[session_id].update(status='error', error=str(e))
         
         thread = threading.Thread(target=process_in_background)
         thread.daemon = True
         thread.start()
         
-        return jsonify({'success': True, 'session_id': session_id})
+        return jsonify({'success': True, 'session_id': session_id, 'sampling': sampling,
+                        'segment_seconds': segment_seconds, 'shards': shards, 'model_tier': tier_selection})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -305,7 +427,7 @@ def video_progress(session_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     if session_id in active_sessions:
-        return jsonify(active_sessions[session_id])
+        return jsonify(active_sessions[session_id].to_dict())
     else:
         return jsonify({'status': 'not_found'}), 404
 
@@ -398,6 +520,8 @@ def cleanup_session(session_id):
         cleanup_session_files(session_id)
         
         if session_id in active_sessions:
+            active_sessions[session_id]['cancel_requested'] = True
+            image_job_queue.discard(session_id)
             del active_sessions[session_id]
         
         
@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+
+# Frame sampling modes for video jobs
+#   'all'      - run the detector on every frame
+#   'stride'   - run the detector on every Nth frame
+#   'keyframe' - run the detector on scene changes (and at least every max_gap frames)
+SAMPLING_MODES = ('all', 'stride', 'keyframe')
+
+
+class FrameSampler:
+    """Decides which frames go through the detector"""
+
+    def __init__(self, mode='all', stride=1, scene_threshold=12.0, max_gap=30, thumb_size=(64, 36)):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        self.mode = mode
+        self.stride = max(1, int(stride))
+        self.scene_threshold = float(scene_threshold)
+        self.max_gap = max(1, int(max_gap))
+        self.thumb_size = thumb_size
+
+        self._last_thumb = None
+        self._last_detect_index = None
+        self.frames_seen = 0
+        self.frames_detected = 0
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def scene_change_score(self, frame):
+        """Mean absolute grey-level difference against the last detected frame (0-255)"""
+        thumb = self._thumbnail(frame)
+        if self._last_thumb is None:
+            return float('inf'), thumb
+        return float(np.mean(np.abs(thumb - self._last_thumb))), thumb
+
+    def should_detect(self, frame_index, frame):
+        self.frames_seen += 1
+        thumb = None
+
+        if self.mode == 'all' or self._last_detect_index is None:
+            detect = True
+        elif self.mode == 'stride':
+            detect = frame_index - self._last_detect_index >= self.stride
+        else:
+            score, thumb = self.scene_change_score(frame)
+            detect = score >= self.scene_threshold or frame_index - self._last_detect_index >= self.max_gap
+
+        if detect:
+            if self.mode == 'keyframe':
+                self._last_thumb = thumb if thumb is not None else self._thumbnail(frame)
+            self._last_detect_index = frame_index
+            self.frames_detected += 1
+        return detect
+
+    def get_stats(self):
+        return {
+            'mode': self.mode,
+            'stride': self.stride,
+            'scene_threshold': self.scene_threshold,
+            'max_gap': self.max_gap,
+            'frames_seen': self.frames_seen,
+            'frames_detected': self.frames_detected,
+            # Detector calls avoided relative to running on every frame
+            'inference_speedup': round(self.frames_seen / self.frames_detected, 2) if self.frames_detected else 1.0
+        }
+
+
+def box_iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class BoxPropagator:
+    """
+    Carries detections across skipped frames
+
+    Boxes from the last detected frame are matched by IoU to the frame before
+    it, and matched boxes are moved along their per-frame velocity.
+    Unmatched boxes are held in place.
+    """
+
+    def __init__(self, match_iou=0.3):
+        self.match_iou = match_iou
+        self._detections = []
+        self._velocities = []
+        self._frame_index = None
+
+    def update(self, frame_index, detections):
+        velocities = []
+        gap = frame_index - self._frame_index if self._frame_index is not None else 0
+
+        for det in detections:
+            velocity = (0.0, 0.0, 0.0, 0.0)
+            if gap > 0:
+                best_iou, best = 0.0, None
+                for prev in self._detections:
+                    if prev['class'] != det['class']:
+                        continue
+                    iou = box_iou(prev['bbox'], det['bbox'])
+                    if iou > best_iou:
+                        best_iou, best = iou, prev
+                if best is not None and best_iou >= self.match_iou:
+                    velocity = tuple((c - p) / gap for c, p in zip(det['bbox'], best['bbox']))
+            velocities.append(velocity)
+
+        self._detections = detections
+        self._velocities = velocities
+        self._frame_index = frame_index
+
+    def predict(self, frame_index, frame_shape=None):
+        """Detections extrapolated to frame_index"""
+        if self._frame_index is None:
+            return []
+        steps = frame_index - self._frame_index
+        height, width = frame_shape[:2] if frame_shape is not None else (None, None)
+
+        predicted = []
+        for det, velocity in zip(self._detections, self._velocities):
+            bbox = [int(round(c + v * steps)) for c, v in zip(det['bbox'], velocity)]
+            if width is not None:
+                bbox = [min(max(bbox[0], 0), width - 1), min(max(bbox[1], 0), height - 1),
+                        min(max(bbox[2], 0), width - 1), min(max(bbox[3], 0), height - 1)]
+            predicted.append(dict(det, bbox=bbox, carried=True))
+        return predicted
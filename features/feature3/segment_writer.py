@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+# Browser-playable H.264 first; MPEG-4 Part 2 when this OpenCV build has no H.264 encoder
+VIDEO_CODECS = ('avc1', 'mp4v')
+
+# codec -> whether this OpenCV build can encode it, decided once by codec_available
+_codec_support = {}
+_codec_lock = threading.Lock()
+
+
+def codec_available(codec):
+    """Probe (once per process) whether codec can encode a small MP4 in a temporary directory"""
+    with _codec_lock:
+        if codec not in _codec_support:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                writer = cv2.VideoWriter(os.path.join(tmp_dir, 'probe.mp4'), cv2.VideoWriter_fourcc(*codec),
+                                         25, (64, 64))
+                _codec_support[codec] = writer.isOpened()
+                if _codec_support[codec]:
+                    writer.write(np.zeros((64, 64, 3), dtype=np.uint8))
+                writer.release()
+            if not _codec_support[codec]:
+                print(f"⚠️ {codec} video encoder unavailable in this OpenCV build")
+        return _codec_support[codec]
+
+
+def open_video_writer(path, fps, frame_size, codecs=VIDEO_CODECS):
+    """
+    cv2.VideoWriter with the first of codecs this OpenCV build can encode
+
+    Codec support is probed once; a writer that still fails to open (bad
+    path, full disk, invalid frame size) only affects this file.
+
+    Returns:
+        tuple: (writer, codec)
+
+    Raises:
+        RuntimeError: if no available codec can open path
+    """
+    available = [codec for codec in codecs if codec_available(codec)]
+    for codec in available:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, frame_size)
+        if writer.isOpened():
+            return writer, codec
+        writer.release()
+    if not available:
+        raise RuntimeError(f"No video encoder available (tried {', '.join(codecs)})")
+    raise RuntimeError(f"Cannot open video writer for {path} at {frame_size[0]}x{frame_size[1]} "
+                       f"(tried {', '.join(available)})")
+
+
+class SegmentedVideoWriter:
+    """
+    cv2.VideoWriter stand-in that splits the output into short segments
+
+    Every segment is a separate, fully closed MP4, so it can be played as soon
+    as it is listed in the manifest while the rest of the video is still being
+    processed. The manifest is rewritten (atomically) after each segment and
+    records the codec the segments were encoded with (H.264 when available).
+    Frames can also be teed into full_writer to keep a single full-length file.
+    """
+
+    def __init__(self, output_dir, base_name, fps, frame_size, segment_seconds=10,
+                 codecs=VIDEO_CODECS, url_prefix='', full_writer=None, on_segment=None):
+        self.output_dir = output_dir
+        self.base_name = base_name
+        self.fps = fps
+        self.frame_size = frame_size
+        self.segment_seconds = segment_seconds
+        self.codecs = codecs
+        self.url_prefix = url_prefix.rstrip('/')
+        self.full_writer = full_writer
+        self.on_segment = on_segment
+        # Some containers report 0 fps; size segments as if the video ran at 25 fps
+        self.frames_per_segment = max(1, int(round((fps if fps > 0 else 25) * segment_seconds)))
+
+        self.manifest_name = f"{base_name}_segments.json"
+        self.manifest_path = os.path.join(output_dir, self.manifest_name)
+        self.manifest = {
+            'video': base_name,
+            'fps': fps,
+            'segment_seconds': segment_seconds,
+            'codec': None,  # Set when the first segment is opened
+            'finished': False,
+            'segments': []
+        }
+
+        self._writer = None
+        self._segment_index = 0
+        self._segment_start = 0
+        self._frames_in_segment = 0
+        self.frames_written = 0
+        self._write_manifest()
+
+    def isOpened(self):
+        return True
+
+    def _segment_name(self, index):
+        return f"{self.base_name}_part{index:04d}.mp4"
+
+    def _open_segment(self):
+        path = os.path.join(self.output_dir, self._segment_name(self._segment_index))
+        self._writer, self.manifest['codec'] = open_video_writer(path, self.fps, self.frame_size, self.codecs)
+        self._segment_start = self.frames_written
+        self._frames_in_segment = 0
+
+    def _close_segment(self, publish=True):
+        if self._writer is None:
+            return
+        self._writer.release()
+        self._writer = None
+
+        name = self._segment_name(self._segment_index)
+        fps = self.fps if self.fps > 0 else 25
+        self.manifest['segments'].append({
+            'index': self._segment_index,
+            'filename': name,
+            'url': f"{self.url_prefix}/{name}",
+            'start_frame': self._segment_start,
+            'end_frame': self._segment_start + self._frames_in_segment - 1,
+            'start_time': round(self._segment_start / fps, 2),
+            'duration': round(self._frames_in_segment / fps, 2)
+        })
+        self._segment_index += 1
+        if publish:
+            self._write_manifest()
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        if self.on_segment:
+            self.on_segment(dict(self.manifest, segments=list(self.manifest['segments'])))
+
+    def write(self, frame):
+        if self._writer is None:
+            self._open_segment()
+        self._writer.write(frame)
+        if self.full_writer is not None:
+            self.full_writer.write(frame)
+        self._frames_in_segment += 1
+        self.frames_written += 1
+        if self._frames_in_segment >= self.frames_per_segment:
+            self._close_segment()
+
+    def release(self):
+        """Close the last (possibly short) segment and mark the manifest finished"""
+        if self.full_writer is not None:
+            self.full_writer.release()
+        self._close_segment(publish=False)
+        self.manifest['finished'] = True
+        self._write_manifest()
@@ -0,0 +1,330 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+
+import cv2
+import numpy as np
+
+try:
+    from .segment_writer import open_video_writer
+    from .sampling import FrameSampler
+    from .tracking import iou_matrix
+    from .video_pipeline import VideoPipeline
+except ImportError:
+    from features.feature3.segment_writer import open_video_writer
+    from features.feature3.sampling import FrameSampler
+    from features.feature3.tracking import iou_matrix
+    from features.feature3.video_pipeline import VideoPipeline
+
+# Worker processes for sharded video jobs (each holds its own model copy)
+SHARD_WORKERS = int(os.environ.get('FEATURE3_SHARD_WORKERS', max(1, (os.cpu_count() or 1) // 4)))
+# Shorter videos are not worth the process start-up and stitching cost
+MIN_SHARD_FRAMES = 300
+# Tracks that end / start within this many frames of a shard boundary may be the same object
+BOUNDARY_FRAMES = 5
+BOUNDARY_IOU = 0.3
+
+
+# -------------------------------------------------
+# Worker process side
+# -------------------------------------------------
+
+_worker_system = None
+
+
+def _init_worker(torch_threads):
+    """Pool initializer: limit intra-op threads and load this process's model copy"""
+    global _worker_system
+    import torch
+    torch.set_num_threads(torch_threads)
+    from features.feature3.detection_engine import CompleteObjectDetectionSystem
+    _worker_system = CompleteObjectDetectionSystem()
+
+
+class FrameRangeCapture:
+    """Capture wrapper that stops after frame_count frames"""
+
+    def __init__(self, cap, frame_count):
+        self.cap = cap
+        self.remaining = frame_count
+
+    def read(self):
+        if self.remaining <= 0:
+            return False, None
+        self.remaining -= 1
+        return self.cap.read()
+
+
+def _process_shard(video_path, shard_index, start_frame, end_frame, output_path,
+                   detection_filter, sampling, tier, progress, cancel_event):
+    system = _worker_system
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+
+    sampler = FrameSampler(**sampling)
+    tracker = system.make_tracker(sampler)
+    pipeline = VideoPipeline(system, detection_filter,
+                             batch_size=system.video_batch_size,
+                             queue_size=system.video_queue_size,
+                             conf=0.25, imgsz=640,
+                             sampler=sampler,
+                             tracker=tracker,
+                             tier=tier)
+
+    def on_frame(frame_index, detections, detected):
+        if (frame_index + 1) % 25 == 0:
+            progress[shard_index] = frame_index + 1
+
+    start = time.time()
+    try:
+        frames = pipeline.run(FrameRangeCapture(cap, end_frame - start_frame), writer,
+                              cancel_check=cancel_event.is_set, on_frame=on_frame)
+    finally:
+        cap.release()
+        writer.release()
+    progress[shard_index] = frames
+
+    # Shard-local frame numbers -> video frame numbers
+    tracks = tracker.finalize()
+    for track in tracks:
+        track['first_frame'] += start_frame
+        track['last_frame'] += start_frame
+
+    return {
+        'shard': shard_index,
+        'start_frame': start_frame,
+        'end_frame': end_frame,
+        'frames': frames,
+        'output_path': output_path,
+        'tracks': tracks,
+        'raw_detections': tracker.raw_detections,
+        'sampling': sampler.get_stats(),
+        'pipeline': pipeline.get_stats(),
+        'elapsed': time.time() - start
+    }
+
+
+# -------------------------------------------------
+# Parent process side
+# -------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+_main_lock = threading.Lock()
+_spawn = multiprocessing.get_context('spawn')
+
+
+class _WorkerProcess(_spawn.Process):
+    """
+    Spawned process whose __main__ is this module rather than the app's entry script
+
+    A spawned child re-imports the parent's __main__. Under `python app.py` that
+    would run app.py again in every worker: blueprint setup, upload cleanup,
+    job-store recovery and every feature's model loading. The child is told
+    to import features.feature3.sharding instead.
+    """
+
+    def start(self):
+        with _main_lock:
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = sys.modules[__name__]
+            try:
+                super().start()
+            finally:
+                sys.modules['__main__'] = main
+
+
+class _WorkerContext(type(_spawn)):
+    Process = _WorkerProcess
+
+
+# Used for the pool and its Manager, so no process started here runs the app's __main__
+_worker_context = _WorkerContext()
+
+
+def make_shard_pool(workers):
+    """Process pool of workers model-holding processes, torch threads split between them"""
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    # spawn: forking a process that already holds torch threads is unsafe
+    return ProcessPoolExecutor(max_workers=workers,
+                               mp_context=_worker_context,
+                               initializer=_init_worker,
+                               initargs=(torch_threads,))
+
+
+def get_shard_pool():
+    """
+    The one shard pool: SHARD_WORKERS processes that keep their model loaded between jobs
+
+    Jobs asking for any shard count submit their shards here, so the worker
+    count (CPU and model memory) never exceeds SHARD_WORKERS.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_shard_pool(SHARD_WORKERS)
+        return _pool
+
+
+def plan_shards(total_frames, num_shards):
+    """Split [0, total_frames) into num_shards contiguous (start, end) ranges"""
+    num_shards = max(1, min(num_shards, total_frames))
+    bounds = [round(i * total_frames / num_shards) for i in range(num_shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(num_shards) if bounds[i + 1] > bounds[i]]
+
+
+def merge_shard_tracks(shard_results):
+    """
+    Concatenate per-shard track summaries and join tracks split by a shard boundary
+
+    A track that reaches the end of one shard is joined to a track of the same
+    class starting at the beginning of the next shard when their boxes overlap.
+    Track ids are renumbered in order of first appearance.
+    """
+    merged = []
+    previous_open = []  # tracks from the previous shard that reached its last frames
+    for shard in sorted(shard_results, key=lambda r: r['start_frame']):
+        boundary = shard['start_frame']
+        starting = [t for t in shard['tracks'] if t['first_frame'] - boundary < BOUNDARY_FRAMES]
+        joined = set()
+
+        if previous_open and starting:
+            ious = iou_matrix(np.array([t['last_bbox'] for t in previous_open], dtype=float),
+                              np.array([t['first_bbox'] for t in starting], dtype=float))
+            pairs = sorted(((ious[i, j], i, j) for i in range(len(previous_open)) for j in range(len(starting))),
+                           reverse=True)
+            used_prev = set()
+            for iou, i, j in pairs:
+                if iou < BOUNDARY_IOU:
+                    break
+                prev, cur = previous_open[i], starting[j]
+                if i in used_prev or id(cur) in joined or prev['class'] != cur['class']:
+                    continue
+                used_prev.add(i)
+                joined.add(id(cur))
+                prev['last_frame'] = cur['last_frame']
+                prev['last_bbox'] = cur['last_bbox']
+                prev['hits'] += cur['hits']
+                if cur['max_confidence'] > prev['max_confidence']:
+                    prev['max_confidence'] = cur['max_confidence']
+                    prev['best_bbox'] = cur['best_bbox']
+                # The joined track may continue into the next shard
+                cur['_merged_into'] = prev
+
+        for track in shard['tracks']:
+            if id(track) not in joined:
+                merged.append(track)
+
+        shard_end = shard['end_frame']
+        previous_open = [t.get('_merged_into', t) for t in shard['tracks']
+                         if shard_end - 1 - t['last_frame'] < BOUNDARY_FRAMES]
+
+    for track in merged:
+        track.pop('_merged_into', None)
+    merged.sort(key=lambda t: (t['first_frame'], t['track_id']))
+    for track_id, track in enumerate(merged, start=1):
+        track['track_id'] = track_id
+    return merged
+
+
+def stitch_videos(segment_paths, output_path, fps, frame_size):
+    """
+    Concatenate shard outputs in order into one video, then delete the shards
+
+    The shards are intermediate mp4v files; the stitched video is re-encoded
+    with the preferred (browser-playable) codec. Returns that codec.
+    """
+    writer, codec = open_video_writer(output_path, fps, frame_size)
+    try:
+        for path in segment_paths:
+            cap = cv2.VideoCapture(path)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+            cap.release()
+    finally:
+        writer.release()
+    for path in segment_paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return codec
+
+
+def process_video_sharded(video_path, output_path, detection_filter='all', sampling=None,
+                          num_shards=SHARD_WORKERS, tier=None, cancel_check=None, on_progress=None, pool=None):
+    """
+    Process one video as num_shards time ranges in parallel worker processes
+
+    Args:
+        cancel_check (callable): Returns True when processing should stop
+        on_progress (callable): on_progress(frames_done, total_frames)
+        pool (ProcessPoolExecutor): Defaults to the shared get_shard_pool()
+
+    Returns:
+        dict: frames, tracks, raw_detections, sampling stats and per-shard timings
+    """
+    sampling = dict(sampling or {'mode': 'all'})
+    cap = cv2.VideoCapture(video_path)
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    shards = plan_shards(total_frames, num_shards)
+    pool = pool or get_shard_pool()
+    base, _ = os.path.splitext(output_path)
+
+    with _worker_context.Manager() as manager:
+        progress = manager.dict()
+        cancel_event = manager.Event()
+        futures = [
+            pool.submit(_process_shard, video_path, index, start, end, f"{base}_shard{index:03d}.mp4",
+                        detection_filter, sampling, tier, progress, cancel_event)
+            for index, (start, end) in enumerate(shards)
+        ]
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+            if any(future.exception() for future in done):
+                cancel_event.set()
+            if cancel_check and cancel_check():
+                cancel_event.set()
+            if on_progress:
+                on_progress(sum(progress.values()), total_frames)
+
+        shard_results = [future.result() for future in futures]
+
+    codec = stitch_videos([r['output_path'] for r in shard_results], output_path, fps, (width, height))
+
+    frames_seen = sum(r['sampling']['frames_seen'] for r in shard_results)
+    frames_detected = sum(r['sampling']['frames_detected'] for r in shard_results)
+    return {
+        'frames': sum(r['frames'] for r in shard_results),
+        'total_frames': total_frames,
+        'codec': codec,
+        'tracks': merge_shard_tracks(shard_results),
+        'raw_detections': sum(r['raw_detections'] for r in shard_results),
+        'sampling': dict(shard_results[0]['sampling'],
+                         frames_seen=frames_seen,
+                         frames_detected=frames_detected,
+                         inference_speedup=round(frames_seen / frames_detected, 2) if frames_detected else 1.0),
+        'shards': [{
+            'shard': r['shard'],
+            'start_frame': r['start_frame'],
+            'end_frame': r['end_frame'],
+            'frames': r['frames'],
+            'elapsed': round(r['elapsed'], 2),
+            'infer_fps': r['pipeline']['infer']['fps']
+        } for r in shard_results]
+    }
@@ -0,0 +1,199 @@
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy box arrays"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    ix1 = np.maximum(a[..., 0], b[..., 0])
+    iy1 = np.maximum(a[..., 1], b[..., 1])
+    ix2 = np.minimum(a[..., 2], b[..., 2])
+    iy2 = np.minimum(a[..., 3], b[..., 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def _xyxy_to_z(bbox):
+    """[x1, y1, x2, y2] -> [cx, cy, area, aspect ratio]"""
+    w = max(bbox[2] - bbox[0], 1.0)
+    h = max(bbox[3] - bbox[1], 1.0)
+    return np.array([bbox[0] + w / 2.0, bbox[1] + h / 2.0, w * h, w / h], dtype=np.float64)
+
+
+def _x_to_xyxy(x):
+    area = max(x[2], 1.0)
+    ratio = max(x[3], 1e-3)
+    w = np.sqrt(area * ratio)
+    h = area / w
+    return [x[0] - w / 2.0, x[1] - h / 2.0, x[0] + w / 2.0, x[1] + h / 2.0]
+
+
+class KalmanBoxTrack:
+    """
+    Constant-velocity Kalman filter over [cx, cy, area, aspect ratio] (as in SORT)
+
+    State: [cx, cy, s, r, vcx, vcy, vs]; the aspect ratio is assumed constant.
+    """
+
+    # Shared model matrices
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1.0
+    H = np.eye(4, 7)
+    R = np.diag([1.0, 1.0, 10.0, 10.0])
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001])
+
+    def __init__(self, track_id, frame_index, detection):
+        self.track_id = track_id
+        self.class_name = detection['class']
+        self.x = np.zeros(7)
+        self.x[:4] = _xyxy_to_z(detection['bbox'])
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0])
+
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.last_update_frame = frame_index
+        self.hits = 1
+        self.max_confidence = detection['confidence']
+        self.best_bbox = list(detection['bbox'])
+        self.first_bbox = list(detection['bbox'])
+        self.last_bbox = list(detection['bbox'])
+
+    def predict(self, frame_index):
+        """Advance the state to frame_index and return the predicted xyxy box"""
+        steps = frame_index - self.last_frame
+        for _ in range(max(0, steps)):
+            if self.x[2] + self.x[6] <= 0:
+                self.x[6] = 0.0
+            self.x = self.F @ self.x
+            self.P = self.F @ self.P @ self.F.T + self.Q
+        self.last_frame = max(self.last_frame, frame_index)
+        return _x_to_xyxy(self.x)
+
+    def update(self, frame_index, detection):
+        z = _xyxy_to_z(detection['bbox'])
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+
+        self.last_update_frame = frame_index
+        self.last_bbox = list(detection['bbox'])
+        self.hits += 1
+        if detection['confidence'] > self.max_confidence:
+            self.max_confidence = detection['confidence']
+            self.best_bbox = list(detection['bbox'])
+
+    def summary(self):
+        return {
+            'track_id': self.track_id,
+            'class': self.class_name,
+            'first_frame': self.first_frame,
+            'last_frame': self.last_update_frame,
+            'hits': self.hits,
+            'max_confidence': round(float(self.max_confidence), 2),
+            'best_bbox': [int(c) for c in self.best_bbox],
+            'first_bbox': [int(c) for c in self.first_bbox],
+            'last_bbox': [int(c) for c in self.last_bbox]
+        }
+
+
+class MultiObjectTracker:
+    """
+    SORT-style multi-object tracker
+
+    Detections are associated to Kalman-predicted tracks of the same class by
+    greedy IoU matching. Tracks that go unmatched for more than max_age frames
+    are closed and reduced to a compact summary, so memory is bounded by the
+    number of active tracks. Only tracks seen on at least min_hits detector
+    frames count as objects.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=30, min_hits=2):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+
+        self._tracks = []
+        self._next_id = 1
+        self._closed = []
+        self.raw_detections = 0
+
+    def _close_stale(self, frame_index):
+        active = []
+        for track in self._tracks:
+            if frame_index - track.last_update_frame > self.max_age:
+                if track.hits >= self.min_hits:
+                    self._closed.append(track.summary())
+            else:
+                active.append(track)
+        self._tracks = active
+
+    def update(self, frame_index, detections):
+        """
+        Associate one detector frame's detections with tracks
+
+        Returns:
+            list: The detections (copied) with a 'track_id' added
+        """
+        self.raw_detections += len(detections)
+        self._close_stale(frame_index)
+
+        predicted = np.array([track.predict(frame_index) for track in self._tracks], dtype=np.float64).reshape(-1, 4)
+        det_boxes = np.array([det['bbox'] for det in detections], dtype=np.float64).reshape(-1, 4)
+        ious = iou_matrix(det_boxes, predicted)
+
+        # Different classes never match
+        for j, track in enumerate(self._tracks):
+            for i, det in enumerate(detections):
+                if det['class'] != track.class_name:
+                    ious[i, j] = 0.0
+
+        assigned = [None] * len(detections)
+        if ious.size:
+            used_tracks = set()
+            used_dets = set()
+            for flat in np.argsort(-ious, axis=None):
+                i, j = divmod(int(flat), ious.shape[1])
+                if ious[i, j] < self.iou_threshold:
+                    break
+                if i in used_dets or j in used_tracks:
+                    continue
+                used_dets.add(i)
+                used_tracks.add(j)
+                self._tracks[j].update(frame_index, detections[i])
+                assigned[i] = self._tracks[j].track_id
+
+        tracked = []
+        for i, det in enumerate(detections):
+            if assigned[i] is None:
+                track = KalmanBoxTrack(self._next_id, frame_index, det)
+                self._next_id += 1
+                self._tracks.append(track)
+                assigned[i] = track.track_id
+            tracked.append(dict(det, track_id=assigned[i]))
+        return tracked
+
+    def finalize(self):
+        """Close all tracks and return the summaries of confirmed ones"""
+        for track in self._tracks:
+            if track.hits >= self.min_hits:
+                self._closed.append(track.summary())
+        self._tracks = []
+        return sorted(self._closed, key=lambda summary: summary['track_id'])
+
+    @property
+    def active_tracks(self):
+        return len(self._tracks)
+
+    @staticmethod
+    def count_by_class(summaries):
+        counts = {}
+        for summary in summaries:
+            counts[summary['class']] = counts.get(summary['class'], 0) + 1
+        return counts
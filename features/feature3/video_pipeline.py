@@ -0,0 +1,245 @@
+import queue
+import threading
+import time
+
+try:
+    from .sampling import FrameSampler, BoxPropagator
+except ImportError:
+    from features.feature3.sampling import FrameSampler, BoxPropagator
+
+# Marks the end of a stream between pipeline stages
+_END = object()
+
+
+class StageStats:
+    """Frame count and busy time for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, frames, elapsed):
+        with self._lock:
+            self.frames += frames
+            self.busy_time += elapsed
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'busy_seconds': round(self.busy_time, 2),
+                # Throughput the stage would reach if it never waited on its neighbours
+                'fps': round(self.frames / self.busy_time, 1) if self.busy_time > 0 else 0
+            }
+
+
+class VideoPipeline:
+    """
+    Staged decode -> infer -> annotate/encode pipeline for one video
+
+    A decoder thread reads frames into a bounded queue, the inference stage
+    runs batch_size frames per predict call, and an encoder thread draws the
+    detections and writes the output video. Bounded queues keep memory flat
+    and let each stage overlap with the others.
+
+    The sampler decides on the decoder thread which frames are sent to the
+    detector; on the other frames the encoder draws boxes carried forward
+    by a BoxPropagator. With a tracker, detections on detector frames get
+    persistent track ids before they are drawn and carried forward.
+    """
+
+    def __init__(self, detector, detection_filter='all', batch_size=4, queue_size=8,
+                 conf=0.25, imgsz=640, sampler=None, tracker=None, tier=None):
+        self.detector = detector
+        self.detection_filter = detection_filter
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(self.batch_size, queue_size)
+        self.conf = conf
+        self.imgsz = imgsz
+        self.sampler = sampler or FrameSampler('all')
+        self.propagator = BoxPropagator()
+        self.tracker = tracker
+        self.tier = tier
+        # The detection filter is applied inside NMS
+        self.classes = detector.predict_classes(detection_filter, tier)
+        # Skipped frames waiting for the next detector batch
+        self.max_pending_frames = self.queue_size * 2
+
+        self.stats = {
+            'decode': StageStats('decode'),
+            'infer': StageStats('infer'),
+            'encode': StageStats('encode')
+        }
+        self._decode_queue = queue.Queue(maxsize=self.queue_size)
+        self._encode_queue = queue.Queue(maxsize=self.queue_size)
+        self._stop = threading.Event()
+        self._errors = []
+
+    def get_stats(self):
+        """Per-stage throughput and current queue depths"""
+        stats = {name: stage.to_dict() for name, stage in self.stats.items()}
+        stats['queues'] = {
+            'decoded': self._decode_queue.qsize(),
+            'inferred': self._encode_queue.qsize()
+        }
+        stats['batch_size'] = self.batch_size
+        return stats
+
+    def _put(self, q, item):
+        """Blocking put that gives up once the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _END
+
+    def _fail(self, stage, error):
+        print(f"❌ Video pipeline {stage} stage failed: {error}")
+        self._errors.append(error)
+        self._stop.set()
+
+    # -------------------------------------------------
+    # Stages
+    # -------------------------------------------------
+
+    def _decode_loop(self, cap, cancel_check):
+        try:
+            frame_index = 0
+            while not self._stop.is_set():
+                if cancel_check and cancel_check():
+                    break
+                start = time.time()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                detect = self.sampler.should_detect(frame_index, frame)
+                self.stats['decode'].record(1, time.time() - start)
+                if not self._put(self._decode_queue, (frame_index, frame, detect)):
+                    break
+                frame_index += 1
+        except Exception as e:
+            self._fail('decode', e)
+        finally:
+            self._put(self._decode_queue, _END)
+
+    def _infer_loop(self):
+        try:
+            finished = False
+            while not finished:
+                item = self._get(self._decode_queue)
+                if item is _END:
+                    break
+
+                # Frames stay in decode order; only the sampled ones go to the model
+                batch = [item]
+                detect_count = 1 if item[2] else 0
+                while detect_count < self.batch_size and len(batch) < self.max_pending_frames:
+                    try:
+                        item = self._decode_queue.get_nowait()
+                    except queue.Empty:
+                        if detect_count > 0:
+                            break
+                        # Only skipped frames so far - wait for the next one
+                        item = self._get(self._decode_queue)
+                    if item is _END:
+                        finished = True
+                        break
+                    batch.append(item)
+                    if item[2]:
+                        detect_count += 1
+
+                detect_frames = [frame for _, frame, detect in batch if detect]
+                results = iter([])
+                if detect_frames:
+                    start = time.time()
+                    results = iter(self.detector.predict(detect_frames, tier=self.tier, workload='video',
+                                                         conf=self.conf, imgsz=self.imgsz,
+                                                         classes=self.classes, verbose=False))
+                    self.stats['infer'].record(len(detect_frames), time.time() - start)
+
+                for frame_index, frame, detect in batch:
+                    result = next(results) if detect else None
+                    if not self._put(self._encode_queue, (frame_index, frame, result)):
+                        return
+        except Exception as e:
+            self._fail('infer', e)
+        finally:
+            self._put(self._encode_queue, _END)
+
+    def _encode_loop(self, writer, on_frame):
+        try:
+            while True:
+                item = self._get(self._encode_queue)
+                if item is _END:
+                    break
+                frame_index, frame, result = item
+
+                start = time.time()
+                if result is not None:
+                    detections = self.detector.extract_detections([result], self.detection_filter)
+                    if self.tracker is not None:
+                        detections = self.tracker.update(frame_index, detections)
+                    self.propagator.update(frame_index, detections)
+                else:
+                    detections = self.propagator.predict(frame_index, frame.shape)
+                annotated_frame = self.detector.draw_boxes(frame, detections, self.detection_filter)
+                writer.write(annotated_frame)
+                self.stats['encode'].record(1, time.time() - start)
+
+                on_frame(frame_index, detections, result is not None)
+        except Exception as e:
+            self._fail('encode', e)
+
+    # -------------------------------------------------
+    # Entry point
+    # -------------------------------------------------
+
+    def run(self, cap, writer, cancel_check=None, on_frame=None):
+        """
+        Process every frame from cap into writer
+
+        Args:
+            cap: Opened cv2.VideoCapture
+            writer: Opened cv2.VideoWriter
+            cancel_check (callable): Returns True when processing should stop
+            on_frame (callable): on_frame(frame_index, detections, detected) from the encoder thread
+
+        Returns:
+            int: Number of frames written
+        """
+        frames_written = [0]
+
+        def handle_frame(frame_index, detections, detected):
+            frames_written[0] += 1
+            if on_frame:
+                on_frame(frame_index, detections, detected)
+
+        threads = [
+            threading.Thread(target=self._decode_loop, args=(cap, cancel_check), name="video-decode"),
+            threading.Thread(target=self._encode_loop, args=(writer, handle_frame), name="video-encode")
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        # Inference runs on the calling thread
+        self._infer_loop()
+
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return frames_written[0]
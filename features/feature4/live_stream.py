@@ -0,0 +1,243 @@
+import cv2
+import threading
+import time
+from datetime import datetime
+from collections import deque
+
+
+# Frames averaged for the latency figures in get_status
+LATENCY_WINDOW = 30
+
+
+class LiveStream:
+    """
+    One named camera feed: capture and detection threads, latest frame and detection log
+
+    The capture thread reads the camera continuously and keeps only the newest
+    frame; the detection thread always takes that one, so a slow inference tick
+    drops stale frames instead of queueing them. Inference is not run here:
+    frames go to the manager's scheduler, which batches all streams.
+    """
+
+    def __init__(self, stream_id, camera_source, cap, manager):
+        self.stream_id = stream_id
+        self.camera_source = camera_source
+        self.cap = cap
+        self.manager = manager
+        self.owners = set()  # Sessions watching; the camera is released when the last one stops
+        self.is_running = False
+        self.thread = None
+        self.capture_thread = None
+        self.started_at = None
+
+        # Newest camera frame, overwritten by the capture thread (latest frame wins)
+        self.captured = None  # (frame, captured_at, capture_seq)
+        self.capture_seq = 0
+        self.capture_ready = threading.Condition()
+
+        self.latest_frame = None
+        self.detection_log = deque(maxlen=1000)  # Keep last 1000 detections
+        self.frame_lock = threading.Lock()
+        # Signalled on every new frame; MJPEG viewers wait on it instead of polling
+        self.frame_ready = threading.Condition(self.frame_lock)
+        self.frame_seq = 0
+
+        # frames_skipped: left out by frame_skip; frames_dropped: overwritten before detection got to them
+        self.metrics = {'frames_captured': 0, 'frames_processed': 0, 'frames_skipped': 0, 'frames_dropped': 0,
+                        'errors': 0}
+        # (capture age, inference, encode) seconds of recent frames
+        self.latency = deque(maxlen=LATENCY_WINDOW)
+
+    def start(self):
+        self.is_running = True
+        self.started_at = time.time()
+        self.manager.scheduler.register(self.stream_id)
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        self.thread = threading.Thread(target=self._detection_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        with self.capture_ready:
+            self.capture_ready.notify_all()
+
+        for thread in (self.thread, self.capture_thread):
+            if thread and thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=2)
+
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+        with self.frame_ready:
+            self.latest_frame = None
+            self.frame_ready.notify_all()
+
+    def _emit(self, event, data):
+        data['stream_id'] = self.stream_id
+        self.manager._emit(event, data)
+
+    def _capture_loop(self):
+        """Read the camera as fast as it delivers, keeping only the newest frame"""
+        while self.is_running and self.cap and self.cap.isOpened():
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            with self.capture_ready:
+                self.capture_seq += 1
+                self.captured = (frame, time.time(), self.capture_seq)
+                self.metrics['frames_captured'] += 1
+                self.capture_ready.notify_all()
+
+        # Camera lost: the detection loop ends too
+        self.is_running = False
+        with self.capture_ready:
+            self.capture_ready.notify_all()
+
+    def _next_capture(self, after_seq):
+        """Newest captured frame at least frame_skip frames after after_seq, or None once stopped"""
+        with self.capture_ready:
+            while self.is_running:
+                if self.captured is not None and self.captured[2] >= after_seq + self.manager.frame_skip:
+                    return self.captured
+                self.capture_ready.wait(timeout=1.0)
+        return None
+
+    def _detection_loop(self):
+        """Detection loop for this stream: always processes the freshest captured frame"""
+        manager = self.manager
+        last_seq = 0
+        last_process_time = time.time()
+
+        while self.is_running:
+            captured = self._next_capture(last_seq)
+            if captured is None:
+                break
+            frame, captured_at, capture_seq = captured
+
+            # Frames the camera delivered since the last one taken: frame_skip leaves out
+            # frame_skip - 1 on purpose, the rest were overwritten while inference ran
+            missed = capture_seq - last_seq - 1
+            skipped = min(missed, manager.frame_skip - 1)
+            self.metrics['frames_skipped'] += skipped
+            self.metrics['frames_dropped'] += missed - skipped
+            last_seq = capture_seq
+
+            current_time = time.time()
+            try:
+                # Blocks until the scheduler has run this frame's batch
+                processed_frame, detections = manager._process_frame(frame, self.stream_id)
+                inferred_at = time.time()
+
+                # Fast JPEG encoding with lower quality
+                encode_params = [cv2.IMWRITE_JPEG_QUALITY, manager.jpeg_quality]
+                _, buffer = cv2.imencode('.jpg', processed_frame, encode_params)
+                self.latency.append((current_time - captured_at, inferred_at - current_time, time.time() - inferred_at))
+
+                # Raw JPEG bytes, shared by every viewer; base64 only for the legacy /api/frame
+                with self.frame_ready:
+                    self.frame_seq += 1
+                    frame_data = {
+                        'jpeg': buffer.tobytes(),
+                        'seq': self.frame_seq,
+                        'detections': detections,
+                        'timestamp': datetime.now().isoformat(),
+                        'fps': round(1.0 / (current_time - last_process_time), 1) if current_time != last_process_time else 0
+                    }
+                    self.latest_frame = frame_data
+                    self.frame_ready.notify_all()
+                self.metrics['frames_processed'] += 1
+
+                # Everything but the image, which viewers get from the MJPEG stream
+                self._emit('frame_ready', {key: value for key, value in frame_data.items() if key != 'jpeg'})
+
+                # Add to detection log (only significant detections)
+                new_entries = []
+                if detections:
+                    for detection in detections:
+                        if detection['confidence'] > 0.6:  # Only log high-confidence detections
+                            new_entries.append({
+                                'timestamp': datetime.now().strftime('%H:%M:%S'),
+                                'object': detection['class'].upper(),
+                                'confidence': f"{detection['confidence']:.2f}"
+                            })
+                    self.detection_log.extend(new_entries)
+                if new_entries:
+                    # Only the new entries; viewers append them to the log they already hold
+                    self._emit('detections', {'entries': new_entries, 'total': len(self.detection_log)})
+
+                last_process_time = current_time
+
+            except Exception as e:
+                self.metrics['errors'] += 1
+                print(f"⚠️ Frame processing error ({self.stream_id}): {e}")
+
+        # Camera lost or detection stopped: viewers update their status without polling
+        self.is_running = False
+        manager.scheduler.unregister(self.stream_id)
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+        self._emit('status', self.get_status())
+
+    def get_latency(self):
+        """Average glass-to-glass breakdown (ms) over the last LATENCY_WINDOW frames"""
+        samples = list(self.latency)
+        if not samples:
+            return {'capture_age_ms': 0, 'inference_ms': 0, 'encode_ms': 0, 'total_ms': 0}
+        capture_age, inference, encode = (sum(values) / len(samples) * 1000 for values in zip(*samples))
+        return {
+            'capture_age_ms': round(capture_age, 1),  # Camera read -> detection picked the frame up
+            'inference_ms': round(inference, 1),  # Scheduler wait + batched predict + drawing
+            'encode_ms': round(encode, 1),  # JPEG encoding
+            'total_ms': round(capture_age + inference + encode, 1)
+        }
+
+    def get_status(self):
+        """Stream state with per-stream FPS and drop metrics"""
+        with self.frame_lock:
+            latest = self.latest_frame
+        uptime = time.time() - self.started_at if self.started_at else 0
+        captured = self.metrics['frames_captured']
+        return {
+            'stream_id': self.stream_id,
+            'camera_source': str(self.camera_source),
+            'is_running': self.is_running,
+            'camera_active': self.cap is not None and self.cap.isOpened(),
+            'viewers': len(self.owners),
+            'total_detections': len(self.detection_log),
+            'latency': self.get_latency(),
+            'fps': latest['fps'] if latest else 0,
+            'avg_fps': round(self.metrics['frames_processed'] / uptime, 1) if uptime else 0,
+            'drop_rate': round(self.metrics['frames_dropped'] / captured, 3) if captured else 0,
+            'uptime': round(uptime, 1),
+            **self.metrics
+        }
+
+    def get_latest_frame(self):
+        """Get latest processed frame"""
+        with self.frame_lock:
+            return self.latest_frame
+
+    def wait_for_frame(self, after_seq=0, timeout=1.0):
+        """
+        Block until a frame newer than after_seq exists
+
+        Returns the latest frame, or None on timeout or when the stream stops.
+        A slow viewer gets the newest frame and skips the ones in between.
+        """
+        with self.frame_ready:
+            self.frame_ready.wait_for(
+                lambda: not self.is_running or (self.latest_frame is not None and self.latest_frame['seq'] > after_seq),
+                timeout)
+            frame = self.latest_frame
+            return frame if frame is not None and frame['seq'] > after_seq else None
+
+    def get_detection_log(self):
+        """Get recent detection log"""
+        return list(self.detection_log)[-50:]  # Return last 50 detections
+
+    def clear_detection_log(self):
+        """Clear detection log"""
+        self.detection_log.clear()
+        self._emit('detection_log', {'detections': []})
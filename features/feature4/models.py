@@ -1,28 +1,37 @@
 import cv2
-import numpy as np
-from ultralytics import YOLO
+import os
 import threading
-import time
-import base64
-from datetime import datetime
-from collections import deque
-import json
+from model_registry import model_registry
+from yolo_backends import YOLO_BACKEND, get_yolo
+from inference_client import detection_arrays, get_inference_client
+try:
+    from .live_stream import LiveStream
+    from .scheduler import FrameScheduler
+except ImportError:
+    from features.feature4.live_stream import LiveStream
+    from features.feature4.scheduler import FrameScheduler
+
+# Cameras that can run at once; every stream feeds the same batch scheduler
+MAX_STREAMS = int(os.environ.get('FEATURE4_MAX_STREAMS', 4))
 
 class LiveDetectionManager:
+    """
+    Named live streams sharing one detection model
+
+    Each stream (LiveStream) has its own capture thread, frame buffer and
+    detection log; their frames are run together by a shared batch worker.
+    """
+
     def __init__(self):
-        self.model = None
-        self.cap = None
-        self.is_running = False
-        self.detection_thread = None
-        self.latest_frame = None
-        self.detection_log = deque(maxlen=1000)  # Keep last 1000 detections
-        self.frame_lock = threading.Lock()
+        self.model_key = None
+        self.streams = {}
+        self.streams_lock = threading.Lock()
+        # Push channel: callbacks receiving (event, data) from the stream threads
+        self.listeners = []
         
-        # Performance settings
+        # Performance settings (shared by all streams)
         self.frame_skip = 2  # Process every 2nd frame
         self.jpeg_quality = 70  # Lower quality for faster encoding
-        self.max_frame_queue = 2  # Drop frames if processing falls behind
-        self.frame_queue_count = 0
         
         # Object colors (BGR format for OpenCV)
         self.object_colors = {
@@ -48,25 +57,42 @@ class LiveDetectionManager:
             'book': (220, 20, 60),      # Crimson
         }
         
+        # With INFERENCE_SERVER set the model lives in the shared inference server
+        self.client = get_inference_client()
         self.load_model()
+        self.scheduler = FrameScheduler(self._predict_batch)
 
     def load_model(self):
         """Load optimized YOLO model for live detection"""
+        if self.client is not None:
+            print(f"🔗 YOLOv8n served by the inference server at {self.client.address}")
+            return
         try:
             # Use YOLOv8n for fastest performance - will auto-download if needed
-            print("📥 Loading YOLOv8n model (optimized for live detection)...")
-            self.model = YOLO('yolov8n.pt')
+            print(f"📥 Loading YOLOv8n model (optimized for live detection, {YOLO_BACKEND} backend)...")
+            self.model_key, _ = get_yolo('yolov8n.pt', imgsz=640)
             print("✅ YOLOv8n model loaded successfully")
         except Exception as e:
             print(f"❌ Error loading YOLO model: {e}")
             print("🔄 Trying backup model...")
             try:
                 # Fallback to YOLOv11n if v8n fails
-                self.model = YOLO('yolov11n.pt')
+                self.model_key, _ = get_yolo('yolov11n.pt', backend='torch')
                 print("✅ YOLOv11n model loaded as backup")
             except Exception as e2:
                 print(f"❌ Error loading backup model: {e2}")
-                self.model = None
+                self.model_key = None
+
+    @property
+    def model(self):
+        """Shared model instance from the registry, or None if loading failed"""
+        if self.model_key is None:
+            return None
+        return model_registry.get(self.model_key)
+
+    @property
+    def model_ready(self):
+        return self.client is not None or self.model is not None
 
     def get_available_cameras(self):
         """Get list of available camera sources with better error handling"""
@@ -97,222 +123,243 @@ class LiveDetectionManager:
         
         return cameras
 
-    def start_detection(self, camera_source):
-        """Start live detection with optimized settings"""
-        if self.is_running:
-            return False
-            
-        if self.model is None:
-            return False
+    @property
+    def is_running(self):
+        return any(stream.is_running for stream in self.streams.values())
+
+    def _prune_streams(self):
+        """Forget streams whose camera was lost (caller holds streams_lock)"""
+        for stream_id, stream in list(self.streams.items()):
+            if not stream.is_running:
+                stream.stop()
+                del self.streams[stream_id]
 
-        # Handle different camera source types
-        if isinstance(camera_source, str):
-            if camera_source.startswith('http') or camera_source.startswith('rtsp'):
+    def start_detection(self, camera_source, stream_id=None, owner=None):
+        """
+        Start (or join) a named stream; returns the LiveStream, or None if the camera failed
+
+        owner identifies the viewer (one browser tab of one login session).
+        Starting a stream that is already running adds owner to it instead of
+        opening the camera again.
+        """
+        if owner is None:
+            raise ValueError("A stream owner is required")
+        if not self.model_ready:
+            return None
+
+        stream_id = stream_id or f"camera-{camera_source}"
+        with self.streams_lock:
+            self._prune_streams()
+            stream = self.streams.get(stream_id)
+            if stream is not None:
+                stream.owners.add(owner)
+                return stream
+            if len(self.streams) >= MAX_STREAMS:
+                raise RuntimeError(f"At most {MAX_STREAMS} live streams can run at once")
+
+            # Handle different camera source types
+            if isinstance(camera_source, str):
+                if camera_source.startswith('http') or camera_source.startswith('rtsp'):
+                    cap_source = camera_source
+                else:
+                    try:
+                        cap_source = int(camera_source)
+                    except ValueError:
+                        cap_source = 0
+            else:
                 cap_source = camera_source
+
+            # Initialize camera with optimized settings
+            cap = cv2.VideoCapture(cap_source)
+            if not cap.isOpened():
+                return None
+
+            # Optimized camera properties for performance
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize buffer lag
+
+            stream = LiveStream(stream_id, camera_source, cap, self)
+            stream.owners.add(owner)
+            self.streams[stream_id] = stream
+            stream.start()
+
+        print(f"✅ Live stream '{stream_id}' started ({len(self.streams)} running)")
+        self._emit('status', stream.get_status())
+        return stream
+
+    def stop_detection(self, stream_id=None, owner=None, stop_all=False):
+        """
+        Remove owner from a stream; the camera is released once its last owner has left
+
+        stop_all stops the stream (every stream when stream_id is None) for
+        all of its owners; callers must check the user may do that.
+        """
+        with self.streams_lock:
+            if stop_all:
+                if stream_id is None:
+                    stopping = list(self.streams.values())
+                else:
+                    stopping = [self.streams[stream_id]] if stream_id in self.streams else []
             else:
-                try:
-                    cap_source = int(camera_source)
-                except ValueError:
-                    cap_source = 0
-        else:
-            cap_source = camera_source
-
-        # Initialize camera with optimized settings
-        self.cap = cv2.VideoCapture(cap_source)
-        if not self.cap.isOpened():
-            return False
-
-        # Optimized camera properties for performance
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize buffer lag
-
-        self.is_running = True
-        self.frame_queue_count = 0
-        self.detection_thread = threading.Thread(target=self._detection_loop)
-        self.detection_thread.daemon = True
-        self.detection_thread.start()
-
-        return True
-
-    def stop_detection(self):
-        """Stop live detection"""
-        self.is_running = False
-        
-        if self.detection_thread and self.detection_thread.is_alive():
-            self.detection_thread.join(timeout=2)
-            
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-            
-        with self.frame_lock:
-            self.latest_frame = None
+                if owner is None:
+                    raise ValueError("A stream owner is required")
+                stream = self.streams.get(stream_id)
+                if stream is None:
+                    return False
+                stream.owners.discard(owner)
+                stopping = [] if stream.owners else [stream]
+            for stream in stopping:
+                del self.streams[stream.stream_id]
 
-    def _detection_loop(self):
-        """Optimized detection loop running in separate thread"""
-        frame_count = 0
-        last_process_time = time.time()
-        
-        while self.is_running and self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        for stream in stopping:
+            stream.stop()
+            print(f"🛑 Live stream '{stream.stream_id}' stopped")
+            self._emit('status', stream.get_status())
+        return bool(stopping)
 
-            frame_count += 1
-            current_time = time.time()
-            
-            # Frame dropping logic - skip if processing is falling behind
-            if self.frame_queue_count > self.max_frame_queue:
-                continue
-                
-            # Process every nth frame based on frame_skip setting
-            if frame_count % self.frame_skip == 0:
-                self.frame_queue_count += 1
-                
-                try:
-                    processed_frame, detections = self._process_frame(frame)
-                    
-                    # Fast JPEG encoding with lower quality
-                    encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
-                    _, buffer = cv2.imencode('.jpg', processed_frame, encode_params)
-                    frame_b64 = base64.b64encode(buffer).decode('utf-8')
-                    
-                    with self.frame_lock:
-                        self.latest_frame = {
-                            'frame': frame_b64,
-                            'detections': detections,
-                            'timestamp': datetime.now().isoformat(),
-                            'fps': round(1.0 / (current_time - last_process_time), 1) if current_time != last_process_time else 0
-                        }
-
-                    # Add to detection log (only significant detections)
-                    if detections:
-                        for detection in detections:
-                            if detection['confidence'] > 0.6:  # Only log high-confidence detections
-                                self.detection_log.append({
-                                    'timestamp': datetime.now().strftime('%H:%M:%S'),
-                                    'object': detection['class'].upper(),
-                                    'confidence': f"{detection['confidence']:.2f}"
-                                })
-                    
-                    last_process_time = current_time
-                    
-                except Exception as e:
-                    print(f"⚠️ Frame processing error: {e}")
-                finally:
-                    self.frame_queue_count = max(0, self.frame_queue_count - 1)
+    def get_stream(self, stream_id=None):
+        """Named stream, or the most recently started one when stream_id is None"""
+        with self.streams_lock:
+            if stream_id is None:
+                return next(reversed(self.streams.values()), None)
+            return self.streams.get(stream_id)
 
-            # Adaptive sleep based on performance
-            time.sleep(0.01)  # Minimal sleep for better responsiveness
+    def add_listener(self, callback):
+        """Call callback(event, data) for 'status', 'frame_ready', 'detections' and 'detection_log' events"""
+        self.listeners.append(callback)
+
+    def _emit(self, event, data):
+        for callback in self.listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                print(f"⚠️ Live detection listener error ({event}): {e}")
+
+    def _predict_batch(self, frames):
+        """One forward pass over frames from any number of streams"""
+        # Optimized YOLO inference settings
+        if self.client is not None:
+            return self.client.yolo_predict('yolov8n.pt', frames, 640, conf=0.6, iou=0.5, imgsz=640)
+        return self.model(frames, 
+                          conf=0.6,      # Higher confidence threshold
+                          iou=0.5,       # Higher IoU threshold  
+                          verbose=False,
+                          device='cpu',  # Explicitly use CPU (can change to 'cuda' if GPU available)
+                          half=False)    # Disable half precision for stability
 
-    def _process_frame(self, frame):
+    def _process_frame(self, frame, stream_id):
         """Optimized frame processing with YOLO detection"""
-        if self.model is None:
+        if not self.model_ready:
             return frame, []
 
-        # Optimized YOLO inference settings
-        results = self.model(frame, 
-                           conf=0.6,      # Higher confidence threshold
-                           iou=0.5,       # Higher IoU threshold  
-                           verbose=False,
-                           device='cpu',  # Explicitly use CPU (can change to 'cuda' if GPU available)
-                           half=False)    # Disable half precision for stability
+        # Waits for the scheduler, which batches the latest frame of every stream
+        results = [self.scheduler.submit(stream_id, frame)]
         
         detections = []
 
         for result in results:
-            boxes = result.boxes
-            if boxes is not None and len(boxes) > 0:
-                for box in boxes:
-                    try:
-                        # Get box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                        
-                        # Get confidence and class
-                        confidence = float(box.conf[0].cpu().numpy())
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # Safety check for class_id
-                        if class_id < len(self.model.names):
-                            class_name = self.model.names[class_id]
-                        else:
-                            continue  # Skip invalid class IDs
-                        
-                        # Get color for this object class
-                        color = self.object_colors.get(class_name, (255, 255, 255))
-
-                        # Draw bounding box
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-
-                        # Draw label with background
-                        label = f"{class_name}: {confidence:.2f}"
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
-                        
-                        # Ensure label doesn't go out of frame bounds
-                        label_y = max(y1 - 5, label_size[1] + 5)
-                        
-                        # Label background
-                        cv2.rectangle(frame, (x1, label_y - label_size[1] - 5),
-                                    (x1 + label_size[0] + 5, label_y + 5), color, -1)
-                        
-                        # Label text
-                        cv2.putText(frame, label, (x1 + 2, label_y),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-                        # Add to detections list
-                        detections.append({
-                            'class': class_name,
-                            'confidence': confidence,
-                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                            'color': [int(c) for c in color]  # Ensure JSON serializable
-                        })
-                        
-                    except Exception as e:
-                        print(f"⚠️ Detection processing error: {e}")
-                        continue
+            xyxy, confidences, class_ids = detection_arrays(result)
+            names = result.names
+            for (x1, y1, x2, y2), confidence, class_id in zip(xyxy.astype(int).tolist(), confidences.tolist(),
+                                                               class_ids.tolist()):
+                try:
+                    # Safety check for class_id
+                    if class_id not in names:
+                        continue  # Skip invalid class IDs
+                    class_name = names[class_id]
+
+                    # Get color for this object class
+                    color = self.object_colors.get(class_name, (255, 255, 255))
+
+                    # Draw bounding box
+                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+                    # Draw label with background
+                    label = f"{class_name}: {confidence:.2f}"
+                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+                
+                    # Ensure label doesn't go out of frame bounds
+                    label_y = max(y1 - 5, label_size[1] + 5)
+                
+                    # Label background
+                    cv2.rectangle(frame, (x1, label_y - label_size[1] - 5),
+                                (x1 + label_size[0] + 5, label_y + 5), color, -1)
+                
+                    # Label text
+                    cv2.putText(frame, label, (x1 + 2, label_y),
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+                    # Add to detections list
+                    detections.append({
+                        'class': class_name,
+                        'confidence': confidence,
+                        'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                        'color': [int(c) for c in color]  # Ensure JSON serializable
+                    })
+                
+                except Exception as e:
+                    print(f"⚠️ Detection processing error: {e}")
+                    continue
 
         return frame, detections
 
-    def get_status(self):
-        """Get current detection status with performance metrics"""
-        status = {
-            'is_running': self.is_running,
-            'model_loaded': self.model is not None,
-            'camera_active': self.cap is not None and self.cap.isOpened() if self.cap else False,
-            'total_detections': len(self.detection_log),
+    def get_status(self, stream_id=None):
+        """Status of one stream, or of the manager and every stream"""
+        if stream_id is not None:
+            stream = self.get_stream(stream_id)
+            status = stream.get_status() if stream else {'stream_id': stream_id, 'is_running': False}
+        else:
+            with self.streams_lock:
+                streams = [stream.get_status() for stream in self.streams.values()]
+            status = {
+                'is_running': any(stream['is_running'] for stream in streams),
+                'streams': streams,
+                'max_streams': MAX_STREAMS,
+                'total_detections': sum(stream['total_detections'] for stream in streams),
+                'batching': self.scheduler.get_stats()
+            }
+
+        status.update({
+            'model_loaded': self.model_ready,
             'frame_skip': self.frame_skip,
-            'jpeg_quality': self.jpeg_quality,
-            'queue_count': self.frame_queue_count
-        }
-        
-        if self.model is not None:
+            'jpeg_quality': self.jpeg_quality
+        })
+        if self.model_ready:
             status['model_name'] = 'YOLOv8n (Optimized)'
             
         return status
 
-    def get_latest_frame(self):
+    def get_latest_frame(self, stream_id=None):
         """Get latest processed frame"""
-        with self.frame_lock:
-            return self.latest_frame
+        stream = self.get_stream(stream_id)
+        return stream.get_latest_frame() if stream else None
 
-    def get_detection_log(self):
+    def get_detection_log(self, stream_id=None):
         """Get recent detection log"""
-        return list(self.detection_log)[-50:]  # Return last 50 detections
+        stream = self.get_stream(stream_id)
+        return stream.get_detection_log() if stream else []
 
-    def clear_detection_log(self):
+    def clear_detection_log(self, stream_id=None):
         """Clear detection log"""
-        self.detection_log.clear()
+        stream = self.get_stream(stream_id)
+        if stream:
+            stream.clear_detection_log()
         
-    def adjust_performance(self, frame_skip=None, jpeg_quality=None):
+    def adjust_performance(self, frame_skip=None, jpeg_quality=None, batch_size=None, batch_deadline_ms=None):
         """Adjust performance settings on the fly"""
         if frame_skip is not None:
             self.frame_skip = max(1, min(5, frame_skip))  # Clamp between 1-5
         if jpeg_quality is not None:
             self.jpeg_quality = max(30, min(95, jpeg_quality))  # Clamp between 30-95
+        self.scheduler.configure(
+            max_batch=max(1, min(32, batch_size)) if batch_size is not None else None,  # Clamp between 1-32
+            deadline=max(0, min(200, batch_deadline_ms)) / 1000 if batch_deadline_ms is not None else None)  # 0-200 ms
             
         return {
             'frame_skip': self.frame_skip,
-            'jpeg_quality': self.jpeg_quality
+            'jpeg_quality': self.jpeg_quality,
+            'batch_size': self.scheduler.max_batch,
+            'batch_deadline_ms': round(self.scheduler.deadline * 1000, 1)
         }
\ No newline at end of file
@@ -1,5 +1,6 @@
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-from flask_socketio import emit
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
+from flask_socketio import emit, join_room, leave_room, rooms
+import base64
 import cv2
 import threading
 import time
@@ -11,9 +12,20 @@ feature4_bp = Blueprint('feature4', __name__,
                        template_folder='templates',
                        static_folder='static')
 
-# Global detection manager
+# Global detection manager; each camera runs as a named stream inside it
 detection_manager = LiveDetectionManager()
 
+# Roles allowed to stop a stream for every viewer ("stop_all")
+STOP_ALL_ROLES = ['captain']
+
+def requested_stream_id():
+    """?stream=<id>; without it the most recently started stream is used"""
+    return request.args.get('stream') or None
+
+def stream_owner(data):
+    """Owner key for one viewer: the login session plus the page's own viewer_id (tabs share a session)"""
+    return f"{session.get('session_id') or session['username']}:{data.get('viewer_id') or ''}"
+
 @feature4_bp.route('/')
 def feature4_home():
     """Main live detection interface"""
@@ -30,9 +42,36 @@ def feature4_home():
     cameras = detection_manager.get_available_cameras()
     return render_template('feature4.html', cameras=cameras)
 
+SOCKETIO_NAMESPACE = '/feature4'
+
 def register_socketio_handlers(socketio):
-    """Register SocketIO handlers - placeholder for your app.py compatibility"""
-    pass
+    """Push detection events to viewers over Socket.IO instead of having them poll"""
+
+    @socketio.on('connect', namespace=SOCKETIO_NAMESPACE)
+    def handle_connect():
+        if 'username' not in session or session.get('role') not in ['captain', 'soldier']:
+            return False  # Rejects the connection
+
+        emit('status', detection_manager.get_status())
+
+    @socketio.on('watch', namespace=SOCKETIO_NAMESPACE)
+    def handle_watch(data):
+        """Receive one stream's events ({'stream_id': ...}); a null stream_id stops them"""
+        for room in rooms(namespace=SOCKETIO_NAMESPACE):
+            if room.startswith('stream:'):
+                leave_room(room)
+        stream_id = (data or {}).get('stream_id')
+        if not stream_id:
+            return
+        join_room(f"stream:{stream_id}")
+        emit('status', detection_manager.get_status(stream_id))
+        emit('detection_log', {'stream_id': stream_id, 'detections': detection_manager.get_detection_log(stream_id)})
+
+    def broadcast(event, data):
+        # Only viewers of the stream that produced the event receive it
+        socketio.emit(event, data, namespace=SOCKETIO_NAMESPACE, to=f"stream:{data['stream_id']}")
+
+    detection_manager.add_listener(broadcast)
 
 @feature4_bp.route('/api/cameras')
 def get_cameras():
@@ -43,17 +82,44 @@ def get_cameras():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@feature4_bp.route('/api/streams')
+def get_streams():
+    """Every running stream with its FPS and drop metrics, plus shared batching statistics"""
+    try:
+        status = detection_manager.get_status()
+        return jsonify({'success': True, 'streams': status['streams'], 'batching': status['batching']})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@feature4_bp.route('/api/performance', methods=['POST'])
+def adjust_performance():
+    """Tune frame skip, JPEG quality and the cross-stream batch size / deadline"""
+    if 'username' not in session:
+        return jsonify({'success': False, 'error': 'Authentication required'}), 403
+    try:
+        data = request.get_json() or {}
+        settings = detection_manager.adjust_performance(
+            frame_skip=data.get('frame_skip'),
+            jpeg_quality=data.get('jpeg_quality'),
+            batch_size=data.get('batch_size'),
+            batch_deadline_ms=data.get('batch_deadline_ms'))
+        return jsonify({'success': True, 'settings': settings})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @feature4_bp.route('/api/start', methods=['POST'])
 def start_detection():
     """Start live detection"""
+    if 'username' not in session:
+        return jsonify({'success': False, 'error': 'Authentication required'}), 403
     try:
         data = request.get_json()
         camera_source = data.get('camera_source', 0)
         
-        success = detection_manager.start_detection(camera_source)
+        stream = detection_manager.start_detection(camera_source, data.get('stream_id'), stream_owner(data))
         
-        if success:
-            return jsonify({'success': True, 'message': 'Detection started'})
+        if stream:
+            return jsonify({'success': True, 'message': 'Detection started', 'stream_id': stream.stream_id})
         else:
             return jsonify({'success': False, 'error': 'Failed to start camera'})
             
@@ -62,31 +128,43 @@ def start_detection():
 
 @feature4_bp.route('/api/stop', methods=['POST'])
 def stop_detection():
-    """Stop live detection"""
+    """Leave a stream; its camera stops when no other viewer is using it"""
+    if 'username' not in session:
+        return jsonify({'success': False, 'error': 'Authentication required'}), 403
     try:
-        detection_manager.stop_detection()
-        return jsonify({'success': True, 'message': 'Detection stopped'})
+        data = request.get_json(silent=True) or {}
+        stop_all = bool(data.get('stop_all'))
+        if stop_all and session.get('role') not in STOP_ALL_ROLES:
+            return jsonify({'success': False, 'error': 'Only a captain can stop a stream for all viewers'}), 403
+
+        stream = detection_manager.get_stream(data.get('stream_id'))
+        if stream is None:
+            return jsonify({'success': True, 'message': 'No stream running'})
+
+        stopped = detection_manager.stop_detection(stream.stream_id, stream_owner(data), stop_all=stop_all)
+        message = 'Detection stopped' if stopped else 'Left stream; other viewers keep it running'
+        return jsonify({'success': True, 'message': message, 'stream_id': stream.stream_id, 'stopped': stopped})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @feature4_bp.route('/api/status')
 def get_status():
-    """Get detection status"""
+    """Status of ?stream=<id>, or of every stream when omitted"""
     try:
-        status = detection_manager.get_status()
+        status = detection_manager.get_status(requested_stream_id())
         return jsonify(status)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @feature4_bp.route('/api/frame')
 def get_frame():
-    """Get latest processed frame"""
+    """Get latest processed frame (base64 JSON; the live view uses /api/stream.mjpg)"""
     try:
-        frame_data = detection_manager.get_latest_frame()
+        frame_data = detection_manager.get_latest_frame(requested_stream_id())
         if frame_data:
             return jsonify({
                 'success': True,
-                'frame': frame_data['frame'],
+                'frame': base64.b64encode(frame_data['jpeg']).decode('utf-8'),
                 'detections': frame_data['detections']
             })
         else:
@@ -94,11 +172,52 @@ def get_frame():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def mjpeg_frames(stream):
+    """multipart/x-mixed-replace parts, one per new frame, until the stream stops"""
+    seq = 0
+    while True:
+        frame = stream.wait_for_frame(seq, timeout=1.0)
+        if frame is None:
+            if not stream.is_running:
+                return
+            continue
+        seq = frame['seq']
+        yield (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: ' + str(len(frame['jpeg'])).encode() +
+               b'\r\n\r\n' + frame['jpeg'] + b'\r\n')
+
+@feature4_bp.route('/api/stream.mjpg')
+def stream_frames():
+    """Live view as an MJPEG stream: raw JPEG bytes pushed as frames are produced"""
+    if 'username' not in session:
+        return jsonify({'success': False, 'error': 'Authentication required'}), 403
+    stream = detection_manager.get_stream(requested_stream_id())
+    if stream is None or not stream.is_running:
+        return jsonify({'success': False, 'error': 'Detection is not running'}), 404
+    return Response(stream_with_context(mjpeg_frames(stream)),
+                    mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={'Cache-Control': 'no-cache, no-store', 'X-Accel-Buffering': 'no'})
+
+@feature4_bp.route('/api/detections/latest')
+def get_latest_detections():
+    """Detections of the latest frame without the image; ?after=<seq> answers 'unchanged' cheaply"""
+    frame_data = detection_manager.get_latest_frame(requested_stream_id())
+    if not frame_data:
+        return jsonify({'success': False, 'error': 'No frame available'})
+    if request.args.get('after', type=int) == frame_data['seq']:
+        return jsonify({'success': True, 'seq': frame_data['seq'], 'unchanged': True})
+    return jsonify({
+        'success': True,
+        'seq': frame_data['seq'],
+        'detections': frame_data['detections'],
+        'fps': frame_data['fps'],
+        'timestamp': frame_data['timestamp']
+    })
+
 @feature4_bp.route('/api/detections')
 def get_detections():
     """Get latest detection log"""
     try:
-        detections = detection_manager.get_detection_log()
+        detections = detection_manager.get_detection_log(requested_stream_id())
         return jsonify({'success': True, 'detections': detections})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
\ No newline at end of file
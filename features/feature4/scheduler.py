@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+# A batch closes as soon as every active stream has a frame waiting, when it
+# holds FEATURE4_MAX_BATCH frames, or FEATURE4_BATCH_DEADLINE_MS after its
+# oldest frame arrived, whichever comes first
+BATCH_DEADLINE = float(os.environ.get('FEATURE4_BATCH_DEADLINE_MS', 15)) / 1000
+MAX_BATCH = int(os.environ.get('FEATURE4_MAX_BATCH', 8))
+
+
+class FrameScheduler:
+    """
+    Cross-stream batching for live feeds
+
+    Every stream submits its latest frame and waits; a worker thread runs the
+    waiting frames of all streams as one predict_batch call and hands each
+    stream its own result. The scheduler knows which streams are active, so
+    with K cameras a batch normally closes once all K frames are in, without
+    sitting out the deadline.
+    """
+
+    def __init__(self, predict_batch, max_batch=MAX_BATCH, deadline=BATCH_DEADLINE):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.deadline = deadline
+        self.streams = set()
+        self._pending = {}  # stream_id -> request, in arrival order
+        self._cond = threading.Condition()
+        self.stats = {'batches': 0, 'frames': 0, 'complete_batches': 0, 'deadline_batches': 0,
+                      'busy_time': 0.0, 'wait_time': 0.0}
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def register(self, stream_id):
+        with self._cond:
+            self.streams.add(stream_id)
+
+    def unregister(self, stream_id):
+        # A batch waiting for this stream can close now
+        with self._cond:
+            self.streams.discard(stream_id)
+            self._cond.notify()
+
+    def configure(self, max_batch=None, deadline=None):
+        """Change the batch size and deadline (seconds) of the next batches"""
+        with self._cond:
+            if max_batch is not None:
+                self.max_batch = max_batch
+            if deadline is not None:
+                self.deadline = deadline
+            self._cond.notify()
+
+    def submit(self, stream_id, frame):
+        """Run frame in the next batch and return its result (blocks)"""
+        request = {'frame': frame, 'submitted': time.time(), 'done': threading.Event(),
+                   'result': None, 'error': None}
+        with self._cond:
+            if stream_id in self._pending:
+                raise RuntimeError(f"Stream '{stream_id}' already has a frame waiting")
+            self._pending[stream_id] = request
+            self._cond.notify()
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+    def _complete(self):
+        return len(self._pending) >= self.max_batch or (self.streams and self.streams <= self._pending.keys())
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # The oldest waiting frame sets the deadline
+                closes_at = next(iter(self._pending.values()))['submitted'] + self.deadline
+                while not self._complete():
+                    remaining = closes_at - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                complete = self._complete()
+                stream_ids = list(self._pending)[:self.max_batch]
+                batch = [self._pending.pop(stream_id) for stream_id in stream_ids]
+
+            start = time.time()
+            try:
+                results = self.predict_batch([request['frame'] for request in batch])
+                for request, result in zip(batch, results):
+                    request['result'] = result
+            except Exception as e:
+                for request in batch:
+                    request['error'] = e
+            self.stats['busy_time'] += time.time() - start
+            self.stats['wait_time'] += sum(start - request['submitted'] for request in batch)
+            self.stats['batches'] += 1
+            self.stats['frames'] += len(batch)
+            self.stats['complete_batches' if complete else 'deadline_batches'] += 1
+            for request in batch:
+                request['done'].set()
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        batches, frames = stats['batches'], stats['frames']
+        stats['avg_batch'] = round(frames / batches, 2) if batches else 0
+        stats['avg_wait_ms'] = round(stats.pop('wait_time') / frames * 1000, 2) if frames else 0
+        stats['busy_time'] = round(stats['busy_time'], 3)
+        stats.update({'active_streams': len(self.streams), 'max_batch': self.max_batch,
+                      'deadline_ms': round(self.deadline * 1000, 1)})
+        return stats
@@ -6,19 +6,50 @@ import numpy as np
 import os
 import base64
 from .Network_Res2Net_GRA_NCD import Network
+from model_registry import model_registry
+from result_cache import result_cache, weights_fingerprint
+from inference_client import get_inference_client
+
+# Opt-in INT8 model: '' (fp32) or 'int8', calibrated on quantization.CALIBRATION_DIR
+SINET_QUANTIZE = os.environ.get('SINET_QUANTIZE', '')
 
 class CamouflageDetectionModel:
-    def __init__(self, weight_path="Net_epoch_best.pth"):
+    def __init__(self, weight_path="Net_epoch_best.pth", quantize=None):
         self.weight_path = weight_path
-        self.model = None
+        self.quantize = SINET_QUANTIZE if quantize is None else quantize
+        self.quantization_mode = None
+        self.model_key = f"sinet_v2:{weight_path}" + (f":{self.quantize}" if self.quantize else "")
+        # With INFERENCE_SERVER set the network lives in the shared inference server
+        self.client = get_inference_client()
         self.load_model()
     
+    @property
+    def model(self):
+        """Shared model instance (picks up registry reloads)"""
+        return model_registry.get(self.model_key)
+    
+    def _build_model(self):
+        """Build the SINet-V2 network and load its weights"""
+        model = Network(channel=32, imagenet_pretrained=False)
+        model.load_state_dict(torch.load(self.weight_path, map_location="cpu"))
+        model.eval()
+        if self.quantize == 'int8':
+            from quantization import calibration_images, quantize_torch_model
+            calibration = [self.preprocess(path)[1] for path in calibration_images()]
+            model, self.quantization_mode = quantize_torch_model(model, calibration)
+            if self.quantization_mode == 'static':
+                print(f"✅ SINet-V2 quantized to INT8 ({len(calibration)} calibration images)")
+            else:
+                print(f"⚠️ SINet-V2 is serving fp32: {self.quantization_mode}")
+        return model
+    
     def load_model(self):
-        """Load the SINet-V2 model"""
+        """Load the SINet-V2 model from the shared registry"""
+        if self.client is not None:
+            print(f"🔗 SINet-V2 served by the inference server at {self.client.address}")
+            return
         try:
-            self.model = Network(channel=32, imagenet_pretrained=False)
-            self.model.load_state_dict(torch.load(self.weight_path, map_location="cpu"))
-            self.model.eval()
+            model_registry.get(self.model_key, self._build_model)
             print(f"✅ Camouflage detection model loaded from {self.weight_path}")
         except Exception as e:
             print(f"❌ Error loading model: {e}")
@@ -36,6 +67,14 @@ class CamouflageDetectionModel:
         img_tensor = img_tensor / 255.0  # normalize to [0,1]
         return img, img_tensor
     
+    def predict_global_map(self, img_tensor):
+        """Global map logits (S_g) for a preprocessed (1, 3, H, W) tensor"""
+        if self.client is not None:
+            return torch.from_numpy(self.client.sinet_predict(img_tensor.numpy(), self.weight_path, self.quantize))
+        with torch.no_grad():
+            S_g_pred, S_5_pred, S_4_pred, S_3_pred = self.model(img_tensor)
+        return S_g_pred
+    
     def postprocess(self, pred, orig_img):
         """Postprocess model prediction"""
         pred = F.interpolate(pred, size=orig_img.shape[:2], mode="bilinear", align_corners=False)
@@ -50,14 +89,25 @@ class CamouflageDetectionModel:
         return overlay
     
     def process_single_image(self, image_path, output_path):
-        """Process a single image and save result"""
+        """Process a single image and save result (repeat images come from the result cache)"""
+        cache_key = result_cache.key(image_path, f"{self.model_key}:{weights_fingerprint(self.weight_path)}", size=352)
+        cached = result_cache.get(cache_key, output_path)
+        if cached is not None:
+            return {
+                'success': True,
+                'input_path': image_path,
+                'output_path': output_path,
+                'detection_confidence': cached['detection_confidence'],
+                'cached': True
+            }
+        
         try:
             # Preprocess
             orig_img, img_tensor = self.preprocess(image_path)
             
             # Run inference
+            S_g_pred = self.predict_global_map(img_tensor)
             with torch.no_grad():
-                S_g_pred, S_5_pred, S_4_pred, S_3_pred = self.model(img_tensor)
                 mask = self.postprocess(S_g_pred, orig_img)
             
             # Create heatmap overlay
@@ -65,12 +115,15 @@ class CamouflageDetectionModel:
             
             # Save result
             cv2.imwrite(output_path, result)
+            detection_confidence = float(np.mean(mask) / 255.0)
+            result_cache.put(cache_key, {'detection_confidence': detection_confidence}, output_path)
             
             return {
                 'success': True,
                 'input_path': image_path,
                 'output_path': output_path,
-                'detection_confidence': float(np.mean(mask) / 255.0)
+                'detection_confidence': detection_confidence,
+                'cached': False
             }
             
         except Exception as e:
@@ -110,6 +163,7 @@ class CamouflageDetectionModel:
                     'processed_filename': output_filename,
                     'processed_path': web_path,
                     'detection_confidence': result['detection_confidence'],
+                    'cached': result['cached'],
                     'download_url': f"/feature6/download_image/{session_id}/{output_filename}"
                 }
                 
@@ -0,0 +1,181 @@
+import ipaddress
+import os
+import threading
+from dataclasses import dataclass
+from multiprocessing.connection import Client
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Shared inference server (see inference_server.py): a Unix socket path or host:port.
+# Unset, every feature loads and runs its models in-process as before.
+INFERENCE_SERVER = os.environ.get('INFERENCE_SERVER', '')
+# Required with INFERENCE_SERVER: the transport unpickles requests, so the key is what
+# stops other local users from running code in the server. There is no default.
+INFERENCE_AUTHKEY = os.environ.get('INFERENCE_AUTHKEY', '').encode('utf-8') or None
+
+_local_only = False
+_client = None
+_client_lock = threading.Lock()
+
+
+def parse_address(address: str, loopback_only: bool = False) -> Union[str, Tuple[str, int]]:
+    """
+    '/run/inference.sock' -> socket path, 'localhost:7070' -> (host, port)
+
+    With loopback_only, TCP hosts other than localhost / 127.0.0.0/8 / ::1
+    raise ValueError.
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        host = (host or 'localhost').strip('[]')
+        if loopback_only and not is_loopback(host):
+            raise ValueError(f"Inference server must listen on a Unix socket or a loopback address, not '{host}'")
+        return host, int(port)
+    return address
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # Host names other than localhost may resolve anywhere
+
+
+@dataclass
+class Detections:
+    """YOLO boxes for one image, in that image's pixel coordinates"""
+    xyxy: np.ndarray  # (N, 4) float32
+    conf: np.ndarray  # (N,) float32
+    cls: np.ndarray  # (N,) int64
+    names: Dict[int, str]
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    @classmethod
+    def from_array(cls, rows: np.ndarray, names: Dict[int, str]) -> 'Detections':
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        return cls(rows[:, :4], rows[:, 4], rows[:, 5].astype(np.int64), names)
+
+    def to_array(self) -> np.ndarray:
+        """(N, 6) rows of [x1, y1, x2, y2, conf, cls]"""
+        return np.concatenate([self.xyxy, self.conf[:, None], self.cls[:, None].astype(np.float32)], axis=1)
+
+
+def detection_arrays(result) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(xyxy, conf, cls) numpy arrays from Detections or an ultralytics Results object"""
+    if isinstance(result, Detections):
+        return result.xyxy, result.conf, result.cls
+    boxes = result.boxes
+    return (boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy().astype(np.int64))
+
+
+class InferenceError(RuntimeError):
+    """The inference server rejected or failed a request"""
+
+
+class InferenceClient:
+    """
+    Client for the shared inference server
+
+    Each calling thread keeps its own connection, so concurrent requests from
+    web threads reach the server together and can be batched there.
+    """
+
+    def __init__(self, address: str = INFERENCE_SERVER, authkey: Optional[bytes] = INFERENCE_AUTHKEY):
+        if not authkey:
+            raise InferenceError("INFERENCE_AUTHKEY must be set to connect to the inference server")
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(parse_address(self.address), authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, op: str, **payload):
+        # One reconnect covers a server restart between calls
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, payload))
+                status, value = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                self._drop_connection()
+                if attempt:
+                    raise InferenceError(f"Inference server at {self.address} unavailable: {e}") from e
+        if status != 'ok':
+            raise InferenceError(value)
+        return value
+
+    def ping(self) -> dict:
+        return self._call('ping')
+
+    def stats(self) -> dict:
+        """Loaded models and per-group batching statistics"""
+        return self._call('stats')
+
+    def yolo_predict(self, weights: str, images: Sequence[np.ndarray], export_imgsz: int = 640,
+                     conf: float = 0.25, imgsz: int = 640, classes: Optional[List[int]] = None,
+                     iou: float = 0.7) -> List[Detections]:
+        """
+        Ultralytics YOLO predict on BGR images
+
+        weights and export_imgsz select the server's model (on its
+        YOLO_BACKEND); the other arguments are passed to predict.
+        """
+        arrays, names = self._call('yolo_predict', weights=weights, export_imgsz=export_imgsz, images=list(images),
+                                   conf=conf, imgsz=imgsz, classes=classes, iou=iou)
+        return [Detections.from_array(rows, names) for rows in arrays]
+
+    def yolo_names(self, weights: str, export_imgsz: int = 640) -> Dict[int, str]:
+        return self._call('yolo_names', weights=weights, export_imgsz=export_imgsz)
+
+    def uav_detect(self, images: Sequence[np.ndarray], size: int = 640) -> List[np.ndarray]:
+        """Feature 2 YOLOv5 on RGB images: one (N, 6) [x1, y1, x2, y2, conf, cls] array per image"""
+        return self._call('uav_detect', images=list(images), size=size)
+
+    def uav_names(self) -> List[str]:
+        return self._call('uav_names')
+
+    def sinet_predict(self, tensor: np.ndarray, weight_path: str = "Net_epoch_best.pth",
+                      quantize: str = '') -> np.ndarray:
+        """Feature 6 SINet-V2 global map logits for a (1, 3, H, W) input"""
+        return self._call('sinet_predict', tensor=tensor, weight_path=weight_path, quantize=quantize)
+
+
+def get_inference_client() -> Optional[InferenceClient]:
+    """
+    Shared client when INFERENCE_SERVER is set, else None (models run in-process)
+
+    Raises InferenceError when INFERENCE_SERVER is set without INFERENCE_AUTHKEY.
+    """
+    global _client
+    if _local_only or not INFERENCE_SERVER:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient()
+        return _client
+
+
+def run_models_locally():
+    """Used by the server itself, so the feature classes it hosts load their own models"""
+    global _local_only
+    _local_only = True
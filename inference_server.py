@@ -0,0 +1,210 @@
+"""
+Shared inference server: owns the detection models for every web worker on the host
+
+Usage (from the repository root):
+    python inference_server.py [--address /tmp/inference.sock] [--window-ms 5] [--max-batch 16]
+
+INFERENCE_AUTHKEY must be set (to the same secret for the web app). The server
+only listens on a Unix socket or a loopback address, because requests are
+unpickled.
+
+Then start the web app with the same INFERENCE_SERVER and INFERENCE_AUTHKEY.
+Features 2, 3, 4 and 6 send their images here instead of loading models, so
+the models are in memory once per host however many web workers run.
+Concurrent requests for the same model and settings are batched into one
+forward pass.
+"""
+import argparse
+import os
+import threading
+import time
+from multiprocessing.connection import Listener
+
+import numpy as np
+
+import inference_client
+from batch_queue import BatchQueue
+from inference_client import INFERENCE_AUTHKEY, INFERENCE_SERVER, detection_arrays, parse_address
+from model_registry import model_registry
+from yolo_backends import get_yolo
+
+# Requests arriving within the window are batched, up to INFERENCE_MAX_BATCH images
+INFERENCE_BATCH_WINDOW = float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 5)) / 1000
+INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', 16))
+
+
+class InferenceServer:
+    def __init__(self, address=INFERENCE_SERVER, authkey=INFERENCE_AUTHKEY,
+                 window=INFERENCE_BATCH_WINDOW, max_batch=INFERENCE_MAX_BATCH):
+        if not authkey:
+            raise ValueError("INFERENCE_AUTHKEY must be set: requests are unpickled, so the key is the only access control")
+        parse_address(address, loopback_only=True)  # Fails early for a non-loopback host
+        # The feature classes hosted here must load their models, not call back into the server
+        inference_client.run_models_locally()
+        self.address = address
+        self.authkey = authkey
+        self.window = window
+        self.max_batch = max_batch
+        self._queues = {}
+        self._hosts = {}
+        self._host_locks = {}
+        self._lock = threading.Lock()
+        self._model_locks = {}
+        self.started_at = time.time()
+
+    def _batch_queue(self, group, run_batch):
+        with self._lock:
+            if group not in self._queues:
+                self._queues[group] = BatchQueue(run_batch, self.window, self.max_batch)
+            return self._queues[group]
+
+    def _model_lock(self, key):
+        # A model shared by several settings groups still runs one batch at a time
+        with self._lock:
+            return self._model_locks.setdefault(key, threading.Lock())
+
+    def _host(self, key, factory):
+        """Feature model wrapper (UAVDetector, CamouflageDetectionModel), built once"""
+        with self._lock:
+            if key in self._hosts:
+                return self._hosts[key]
+            build_lock = self._host_locks.setdefault(key, threading.Lock())
+        # A cold load only holds up requests for the same host, not every request and stats
+        with build_lock:
+            with self._lock:
+                if key in self._hosts:
+                    return self._hosts[key]
+            host = factory()
+            with self._lock:
+                self._hosts[key] = host
+            return host
+
+    # -------------------------------------------------
+    # Operations
+    # -------------------------------------------------
+
+    def _yolo(self, weights, export_imgsz):
+        return get_yolo(weights, imgsz=export_imgsz)
+
+    def op_yolo_predict(self, weights, export_imgsz, images, conf, imgsz, classes=None, iou=0.7):
+        key, model = self._yolo(weights, export_imgsz)
+        lock = self._model_lock(key)
+
+        def run(batch):
+            # Looked up per batch, so registry reloads and re-exports reach the queue
+            model = self._yolo(weights, export_imgsz)[1]
+            with lock:
+                results = model.predict(batch, conf=conf, imgsz=imgsz, classes=classes, iou=iou, verbose=False)
+            return [np.concatenate([xyxy, conf_[:, None], cls[:, None]], axis=1).astype(np.float32)
+                    for xyxy, conf_, cls in map(detection_arrays, results)]
+
+        group = ('yolo', key, conf, imgsz, tuple(classes) if classes is not None else None, iou)
+        return self._batch_queue(group, run).submit(images), dict(model.names)
+
+    def op_yolo_names(self, weights, export_imgsz):
+        return dict(self._yolo(weights, export_imgsz)[1].names)
+
+    def _uav(self):
+        from features.feature2.models import UAVDetector
+        return self._host('uav', UAVDetector)
+
+    def op_uav_detect(self, images, size):
+        detector = self._uav()
+        lock = self._model_lock(detector.registry_key)
+
+        def run(batch):
+            with lock:
+                return detector.predict_arrays(batch, size)
+
+        return self._batch_queue(('uav', size), run).submit(images)
+
+    def op_uav_names(self):
+        return self._uav().class_names.tolist()
+
+    def op_sinet_predict(self, tensor, weight_path, quantize=''):
+        import torch
+        from features.feature6.models import CamouflageDetectionModel
+
+        detector = self._host(('sinet', weight_path, quantize),
+                              lambda: CamouflageDetectionModel(weight_path, quantize=quantize))
+        lock = self._model_lock(detector.model_key)
+
+        def run(batch):
+            with lock, torch.no_grad():
+                global_map = detector.model(torch.from_numpy(np.concatenate(batch)))[0]
+            return list(global_map.cpu().numpy()[:, None])
+
+        return self._batch_queue(('sinet', detector.model_key, tensor.shape[2:]), run).submit([tensor])[0]
+
+    def op_ping(self):
+        return {'address': self.address, 'uptime': round(time.time() - self.started_at, 1)}
+
+    def op_stats(self):
+        with self._lock:
+            groups = {' '.join(map(str, group)): dict(q.stats) for group, q in self._queues.items()}
+        for stats in groups.values():
+            stats['avg_batch'] = round(stats['items'] / stats['batches'], 2) if stats['batches'] else 0
+            stats['busy_time'] = round(stats['busy_time'], 3)
+        return {'models': model_registry.get_stats(), 'batching': groups,
+                'window_ms': self.window * 1000, 'max_batch': self.max_batch}
+
+    # -------------------------------------------------
+    # Transport
+    # -------------------------------------------------
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                handler = getattr(self, f"op_{op}", None)
+                try:
+                    if handler is None:
+                        raise ValueError(f"Unknown operation '{op}'")
+                    reply = ('ok', handler(**payload))
+                except Exception as e:
+                    reply = ('error', f"{op} failed: {e}")
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def serve_forever(self):
+        if not self.authkey:
+            raise ValueError("INFERENCE_AUTHKEY must be set")
+        address = parse_address(self.address, loopback_only=True)
+        if isinstance(address, str) and os.path.exists(address):
+            os.remove(address)  # Stale socket from a previous run
+        with Listener(address, authkey=self.authkey) as listener:
+            print(f"✅ Inference server listening on {self.address} "
+                  f"(batch window {self.window * 1000:.0f} ms, max batch {self.max_batch})")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"⚠️ Rejected inference client: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--address', default=INFERENCE_SERVER or '/tmp/inference.sock')
+    parser.add_argument('--window-ms', type=float, default=INFERENCE_BATCH_WINDOW * 1000)
+    parser.add_argument('--max-batch', type=int, default=INFERENCE_MAX_BATCH)
+    parser.add_argument('--preload', action='store_true', help="Load the default models before accepting requests")
+    args = parser.parse_args()
+
+    server = InferenceServer(args.address, window=args.window_ms / 1000, max_batch=args.max_batch)
+    if args.preload:
+        from features.feature3.model_tiers import DEFAULT_TIER, EXPORT_IMGSZ, MODEL_TIERS
+        server.op_yolo_names(MODEL_TIERS[DEFAULT_TIER]['model'], EXPORT_IMGSZ)
+        server.op_yolo_names('yolov8n.pt', 640)
+        server._uav()
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import copy
+import glob
+import os
+import re
+
+import cv2
+import numpy as np
+
+# Local images used to calibrate INT8 activation ranges
+CALIBRATION_DIR = os.environ.get('QUANT_CALIBRATION_DIR', 'static/uploads')
+CALIBRATION_IMAGES = int(os.environ.get('QUANT_CALIBRATION_IMAGES', 64))
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.bmp', '*.webp')
+
+
+def calibration_images(folder=CALIBRATION_DIR, limit=CALIBRATION_IMAGES):
+    """Sorted (reproducible) list of up to limit images under folder"""
+    paths = set()
+    for pattern in IMAGE_PATTERNS:
+        paths.update(glob.glob(os.path.join(folder, '**', pattern), recursive=True))
+        paths.update(glob.glob(os.path.join(folder, '**', pattern.upper()), recursive=True))
+    paths = sorted(paths)
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found under {folder}")
+    return paths[:limit]
+
+
+# -------------------------------------------------
+# YOLO: static INT8 ONNX (ONNX Runtime)
+# -------------------------------------------------
+
+def letterbox_tensor(image, imgsz):
+    """BGR image -> (1, 3, imgsz, imgsz) float32 RGB tensor, letterboxed like ultralytics"""
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor[None])
+
+
+def int8_onnx_path(weights, imgsz):
+    return f"{os.path.splitext(weights)[0]}_{imgsz}_int8.onnx"
+
+
+def _head_nodes(onnx_path):
+    """Nodes of the detection head (highest /model.N/ block); kept in fp32 to protect box decoding"""
+    import onnx
+    graph = onnx.load(onnx_path).graph
+    indices = [int(m.group(1)) for node in graph.node for m in [re.search(r'/model\.(\d+)/', node.name)] if m]
+    if not indices:
+        return []
+    head = f"/model.{max(indices)}/"
+    return [node.name for node in graph.node if head in node.name]
+
+
+def quantize_yolo_onnx(weights, imgsz=640, calibration_dir=CALIBRATION_DIR):
+    """
+    Static INT8 (QDQ) ONNX model for YOLO weights, cached next to them
+
+    Activation ranges are calibrated on images from calibration_dir; the
+    detection head stays in fp32.
+    """
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+    from yolo_backends import export_yolo
+
+    target = int8_onnx_path(weights, imgsz)
+    fp32_path = export_yolo(weights, 'onnx', imgsz)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(fp32_path):
+        return target
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self, paths):
+            self._paths = iter(paths)
+
+        def get_next(self):
+            for path in self._paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {'images': letterbox_tensor(image, imgsz)}
+            return None
+
+    paths = calibration_images(calibration_dir)
+    print(f"📦 Quantizing {weights} to INT8 with {len(paths)} calibration images...")
+    # Written under a per-process name and moved into place, so concurrent processes never read a partial file
+    staged = f"{os.path.splitext(target)[0]}.{os.getpid()}.tmp.onnx"
+    quantize_static(fp32_path, staged, ImageReader(paths),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True,
+                    nodes_to_exclude=_head_nodes(fp32_path))
+    os.replace(staged, target)
+    print(f"✅ Cached INT8 model at {target}")
+    return target
+
+
+# -------------------------------------------------
+# PyTorch modules (SINet-V2): static FX INT8, fp32 fallback
+# -------------------------------------------------
+
+def quantize_torch_model(model, calibration_tensors, backend='x86'):
+    """
+    INT8 copy of an eval-mode model
+
+    FX graph mode static quantization calibrated on calibration_tensors
+    (convolutions included). If the model cannot be traced the fp32 model is
+    returned unchanged, labelled as such: dynamic quantization would only touch
+    Linear layers, and SINet's only one is the unused Res2Net classifier.
+
+    Returns:
+        tuple: (model, 'static' or 'fp32 (static quantization failed)')
+    """
+    import torch
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = backend if backend in torch.backends.quantized.supported_engines else 'qnnpack'
+    try:
+        prepared = prepare_fx(copy.deepcopy(model).eval(), get_default_qconfig_mapping(torch.backends.quantized.engine),
+                              example_inputs=(calibration_tensors[0],))
+        with torch.no_grad():
+            for tensor in calibration_tensors:
+                prepared(tensor)
+        return convert_fx(prepared), 'static'
+    except Exception as e:
+        print(f"⚠️ Static quantization failed ({e}), keeping the fp32 model")
+        return model, 'fp32 (static quantization failed)'
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+# Content-addressed cache of per-image results, shared by the image features
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', 'config/result_cache')
+RESULT_CACHE_MAX_MB = float(os.environ.get('RESULT_CACHE_MAX_MB', 512))
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE', '1') != '0'
+
+
+def content_sha256(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def weights_fingerprint(weight_path):
+    """Cheap identity for a weight file: replacing the file changes it"""
+    try:
+        stat = os.stat(weight_path)
+    except OSError:
+        return weight_path
+    return f"{weight_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class ResultCache:
+    """
+    Detections and rendered outputs keyed by (image content, model, parameters)
+
+    Each entry is a JSON result plus a copy of the rendered image, stored
+    under cache_dir. Entries are evicted least-recently-used first once the
+    total size passes max_bytes; a hit refreshes the entry's mtime, so the
+    order survives restarts.
+    """
+
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 enabled=RESULT_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = None  # key -> bytes on disk, least recently used first
+        self._hashes = {}  # (path, size, mtime) -> content hash
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def file_hash(self, file_path):
+        stat = os.stat(file_path)
+        memo = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        sha256 = self._hashes.get(memo)
+        if sha256 is None:
+            sha256 = content_sha256(file_path)
+            if len(self._hashes) >= 10000:
+                self._hashes.clear()
+            self._hashes[memo] = sha256
+        return sha256
+
+    def key(self, file_path, model_id, **params):
+        """
+        Cache key for an input file under a model and its parameters
+
+        Returns None when caching is disabled or the file cannot be read.
+        """
+        if not self.enabled:
+            return None
+        try:
+            content = self.file_hash(file_path)
+        except OSError:
+            return None
+        identity = json.dumps({'content': content, 'model': model_id, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _index(self):
+        """Entries on disk, loaded on first use (caller holds the lock)"""
+        if self._entries is None:
+            found = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith('.json'):
+                        continue
+                    key = name[:-5]
+                    size = sum(os.path.getsize(os.path.join(root, other))
+                               for other in files if other.startswith(key))
+                    found.append((os.path.getmtime(os.path.join(root, name)), key, size))
+            self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        return self._entries
+
+    def _remove(self, key):
+        folder = os.path.dirname(self._entry_path(key))
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                if name.startswith(key):
+                    os.remove(os.path.join(folder, name))
+        self._entries.pop(key, None)
+
+    def get(self, key, output_path=None):
+        """
+        Cached result for key, or None
+
+        With output_path, the cached rendered image is copied there.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            entries = self._index()
+            if key not in entries:
+                self._stats['misses'] += 1
+                return None
+            entry_path = self._entry_path(key)
+            try:
+                with open(entry_path, 'r') as f:
+                    entry = json.load(f)
+                if output_path and entry.get('rendered'):
+                    shutil.copyfile(os.path.join(os.path.dirname(entry_path), entry['rendered']), output_path)
+                os.utime(entry_path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Dropping unreadable result cache entry {key[:12]}: {e}")
+                self._remove(key)
+                self._stats['misses'] += 1
+                return None
+            entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry['result']
+
+    def put(self, key, result, rendered_path=None):
+        """Store a JSON-serializable result and optionally the rendered image at rendered_path"""
+        if key is None:
+            return
+        entry_path = self._entry_path(key)
+        folder = os.path.dirname(entry_path)
+        entry = {'result': result, 'rendered': None}
+        with self._lock:
+            entries = self._index()
+            try:
+                os.makedirs(folder, exist_ok=True)
+                if rendered_path and os.path.exists(rendered_path):
+                    entry['rendered'] = key + os.path.splitext(rendered_path)[1]
+                    target = os.path.join(folder, entry['rendered'])
+                    shutil.copyfile(rendered_path, target + '.tmp')
+                    os.replace(target + '.tmp', target)
+                with open(entry_path + '.tmp', 'w') as f:
+                    json.dump(entry, f)
+                os.replace(entry_path + '.tmp', entry_path)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"⚠️ Could not cache result {key[:12]}: {e}")
+                self._remove(key)
+                return
+
+            entries[key] = sum(os.path.getsize(os.path.join(folder, name))
+                               for name in os.listdir(folder) if name.startswith(key))
+            entries.move_to_end(key)
+            self._stats['stores'] += 1
+
+            # Least recently used first; the entry just stored is always kept
+            total = sum(entries.values())
+            while total > self.max_bytes and len(entries) > 1:
+                oldest, size = next(iter(entries.items()))
+                self._remove(oldest)
+                total -= size
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self._entries = OrderedDict()
+            self._hashes.clear()
+
+    def get_stats(self):
+        with self._lock:
+            entries = self._index()
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(self._stats,
+                        enabled=self.enabled,
+                        entries=len(entries),
+                        size_mb=round(sum(entries.values()) / (1024 * 1024), 2),
+                        max_mb=round(self.max_bytes / (1024 * 1024), 2),
+                        hit_rate=round(self._stats['hits'] / lookups, 3) if lookups else 0)
+
+
+# Shared cache used by features 2, 3 and 6
+result_cache = ResultCache()
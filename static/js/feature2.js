@@ -183,6 +183,10 @@ class UAVDetectionApp {
         this.selectedFiles.forEach(file => {
             formData.append('images', file);
         });
+        const tiledInput = document.getElementById('tiledInference');
+        if (tiledInput) {
+            formData.append('tiled', tiledInput.checked ? '1' : '0');
+        }
         
         try {
             // Simulate progress updates
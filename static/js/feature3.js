@@ -5,6 +5,8 @@ let currentVideoSession = null;
 let uploadedImageFiles = [];
 let uploadedVideoFiles = [];
 let videoProcessingInterval = null;
+let imageProcessingInterval = null;
+let imagePartialResults = [];
 
 // Tab Management
 function showTab(tabName) {
@@ -39,6 +41,33 @@ function getSelectedFilter(filterType) {
     return 'all'; // default
 }
 
+// Get selected model tier ('image' or 'video' tab)
+function getSelectedTier(type) {
+    const selected = document.querySelector(`input[name="${type}-tier"]:checked`);
+    return selected ? selected.value : 'accuracy';
+}
+
+function formatModelTier(modelTier) {
+    if (!modelTier) return '-';
+    const tier = modelTier.tier.toUpperCase();
+    return modelTier.downgraded ? `${tier} (from ${modelTier.requested.toUpperCase()})` : tier;
+}
+
+// Get selected frame sampling mode for videos
+function getSelectedSampling() {
+    const selected = document.querySelector('input[name="video-sampling"]:checked');
+    const mode = selected ? selected.value : 'all';
+    if (mode === 'stride') return { sampling_mode: 'stride', frame_stride: 3 };
+    if (mode === 'keyframe') return { sampling_mode: 'keyframe', max_gap: 15 };
+    return { sampling_mode: 'all' };
+}
+
+// Get selected output options for videos
+function getSelectedOutput() {
+    const segmented = document.getElementById('video-segmented');
+    return { segment_seconds: segmented && segmented.checked ? 10 : 0 };
+}
+
 // Initialize Drag and Drop
 function initializeDragDrop() {
     // Image drag and drop
@@ -170,9 +199,9 @@ async function processImages() {
         }
 
         currentImageSession = uploadResult.session_id;
-        showImageProcessingStatus(`Processing images with YOLO11x (${getFilterDisplayName(selectedFilter)})...`, 'processing');
+        showImageProcessingStatus(`Queueing images for ${getSelectedTier('image')} tier (${getFilterDisplayName(selectedFilter)})...`, 'processing');
 
-        // Process images with filter
+        // Queue images with filter; results are polled as they arrive
         const processResponse = await fetch('/feature3/process_images', {
             method: 'POST',
             headers: {
@@ -180,7 +209,9 @@ async function processImages() {
             },
             body: JSON.stringify({
                 session_id: currentImageSession,
-                detection_filter: selectedFilter
+                detection_filter: selectedFilter,
+                model_tier: getSelectedTier('image'),
+                tiled: document.getElementById('image-tiled').checked
             })
         });
 
@@ -189,17 +220,106 @@ async function processImages() {
             throw new Error(processResult.error);
         }
 
-        showImageProcessingStatus(`Processing complete! (${getFilterDisplayName(selectedFilter)})`, 'success');
-        displayImageResults(processResult);
+        document.getElementById('cancel-images-btn').style.display = 'inline-block';
+        document.getElementById('cancel-images-btn').disabled = false;
+        startImageProgressPolling(selectedFilter);
 
     } catch (error) {
         showImageProcessingStatus('Processing failed: ' + error.message, 'error');
         console.error('Image processing error:', error);
-    } finally {
-        document.getElementById('process-images-btn').disabled = false;
+        resetImageProcessingUI();
+    }
+}
+
+function startImageProgressPolling(selectedFilter) {
+    imagePartialResults = [];
+    imageProcessingInterval = setInterval(async () => {
+        try {
+            const response = await fetch(`/feature3/image_progress/${currentImageSession}?since=${imagePartialResults.length}`);
+            const progress = await response.json();
+
+            if (progress.partial_results && progress.partial_results.length > 0) {
+                imagePartialResults = imagePartialResults.concat(progress.partial_results);
+                displayImageResults(buildPartialImageResults(imagePartialResults, selectedFilter));
+            }
+
+            if (progress.status === 'queued') {
+                showImageProcessingStatus(`Queued (position ${progress.queue_position || 1}) - waiting for a free worker...`, 'processing');
+            } else if (progress.status === 'processing') {
+                showImageProcessingStatus(`Processing: ${progress.progress.toFixed(1)}% (${imagePartialResults.length}/${progress.total_files}) - ${progress.current_file || 'Processing...'}`, 'processing');
+            } else if (progress.status === 'completed' || progress.status === 'cancelled') {
+                stopImageProgressPolling();
+                if (progress.results) {
+                    displayImageResults(progress.results);
+                }
+                if (progress.status === 'completed') {
+                    showImageProcessingStatus(`Processing complete! (${getFilterDisplayName(selectedFilter)})`, 'success');
+                } else {
+                    showImageProcessingStatus('Processing cancelled', 'warning');
+                }
+                resetImageProcessingUI();
+            } else if (progress.status === 'error') {
+                stopImageProgressPolling();
+                showImageProcessingStatus('Processing failed: ' + progress.error, 'error');
+                resetImageProcessingUI();
+            } else if (progress.status === 'not_found') {
+                stopImageProgressPolling();
+                showImageProcessingStatus('Session not found', 'error');
+                resetImageProcessingUI();
+            }
+        } catch (error) {
+            console.error('Progress polling error:', error);
+        }
+    }, 1000); // Poll every second
+}
+
+function stopImageProgressPolling() {
+    if (imageProcessingInterval) {
+        clearInterval(imageProcessingInterval);
+        imageProcessingInterval = null;
+    }
+}
+
+function buildPartialImageResults(processedImages, detectionFilter) {
+    const objectCounts = {};
+    let totalObjects = 0;
+    let confidenceSum = 0;
+    processedImages.forEach(img => {
+        img.detections.forEach(det => {
+            objectCounts[det.class] = (objectCounts[det.class] || 0) + 1;
+            confidenceSum += det.confidence;
+            totalObjects++;
+        });
+    });
+    return {
+        processed_images: processedImages,
+        detection_filter: detectionFilter,
+        processing_time: '...',
+        total_objects: totalObjects,
+        average_confidence: totalObjects ? (confidenceSum / totalObjects).toFixed(2) : 0,
+        object_counts: objectCounts
+    };
+}
+
+async function cancelImageProcessing() {
+    if (!currentImageSession) return;
+
+    try {
+        await fetch(`/feature3/cancel_images/${currentImageSession}`, {
+            method: 'POST'
+        });
+        showImageProcessingStatus('Cancelling processing...', 'warning');
+    } catch (error) {
+        console.error('Cancel error:', error);
     }
 }
 
+function resetImageProcessingUI() {
+    document.getElementById('process-images-btn').disabled = false;
+    document.getElementById('cancel-images-btn').style.display = 'none';
+    document.getElementById('cancel-images-btn').disabled = true;
+}
+
 function displayImageResults(results) {
     const resultsSection = document.getElementById('image-results');
     const gallery = document.getElementById('image-gallery');
@@ -244,6 +364,10 @@ function displayImageResults(results) {
                 <span class="stat-label">Images Processed</span>
                 <span class="stat-value">${results.processed_images.length}</span>
             </div>
+            <div class="stat-item">
+                <span class="stat-label">Model Tier</span>
+                <span class="stat-value">${formatModelTier(results.model_tier)}</span>
+            </div>
         </div>
         <h4>OBJECT BREAKDOWN</h4>
         <div class="object-breakdown">
@@ -367,7 +491,10 @@ async function processVideos() {
             },
             body: JSON.stringify({
                 session_id: currentVideoSession,
-                detection_filter: selectedFilter
+                detection_filter: selectedFilter,
+                model_tier: getSelectedTier('video'),
+                ...getSelectedSampling(),
+                ...getSelectedOutput()
             })
         });
 
@@ -393,12 +520,19 @@ function startVideoProgressPolling() {
             const progress = await response.json();
 
             if (progress.status === 'processing') {
-                showVideoProcessingStatus(`Processing: ${progress.progress.toFixed(1)}% - ${progress.current_file || 'Processing...'}`, 'processing');
-            } else if (progress.status === 'completed') {
+                showVideoProcessingStatus(`Processing: ${progress.progress.toFixed(1)}% - ${progress.current_file || 'Processing...'}${formatPipelineStats(progress.videos)}`, 'processing');
+                renderLiveSegments(progress.segments);
+            } else if (progress.status === 'completed' || progress.status === 'cancelled') {
                 clearInterval(videoProcessingInterval);
                 videoProcessingInterval = null;
-                showVideoProcessingStatus('Video processing complete!', 'success');
-                displayVideoResults(progress.results);
+                if (progress.results) {
+                    displayVideoResults(progress.results);
+                }
+                if (progress.status === 'completed') {
+                    showVideoProcessingStatus('Video processing complete!', 'success');
+                } else {
+                    showVideoProcessingStatus('Video processing cancelled', 'warning');
+                }
                 resetVideoProcessingUI();
             } else if (progress.status === 'error') {
                 clearInterval(videoProcessingInterval);
@@ -417,6 +551,42 @@ function startVideoProgressPolling() {
     }, 2000); // Poll every 2 seconds
 }
 
+// List annotated segments that are ready while the job is still running
+function renderLiveSegments(segments) {
+    const container = document.getElementById('video-live-segments');
+    if (!container) return;
+    const videos = Object.keys(segments || {});
+    if (videos.length === 0) {
+        container.innerHTML = '';
+        return;
+    }
+
+    container.innerHTML = videos.map(video => {
+        const manifest = segments[video];
+        return `
+            <div class="live-segment-video">
+                <h5>${video}${manifest.finished ? '' : ' (processing)'}</h5>
+                <div class="live-segment-links">
+                    ${manifest.segments.map(segment => `
+                        <a href="${segment.url}" target="_blank">${segment.start_time.toFixed(0)}s - ${(segment.start_time + segment.duration).toFixed(0)}s</a>
+                    `).join('')}
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+// Per-video stage throughput; concurrent videos each report their own pipeline
+function formatPipelineStats(videos) {
+    return Object.entries(videos || {})
+        .filter(([, stats]) => stats.pipeline)
+        .map(([name, stats]) => {
+            const pipeline = stats.pipeline;
+            return ` | ${name}: decode ${pipeline.decode.fps} fps, infer ${pipeline.infer.fps} fps, encode ${pipeline.encode.fps} fps`;
+        })
+        .join('');
+}
+
 async function cancelVideoProcessing() {
     if (!currentVideoSession) return;
 
@@ -452,7 +622,7 @@ function displayVideoResults(results) {
                     <div class="video-info">
                         <h5>${video.original_name}</h5>
                         <p>Processed: ${video.processed_name}</p>
-                        <p>Frames: ${video.total_frames} | Detections: ${video.detections}</p>
+                        <p>Frames: ${video.total_frames} | Detected: ${video.frames_detected} | Detections: ${video.detections} | Unique Objects: ${video.unique_objects}</p>
                     </div>
                     <div class="video-controls">
                         <button onclick="downloadVideo('${video.processed_name}')" class="download-btn">DOWNLOAD</button>
@@ -478,6 +648,14 @@ function displayVideoResults(results) {
                 <span class="stat-label">Videos Processed</span>
                 <span class="stat-value">${results.processed_videos.length}</span>
             </div>
+            <div class="stat-item">
+                <span class="stat-label">Inference Speedup</span>
+                <span class="stat-value">${results.inference_speedup || 1}x</span>
+            </div>
+            <div class="stat-item">
+                <span class="stat-label">Model Tier</span>
+                <span class="stat-value">${formatModelTier(results.model_tier)}</span>
+            </div>
         </div>
         <h4>OBJECT BREAKDOWN</h4>
         <div class="object-breakdown">
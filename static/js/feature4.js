@@ -4,12 +4,81 @@ class LiveDetectionController {
         this.frameUpdateInterval = null;
         this.statusUpdateInterval = null;
         this.detectionLogInterval = null;
-        this.frameCount = 0;
-        this.lastFrameTime = Date.now();
+        this.lastFrameSeq = 0;
+        this.streamId = null;
+        // Identifies this tab as a stream owner; tabs of one login share the session cookie
+        this.viewerId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+        this.detections = [];
+        this.pushConnected = false;
         this.initializeElements();
         this.setupEventListeners();
         this.loadCameras();
         this.startStatusMonitoring();
+        this.connectPushChannel();
+    }
+
+    connectPushChannel() {
+        // Socket.IO client missing (e.g. offline): keep polling
+        if (typeof io === 'undefined') return;
+
+        this.socket = io('/feature4');
+        this.socket.on('connect', () => {
+            this.pushConnected = true;
+            this.stopPolling();
+            this.watchStream();
+        });
+        this.socket.on('disconnect', () => {
+            this.pushConnected = false;
+            this.startPolling();
+        });
+        this.socket.on('status', (data) => this.applyStatus(data));
+        this.socket.on('frame_ready', (data) => this.applyFrame(data));
+        this.socket.on('detections', (data) => this.appendDetections(data.entries));
+        this.socket.on('detection_log', (data) => {
+            this.detections = data.detections;
+            this.displayDetectionLog(this.detections);
+        });
+    }
+
+    watchStream() {
+        // Subscribe to this page's stream only; other cameras' events are not sent here
+        if (this.socket && this.pushConnected) {
+            this.socket.emit('watch', { stream_id: this.streamId });
+        }
+    }
+
+    streamQuery() {
+        return this.streamId ? `stream=${encodeURIComponent(this.streamId)}` : '';
+    }
+
+    startPolling() {
+        // Fallback while the push channel is down
+        if (!this.statusUpdateInterval) {
+            this.startStatusMonitoring();
+        }
+        if (this.isRunning && !this.frameUpdateInterval) {
+            this.frameUpdateInterval = setInterval(async () => {
+                await this.updateLatestDetections();
+            }, 250);
+        }
+        if (this.isRunning && !this.detectionLogInterval) {
+            this.startDetectionLogUpdates();
+        }
+    }
+
+    stopPolling() {
+        if (this.statusUpdateInterval) {
+            clearInterval(this.statusUpdateInterval);
+            this.statusUpdateInterval = null;
+        }
+        if (this.frameUpdateInterval) {
+            clearInterval(this.frameUpdateInterval);
+            this.frameUpdateInterval = null;
+        }
+        if (this.detectionLogInterval) {
+            clearInterval(this.detectionLogInterval);
+            this.detectionLogInterval = null;
+        }
     }
 
     initializeElements() {
@@ -94,16 +163,21 @@ class LiveDetectionController {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    camera_source: cameraSource
+                    camera_source: cameraSource,
+                    viewer_id: this.viewerId
                 })
             });
 
             const data = await response.json();
             if (data.success) {
                 this.isRunning = true;
+                this.streamId = data.stream_id;
+                this.watchStream();
                 this.updateControlsState();
                 this.startFrameUpdates();
-                this.startDetectionLogUpdates();
+                if (!this.pushConnected) {
+                    this.startPolling();
+                }
                 this.clearNoFeedMessage();
                 this.showSuccess('DETECTION STARTED SUCCESSFULLY');
             } else {
@@ -122,12 +196,22 @@ class LiveDetectionController {
         this.elements.stopBtn.disabled = true;
         try {
             const response = await fetch('/feature4/api/stop', {
-                method: 'POST'
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    stream_id: this.streamId,
+                    viewer_id: this.viewerId
+                })
             });
 
             const data = await response.json();
             if (data.success) {
+                // Other sessions may keep the camera running; this page stops watching either way
                 this.isRunning = false;
+                this.streamId = null;
+                this.watchStream();
                 this.stopAllUpdates();
                 this.updateControlsState();
                 this.showNoFeedMessage();
@@ -143,46 +227,39 @@ class LiveDetectionController {
     }
 
     startFrameUpdates() {
-        this.frameUpdateInterval = setInterval(async () => {
-            await this.updateFrame();
-        }, 100);
+        // Frames arrive as an MJPEG stream; only the small detections JSON is polled
+        this.elements.videoFrame.innerHTML = `
+            <img src="/feature4/api/stream.mjpg?${this.streamQuery()}&t=${Date.now()}" 
+                 alt="Live Detection Feed" 
+                 class="live-frame">
+        `;
+        this.lastFrameSeq = 0;
     }
 
-    async updateFrame() {
+    async updateLatestDetections() {
         if (!this.isRunning) return;
 
         try {
-            const response = await fetch('/feature4/api/frame');
+            const response = await fetch(`/feature4/api/detections/latest?${this.streamQuery()}&after=${this.lastFrameSeq}`);
             const data = await response.json();
 
-            if (data.success && data.frame) {
-                this.displayFrame(data.frame);
-                this.updateFPS();
+            if (data.success && !data.unchanged) {
+                this.applyFrame(data);
             }
         } catch (error) {
-            console.error('Error updating frame:', error);
+            console.error('Error updating detections:', error);
         }
     }
 
-    displayFrame(frameData) {
-        this.elements.videoFrame.innerHTML = `
-            <img src="data:image/jpeg;base64,${frameData}" 
-                 alt="Live Detection Feed" 
-                 class="live-frame">
-        `;
+    applyFrame(data) {
+        this.lastFrameSeq = data.seq;
+        this.elements.fpsCounter.textContent = `${Math.round(data.fps)} FPS`;
     }
 
-    updateFPS() {
-        this.frameCount++;
-        const now = Date.now();
-        const elapsed = now - this.lastFrameTime;
-
-        if (elapsed >= 1000) {
-            const fps = Math.round((this.frameCount * 1000) / elapsed);
-            this.elements.fpsCounter.textContent = `${fps} FPS`;
-            this.frameCount = 0;
-            this.lastFrameTime = now;
-        }
+    closeStream() {
+        // Dropping the src closes the MJPEG connection
+        const img = this.elements.videoFrame.querySelector('img.live-frame');
+        if (img) img.src = '';
     }
 
     startDetectionLogUpdates() {
@@ -195,16 +272,23 @@ class LiveDetectionController {
         if (!this.isRunning) return;
 
         try {
-            const response = await fetch('/feature4/api/detections');
+            const response = await fetch(`/feature4/api/detections?${this.streamQuery()}`);
             const data = await response.json();
             if (data.success) {
-                this.displayDetectionLog(data.detections);
+                this.detections = data.detections;
+                this.displayDetectionLog(this.detections);
             }
         } catch (error) {
             console.error('Error updating detection log:', error);
         }
     }
 
+    appendDetections(entries) {
+        // Same 50-entry window as /api/detections
+        this.detections = this.detections.concat(entries).slice(-50);
+        this.displayDetectionLog(this.detections);
+    }
+
     displayDetectionLog(detections) {
         if (!detections || detections.length === 0) {
             this.elements.detectionLog.innerHTML = `
@@ -237,29 +321,35 @@ class LiveDetectionController {
 
     async updateStatus() {
         try {
-            const response = await fetch('/feature4/api/status');
+            const response = await fetch(`/feature4/api/status?${this.streamQuery()}`);
             const data = await response.json();
-
-            if (data.is_running) {
-                this.updateStatusIndicator('ONLINE', 'online');
-            } else {
-                this.updateStatusIndicator('OFFLINE', 'offline');
-            }
-
-            // Update detection state if it changed externally
-            if (data.is_running !== this.isRunning) {
-                this.isRunning = data.is_running;
-                this.updateControlsState();
-                if (!this.isRunning) {
-                    this.stopAllUpdates();
-                    this.showNoFeedMessage();
-                }
-            }
+            this.applyStatus(data);
         } catch (error) {
             this.updateStatusIndicator('ERROR', 'error');
         }
     }
 
+    applyStatus(data) {
+        if (data.is_running) {
+            this.updateStatusIndicator('ONLINE', 'online');
+        } else {
+            this.updateStatusIndicator('OFFLINE', 'offline');
+        }
+
+        // Without a stream of its own the page only shows whether any camera is live
+        if (!this.streamId || data.stream_id !== this.streamId) return;
+
+        // Camera lost or stopped by its last owner
+        if (!data.is_running && this.isRunning) {
+            this.isRunning = false;
+            this.streamId = null;
+            this.watchStream();
+            this.updateControlsState();
+            this.stopAllUpdates();
+            this.showNoFeedMessage();
+        }
+    }
+
     updateStatusIndicator(text, status) {
         this.elements.statusText.textContent = text;
         this.elements.statusDot.className = `status-dot ${status}`;
@@ -278,6 +368,7 @@ class LiveDetectionController {
     }
 
     stopAllUpdates() {
+        this.closeStream();
         if (this.frameUpdateInterval) {
             clearInterval(this.frameUpdateInterval);
             this.frameUpdateInterval = null;
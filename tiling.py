@@ -0,0 +1,123 @@
+import numpy as np
+
+# Sliced (tiled) inference for high-resolution stills
+#
+# The image is cut into overlapping tiles that are run through the model at
+# native resolution, plus one downscaled full-frame pass for objects larger
+# than a tile. Boxes are shifted back to image coordinates and duplicates
+# across tile seams are merged.
+TILE_OVERLAP = 0.2
+# Boxes of the same class are merged when intersection / smaller area reaches
+# this; a box cut by a tile seam is mostly contained in the full box
+TILE_MATCH_THRESHOLD = 0.5
+
+
+def _starts(length, tile_size, stride):
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, stride))
+    # Last tile is flush with the edge rather than running past it
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_windows(width, height, tile_size=640, overlap=TILE_OVERLAP):
+    """
+    (x1, y1, x2, y2) windows of at most tile_size covering the image
+
+    Neighbouring windows overlap by at least overlap * tile_size pixels, so
+    an object smaller than that lies wholly inside some tile.
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in _starts(height, tile_size, stride)
+            for x in _starts(width, tile_size, stride)]
+
+
+def merge_detections(detections, match_threshold=TILE_MATCH_THRESHOLD):
+    """
+    Merge duplicate boxes from overlapping tiles (greedy, per class)
+
+    Boxes are taken by descending confidence; every remaining box of the same
+    class whose intersection over the smaller box reaches match_threshold is
+    folded into it (union of the boxes, highest confidence kept).
+
+    Args:
+        detections (np.ndarray): (N, 6) rows of [x1, y1, x2, y2, conf, cls]
+
+    Returns:
+        np.ndarray: (M, 6) merged rows, by descending confidence
+    """
+    detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+    if len(detections) < 2:
+        return detections
+
+    detections = detections[np.argsort(-detections[:, 4], kind='stable')]
+    areas = (detections[:, 2] - detections[:, 0]) * (detections[:, 3] - detections[:, 1])
+    merged = []
+    alive = np.ones(len(detections), dtype=bool)
+    for i in range(len(detections)):
+        if not alive[i]:
+            continue
+        alive[i] = False
+        box = detections[i].copy()
+        candidates = np.flatnonzero(alive & (detections[:, 5] == box[5]))
+        if len(candidates):
+            others = detections[candidates]
+            iw = np.clip(np.minimum(box[2], others[:, 2]) - np.maximum(box[0], others[:, 0]), 0, None)
+            ih = np.clip(np.minimum(box[3], others[:, 3]) - np.maximum(box[1], others[:, 1]), 0, None)
+            smaller = np.minimum(areas[i], areas[candidates])
+            ios = iw * ih / np.maximum(smaller, 1e-6)
+            matches = candidates[ios >= match_threshold]
+            if len(matches):
+                group = detections[matches]
+                box[:2] = np.minimum(box[:2], group[:, :2].min(axis=0))
+                box[2:4] = np.maximum(box[2:4], group[:, 2:4].max(axis=0))
+                alive[matches] = False
+        merged.append(box)
+    return np.stack(merged)
+
+
+def sliced_predict(predict_batch, image, tile_size=640, overlap=TILE_OVERLAP, batch_size=8,
+                   full_frame=True, match_threshold=TILE_MATCH_THRESHOLD, predict_full=None):
+    """
+    Tiled detections for one image
+
+    Images that fit in a single tile are predicted once, unchanged.
+
+    Args:
+        predict_batch: callable taking a list of images and returning one
+            (N, 6) [x1, y1, x2, y2, conf, cls] array per image, in that
+            image's own pixel coordinates
+        image (np.ndarray): HxWxC image
+        tile_size (int): Tile edge in pixels (also the inference size)
+        overlap (float): Fraction of a tile shared with its neighbour
+        batch_size (int): Tiles per predict_batch call
+        full_frame (bool): Also run the whole (downscaled) image, for objects
+            larger than a tile
+        match_threshold (float): See merge_detections
+        predict_full: callable like predict_batch for the full-frame pass and
+            single-tile images (defaults to predict_batch)
+
+    Returns:
+        tuple: ((M, 6) float32 detections in image coordinates, number of tiles)
+    """
+    predict_full = predict_full or predict_batch
+    height, width = image.shape[:2]
+    windows = tile_windows(width, height, tile_size, overlap)
+    if len(windows) == 1:
+        return np.asarray(predict_full([image])[0], dtype=np.float32).reshape(-1, 6), 1
+
+    parts = []
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start:start + batch_size]
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in batch]
+        for (x1, y1, _, _), dets in zip(batch, predict_batch(crops)):
+            dets = np.array(dets, dtype=np.float32).reshape(-1, 6)
+            dets[:, [0, 2]] += x1
+            dets[:, [1, 3]] += y1
+            parts.append(dets)
+    if full_frame:
+        parts.append(np.asarray(predict_full([image])[0], dtype=np.float32).reshape(-1, 6))
+
+    return merge_detections(np.concatenate(parts), match_threshold), len(windows)
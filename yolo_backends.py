@@ -0,0 +1,137 @@
+import importlib
+import os
+import shutil
+import tempfile
+import threading
+
+from ultralytics import YOLO
+
+from model_registry import model_registry
+
+# Inference backends for ultralytics YOLO weights
+#   'torch'    - PyTorch eager (the .pt file as shipped)
+#   'onnx'     - ONNX Runtime, exported once and cached next to the weights
+#   'openvino' - OpenVINO IR, exported once and cached next to the weights
+#   'onnx_int8' - ONNX Runtime with static INT8 weights/activations (opt-in, see quantization.py)
+YOLO_BACKENDS = ('torch', 'onnx', 'openvino', 'onnx_int8')
+YOLO_BACKEND = os.environ.get('YOLO_BACKEND', 'torch')
+
+# Python module each exported backend needs at inference time
+RUNTIME_MODULES = {'onnx': 'onnxruntime', 'onnx_int8': 'onnxruntime', 'openvino': 'openvino'}
+
+_export_lock = threading.Lock()
+# (weights, requested backend, imgsz) -> backend actually serving it
+_resolved = {}
+
+
+def exported_path(weights, backend, imgsz):
+    """Cached export location for weights, e.g. yolo11x_1280.onnx or yolo11x_1280_openvino_model/"""
+    stem = os.path.splitext(weights)[0]
+    if backend == 'onnx':
+        return f"{stem}_{imgsz}.onnx"
+    if backend == 'openvino':
+        return f"{stem}_{imgsz}_openvino_model"
+    raise ValueError(f"Unknown export backend: {backend}")
+
+
+def _is_fresh(artefact, weights):
+    if not os.path.exists(artefact):
+        return False
+    # Re-export when the weights were replaced after the export
+    return not os.path.exists(weights) or os.path.getmtime(artefact) >= os.path.getmtime(weights)
+
+
+def export_yolo(weights, backend, imgsz=640):
+    """
+    Export weights for backend once and return the cached artefact path
+
+    Exports use dynamic input shapes, so batched calls and other image
+    sizes still work; imgsz is the size the graph is traced and tuned at.
+    The export runs on a private copy of the weights in a temporary directory
+    and is moved into place with os.replace, so processes exporting the same
+    model at once (e.g. feature 3 shard workers) never see a half-written file.
+    """
+    target = exported_path(weights, backend, imgsz)
+    with _export_lock:
+        if _is_fresh(target, weights):
+            return target
+
+        print(f"📦 Exporting {weights} to {backend} at {imgsz}px (one-off)...")
+        if not os.path.exists(weights):
+            YOLO(weights)  # Downloads the released weights by name
+        target_dir = os.path.dirname(os.path.abspath(target))
+        with tempfile.TemporaryDirectory(dir=target_dir, prefix='.export-') as tmp_dir:
+            staged = os.path.join(tmp_dir, os.path.basename(weights))
+            shutil.copy2(weights, staged)
+            # ultralytics writes <stem>.onnx / <stem>_openvino_model next to the (staged) weights
+            exported = YOLO(staged).export(format=backend, imgsz=imgsz, dynamic=True, verbose=False)
+            if os.path.isdir(target):
+                # A directory cannot be replaced in one step: move the old one into tmp_dir first
+                os.replace(target, os.path.join(tmp_dir, 'previous'))
+            os.replace(exported, target)
+        print(f"✅ Cached {backend} export at {target}")
+        return target
+
+
+def resolve_yolo(weights, backend=None, imgsz=640):
+    """
+    (backend, path) that will actually serve weights on backend (default: YOLO_BACKEND)
+
+    Prepares the export (or INT8 model) and checks its runtime is installed.
+    If either fails, ('torch', weights) is returned instead, and the fallback
+    is remembered so registry keys name the backend really in use.
+    """
+    backend = backend or YOLO_BACKEND
+    if backend not in YOLO_BACKENDS:
+        raise ValueError(f"Unknown YOLO backend '{backend}', expected one of {', '.join(YOLO_BACKENDS)}")
+    if backend == 'torch':
+        return 'torch', weights
+
+    try:
+        importlib.import_module(RUNTIME_MODULES[backend])
+        if backend == 'onnx_int8':
+            from quantization import quantize_yolo_onnx
+            path = quantize_yolo_onnx(weights, imgsz)
+        else:
+            path = export_yolo(weights, backend, imgsz)
+    except Exception as e:
+        print(f"⚠️ {backend} backend unavailable for {weights} ({e}), falling back to PyTorch")
+        _resolved[(weights, backend, imgsz)] = 'torch'
+        return 'torch', weights
+    _resolved[(weights, backend, imgsz)] = backend
+    return backend, path
+
+
+def load_yolo(weights, backend=None, imgsz=640):
+    """
+    YOLO model for weights on the chosen backend (default: YOLO_BACKEND)
+
+    Exported models return the same ultralytics Results objects as the .pt
+    model. If the export or runtime is unavailable, PyTorch is used instead.
+    """
+    backend, path = resolve_yolo(weights, backend, imgsz)
+    if backend == 'torch':
+        return YOLO(path)
+    return YOLO(path, task='detect')
+
+
+def get_yolo(weights, backend=None, imgsz=640):
+    """
+    Shared registry model for weights; returns (registry key, model)
+
+    The backend is resolved before the key is built, so a model that fell
+    back to PyTorch is registered (and reported) as PyTorch.
+    """
+    backend, _ = resolve_yolo(weights, backend, imgsz)
+    key = yolo_registry_key(weights, backend, imgsz)
+    return key, model_registry.get(key, lambda: load_yolo(weights, backend, imgsz))
+
+
+def yolo_registry_key(weights, backend=None, imgsz=640):
+    """Model registry key; PyTorch keeps the plain 'yolo:<weights>' key"""
+    backend = backend or YOLO_BACKEND
+    # A backend that already fell back is keyed as what actually serves it
+    backend = _resolved.get((weights, backend, imgsz), backend)
+    if backend == 'torch':
+        return f"yolo:{weights}"
+    return f"yolo:{weights}@{backend}{imgsz}"